@@ -0,0 +1,91 @@
+"""
+In-process cache of serialized chapter responses.
+
+Entries are keyed by ``(translation, book, chapter)`` and evicted least
+recently used first once the total size of the cached bodies exceeds the
+byte budget, so a few very long chapters (Psalm 119, Numbers 7) cannot push
+out hundreds of short ones the way a count-bounded cache would.
+
+The cache is only touched from the event loop thread and needs no locking.
+"""
+
+from collections import OrderedDict
+
+
+class CachedChapter:
+    __slots__ = ('body', 'etag')
+
+    def __init__(self, body, etag):
+        self.body = body
+        self.etag = etag
+
+
+class ChapterCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, body, etag):
+        """Store a serialized body, evicting old entries to stay within the byte budget"""
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.current_bytes -= len(previous.body)
+        self._entries[key] = CachedChapter(body, etag)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= len(evicted.body)
+            self.evictions += 1
+
+    def discard_translation(self, translation):
+        """Drop every chapter and parallel-view entry that includes a translation"""
+        for key in [key for key in self._entries
+                    if key[0] == translation or (key[0] == 'parallel' and translation in key[1])]:
+            self.current_bytes -= len(self._entries.pop(key).body)
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def etag_matches(if_none_match, etag):
+    """Evaluate an If-None-Match header against a strong ETag (weak comparison, per RFC 9110)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
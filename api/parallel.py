@@ -0,0 +1,131 @@
+"""
+Parallel view: one canonical chapter in several translations, verse by verse.
+
+All requested translations are read in a single statement: each worker
+thread keeps an in-memory connection with the translation databases
+ATTACHed read-only, and the chapter rowid ranges of every translation are
+combined with ``UNION ALL``. (SQLite allows a limited number of attached
+databases per connection, 10 by default, so larger requests are read in
+that many statements and attachments are recycled least recently used.)
+
+Rows are converted from each translation's own versification to canonical
+keys, so e.g. Joel 3 lines up with JPS Joel 4 and Psalm titles (verse 0)
+line up across Hebrew and English numbering. The per-translation streams
+are then merge-joined on the canonical key.
+"""
+
+import hashlib
+import heapq
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from versification.canon import make_key, split_key
+from versification.mapping import get_mapper, native_chapters
+
+
+def merge_join(streams):
+    """Merge per-translation [(canonical key, text)] lists into [(key, [text or None, ...])]"""
+    merged = []
+    width = len(streams)
+    tagged = [[(key, index, text) for key, text in stream] for index, stream in enumerate(streams)]
+    for key, index, text in heapq.merge(*tagged):
+        if not merged or merged[-1][0] != key:
+            merged.append((key, [None] * width))
+        row = merged[-1][1]
+        if row[index] is None:
+            row[index] = text
+    return merged
+
+
+class ParallelReader:
+    def __init__(self, store):
+        self.store = store
+        self._local = threading.local()
+
+    def _connection(self):
+        local = self._local
+        if not hasattr(local, 'conn'):
+            local.conn = sqlite3.connect('file::memory:', uri=True, check_same_thread=False)
+            local.limit = local.conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+            local.attached = OrderedDict()  # translation -> schema name
+            local.versions = {}  # schema name -> index version of the database attached there
+            local.next_schema = 0
+        return local
+
+    def _attach(self, local, db):
+        """Return the schema name of an attached translation, attaching it if needed"""
+        schema = local.attached.get(db.translation)
+        if schema is not None and local.versions[schema] == db.version:
+            local.attached.move_to_end(db.translation)
+            return schema
+        if schema is not None:
+            # The database was rebuilt since it was attached: attach the new file
+            del local.attached[db.translation]
+            del local.versions[schema]
+            local.conn.execute(f"DETACH DATABASE {schema}")
+        if len(local.attached) >= local.limit:
+            _, old_schema = local.attached.popitem(last=False)
+            del local.versions[old_schema]
+            local.conn.execute(f"DETACH DATABASE {old_schema}")
+        schema = f"t{local.next_schema}"
+        local.next_schema += 1
+        uri = f"file:{db.db_path}?mode=ro"
+        local.conn.execute(f"ATTACH DATABASE ? AS {schema}", (uri,))
+        local.attached[db.translation] = schema
+        local.versions[schema] = db.version
+        return schema
+
+    def read_ranges(self, dbs, book, chapter):
+        """Read each translation's native rows for a canonical chapter; returns [[(native key, text)], ...]"""
+        local = self._connection()
+        results = [[] for _ in dbs]
+        for start in range(0, len(dbs), local.limit):
+            batch = dbs[start:start + local.limit]
+            # A batch never exceeds the limit, so recycling only drops attachments from outside it
+            for db in batch:
+                self._attach(local, db)
+            selects, params, ranges = [], [], []
+            for offset, db in enumerate(batch):
+                schema = local.attached[db.translation]
+                for native_book, native_chapter in native_chapters(db.scheme, book, chapter):
+                    bounds = db.chapters.get((native_book, native_chapter))
+                    if bounds is None:
+                        continue
+                    selects.append(
+                        f'SELECT {len(ranges)}, id, verse, text FROM {schema}."{db.verses_table}" WHERE id BETWEEN ? AND ?'
+                    )
+                    params.extend(bounds)
+                    ranges.append((start + offset, native_book, native_chapter))
+            if not selects:
+                continue
+            for range_index, _, verse, text in local.conn.execute(' UNION ALL '.join(selects), params):
+                position, native_book, native_chapter = ranges[range_index]
+                results[position].append((make_key(native_book, native_chapter, verse), text))
+        return results
+
+    def chapter(self, translations, book, chapter):
+        """Canonical verses of a chapter as [(verse, [text per translation])], or None if no translation has it"""
+        dbs = [self.store.get(translation) for translation in translations]
+        for db in dbs:
+            db.ensure_index()
+        streams = []
+        for db, rows in zip(dbs, self.read_ranges(dbs, book, chapter)):
+            mapper = get_mapper(db.scheme)
+            stream = []
+            for native_key, text in rows:
+                key = mapper.to_canonical(native_key)
+                if key is not None and split_key(key)[:2] == (book, chapter):
+                    stream.append((key, text))
+            stream.sort(key=lambda item: item[0])
+            streams.append(stream)
+        if not any(streams):
+            return None
+        return [(split_key(key)[2], texts) for key, texts in merge_join(streams)]
+
+
+def parallel_etag(dbs, book, chapter):
+    """Strong ETag for a parallel chapter, derived from each database's content hash"""
+    hashes = ':'.join(f"{db.translation}={db.content_hash}" for db in dbs)
+    digest = hashlib.sha256(f"{hashes}:{book}:{chapter}".encode('utf-8')).hexdigest()
+    return f'"{digest[:20]}"'
@@ -0,0 +1,72 @@
+"""
+Read-only SQLite connection pool.
+
+Connections are opened with ``mode=ro`` URIs and handed out to worker threads;
+a connection is only ever used by one thread at a time, so they are created
+with ``check_same_thread=False`` and returned to the pool after each query.
+After ``reset()`` (the database file was rebuilt) connections opened before
+it are closed as they come back instead of being reused.
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class ReadOnlyPool:
+    def __init__(self, db_path, size=8):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._generation = 0
+        self._generations = {}  # connection -> generation it was opened in
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        uri = f"file:{self.db_path}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        # Queries never write: skip locking overhead and keep hot pages in memory
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute("PRAGMA cache_size = -8000")
+        self._generations[conn] = self._generation
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with block"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            conn = self._connect() if can_create else self._idle.get()
+        try:
+            yield conn
+        finally:
+            if self._generations.get(conn) != self._generation:
+                # Opened before a reset: replace it, so threads waiting for a connection still get one
+                self._generations.pop(conn, None)
+                conn.close()
+                conn = self._connect()
+            self._idle.put(conn)
+
+    def reset(self):
+        """Close every connection opened so far, so the next queries see the file as it is now"""
+        with self._lock:
+            self._generation += 1
+        self.close()
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._generations.pop(conn, None)
+                self._created -= 1
@@ -0,0 +1,576 @@
+"""
+Read-only HTTP API over formats/sqlite.
+
+Endpoints (GET only, JSON responses):
+
+- ``/translations``
+- ``/translations/{abbr}/books``
+- ``/translations/{abbr}/{book_id}/{chapter}``
+- ``/translations/{abbr}/passage?ref=Gen 1:1-3; Jn 3:16-4:2``
+- ``/parallel/{book_id}/{chapter}?translations=A,B,...``
+- ``/search?q=...&translation=abbr`` (needs the indexes from generate_search_index.py);
+  results are BM25-ranked unless ``order=canonical``, and ``boost=W``
+  weights the cross-reference boost when the server was given the votes;
+  words missing from the index are replaced by their closest spelling
+  (reported as ``corrections``) unless ``fuzzy=0``; every result carries the
+  ``highlights`` character spans of the query's matches in its text
+- ``/search?q=...&translations=A,B`` or ``&language=en`` (one ranked list
+  over several translations, searched in parallel, with per-translation
+  timings under ``shards``; shards that could not reach the top results
+  are skipped, and ``total_exact`` is false when their matches went uncounted)
+- ``/search/regex?pattern=...&translations=A,B`` (regex or, with
+  ``literal=1``, substring search over every translation in the trigram
+  index; ``case=1`` makes it case-sensitive; patterns with nested
+  quantifiers are refused, and a search that runs past its deadline is
+  killed and answered with 503)
+- ``/suggest?q=...&translation=abbr`` (book names in every language, plus
+  the translation's names and frequent terms, completing what was typed)
+- ``/stats`` (chapter cache counters)
+
+``book_id`` is the canonical book number (Genesis = 1 ... Revelation = 66,
+deuterocanon from 67), so the same id addresses the same book in every
+translation regardless of its own book order.
+
+The server is a small HTTP/1.1 implementation on ``asyncio.start_server``
+with keep-alive. All SQLite work runs on a thread pool through
+``loop.run_in_executor`` so queries never block the event loop. No
+endpoint takes a request body; one over ``MAX_BODY_BYTES`` gets a 413.
+
+Serialized chapter bodies are kept in a byte-bounded LRU (see api.cache)
+and carry strong ETags, so conditional requests with a current
+``If-None-Match`` get a 304 without reading from SQLite.
+"""
+
+import asyncio
+import json
+import math
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from api.cache import ChapterCache, etag_matches
+from api.parallel import ParallelReader, parallel_etag
+from api.store import BibleStore
+from search.executor import SearchExecutor
+from versification.canon import split_key
+from versification.references import format_range, parse_reference
+
+STATUS_TEXT = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024
+MAX_PARALLEL_TRANSLATIONS = 20
+AUXILIARY_INDEXES = {'trigrams.idx', 'suggest.idx'}
+CONTENT_LENGTH = re.compile(r'[0-9]+')
+
+
+class Response:
+    def __init__(self, status=200, body=b'', headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+
+def json_body(payload):
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(payload, status=200):
+    return Response(status, json_body(payload), {'Content-Type': 'application/json; charset=utf-8'})
+
+
+def error_response(status, message):
+    return json_response({'error': message}, status)
+
+
+def parse_boost(value, default):
+    """Cross-reference boost weight from a query parameter; ValueError unless it is a finite number"""
+    if value is None:
+        return default
+    weight = float(value)
+    if not math.isfinite(weight):
+        raise ValueError(f"boost must be finite: {value}")
+    return max(0.0, weight)
+
+
+class BibleAPI:
+    def __init__(self, sqlite_directory, source_directory=None, workers=None, pool_size=None,
+                 cache_bytes=64 * 1024 * 1024, search_directory=None, cross_references=None, boost_weight=0.5,
+                 regex_processes=2, regex_timeout=2.0):
+        workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.search_directory = search_directory
+        self._search_indexes = {}
+        self._search_names = None
+        self.cross_references = cross_references or []
+        self.boost_weight = boost_weight
+        self._boost = None
+        self.regex_processes = regex_processes
+        self.regex_timeout = regex_timeout
+        self._regex_workers = None
+        self._suggest_index = None
+        # Indexes are opened lazily from executor threads; the lock makes sure each is opened once
+        self._open_lock = threading.Lock()
+        self.search_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bible-search')
+        self.search_executor = SearchExecutor(self.search_pool)
+        self.store = BibleStore(sqlite_directory, source_directory, pool_size=pool_size or workers)
+        self.parallel = ParallelReader(self.store)
+        self.cache = ChapterCache(cache_bytes)
+        self._index_versions = {}  # translation -> index version its cached responses were built from
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bible-api')
+
+    async def run_blocking(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def dispatch(self, method, path, headers):
+        """Route one request to a handler and return a Response"""
+        if method not in ('GET', 'HEAD'):
+            return error_response(405, 'Only GET is supported')
+        url = urlsplit(path)
+        parts = [unquote(part) for part in url.path.strip('/').split('/') if part]
+        if parts == ['stats']:
+            return json_response(self.cache.stats())
+        if parts == ['search']:
+            query = parse_qs(url.query)
+            if 'translations' in query or 'language' in query:
+                translations = [t for t in query.get('translations', [''])[0].split(',') if t]
+                return await self.multi_search(query.get('q', [''])[0], translations,
+                                               query.get('language', [None])[0], query.get('limit', ['20'])[0],
+                                               query.get('boost', [None])[0], query.get('fuzzy', ['1'])[0] != '0')
+            return await self.search(query.get('q', [''])[0], query.get('translation', [''])[0],
+                                     query.get('limit', ['20'])[0], query.get('order', ['relevance'])[0],
+                                     query.get('boost', [None])[0], query.get('fuzzy', ['1'])[0] != '0')
+        if parts == ['suggest']:
+            query = parse_qs(url.query)
+            return await self.suggest(query.get('q', [''])[0], query.get('translation', [None])[0],
+                                      query.get('limit', ['10'])[0])
+        if parts == ['search', 'regex']:
+            query = parse_qs(url.query)
+            translations = [t for t in query.get('translations', [''])[0].split(',') if t]
+            return await self.regex_search(query.get('pattern', [''])[0], translations,
+                                           query.get('limit', ['100'])[0], query.get('case', ['0'])[0] == '1',
+                                           query.get('literal', ['0'])[0] == '1')
+        if len(parts) == 3 and parts[0] == 'parallel':
+            try:
+                book, chapter = int(parts[1]), int(parts[2])
+            except ValueError:
+                return error_response(400, 'Book id and chapter must be integers')
+            query = parse_qs(url.query)
+            translations = [t for value in query.get('translations', []) for t in value.split(',') if t]
+            return await self.parallel_chapter(translations, book, chapter, headers)
+        if not parts or parts[0] != 'translations' or len(parts) > 4:
+            return error_response(404, 'Not found')
+        if len(parts) == 1:
+            return json_response(self.store.translations())
+        translation = parts[1]
+        if self.store.get(translation) is None:
+            return error_response(404, f"Unknown translation: {translation}")
+        if len(parts) == 3 and parts[2] == 'books':
+            books = await self.run_blocking(self.store.books, translation)
+            return json_response(books)
+        if len(parts) == 3 and parts[2] == 'passage':
+            references = [ref for ref in parse_qs(url.query).get('ref', []) if ref.strip()]
+            if not references:
+                return error_response(400, 'Pass a reference as ?ref=')
+            return await self.passage(translation, '; '.join(references))
+        if len(parts) == 4:
+            try:
+                book, chapter = int(parts[2]), int(parts[3])
+            except ValueError:
+                return error_response(400, 'Book id and chapter must be integers')
+            return await self.chapter(translation, book, chapter, headers)
+        return error_response(404, 'Not found')
+
+    async def refresh_index(self, db):
+        """Index a translation if it is new or its file changed, dropping its cached responses after a rebuild"""
+        if db.is_stale():
+            await self.run_blocking(db.ensure_index)
+        if self._index_versions.get(db.translation) != db.version:
+            self.cache.discard_translation(db.translation)
+            self._index_versions[db.translation] = db.version
+
+    async def chapter(self, translation, book, chapter, headers):
+        db = self.store.get(translation)
+        await self.refresh_index(db)
+        etag = db.chapter_etag(book, chapter)
+        if etag is None:
+            return error_response(404, f"{translation} has no chapter {book}:{chapter}")
+        response_headers = {'Content-Type': 'application/json; charset=utf-8', 'ETag': etag}
+        # The ETag comes from the in-memory index, so a revalidation never reaches storage
+        if etag_matches(headers.get('if-none-match'), etag):
+            return Response(304, b'', {'ETag': etag})
+
+        key = (translation, book, chapter)
+        cached = self.cache.get(key)
+        if cached is None:
+            rows = await self.run_blocking(db.chapter, book, chapter)
+            body = json_body({
+                'translation': translation,
+                'book': book,
+                'chapter': chapter,
+                'verses': [{'verse': verse, 'text': text} for verse, text in rows],
+            })
+            self.cache.put(key, body, etag)
+            return Response(200, body, response_headers)
+        return Response(200, cached.body, response_headers)
+
+    async def passage(self, translation, reference):
+        try:
+            ranges = parse_reference(reference)
+        except ValueError as e:
+            return error_response(400, str(e))
+        passages = []
+        for first_key, last_key in ranges:
+            verses = await self.run_blocking(self.store.passage, translation, first_key, last_key)
+            passages.append({
+                'reference': format_range(first_key, last_key),
+                'verses': [dict(zip(('book', 'chapter', 'verse'), split_key(key)), text=text) for key, text in verses],
+            })
+        return json_response({'translation': translation, 'passages': passages})
+
+    def search_index(self, translation):
+        """Open (once) the search index of a translation, or return None if it was not generated"""
+        index = self._search_indexes.get(translation)
+        if index is None and self.search_directory:
+            path = os.path.join(self.search_directory, f"{translation}.idx")
+            if os.path.exists(path):
+                # Imported here so the server runs without NumPy when search is not used
+                from search.index import SearchIndex
+                with self._open_lock:
+                    index = self._search_indexes.get(translation)
+                    if index is None:
+                        index = self._search_indexes[translation] = SearchIndex(path)
+        return index
+
+    def cross_reference_boost(self):
+        """Cross-reference votes, loaded on the first ranked search that uses them"""
+        if self._boost is None and self.cross_references:
+            from search.cross_references import CrossReferenceBoost
+            with self._open_lock:
+                if self._boost is None:
+                    self._boost = CrossReferenceBoost(self.cross_references)
+        return self._boost
+
+    def run_search(self, translation, query, limit, order, weight, fuzzy=True):
+        index = self.search_index(translation)
+        if index is None:
+            return None
+        corrections = {}
+        if fuzzy:
+            query, corrections = index.correct_query(query)
+        if order == 'canonical':
+            keys = index.search(query)
+            total, keys, scores = len(keys), keys[:limit], None
+        else:
+            boost = self.cross_reference_boost()
+            boost = boost.boost(index, weight) if boost is not None else None
+            keys, scores, total = index.rank(query, limit, boost)
+        texts = self.store.get(translation).verses(keys)
+        highlights = index.highlights(keys, query)
+        results = [dict(zip(('book', 'chapter', 'verse'), split_key(key)), text=texts.get(key, ''), highlights=spans)
+                   for key, spans in zip(keys, highlights)]
+        if scores is not None:
+            for result, score in zip(results, scores):
+                result['score'] = round(score, 4)
+        return {
+            'translation': translation,
+            'query': query,
+            'order': order,
+            'corrections': corrections,
+            'total': total,
+            'results': results,
+        }
+
+    async def search(self, query, translation, limit, order='relevance', boost=None, fuzzy=True):
+        if not query.strip():
+            return error_response(400, 'Pass a query as ?q=')
+        if self.store.get(translation) is None:
+            return error_response(404, f"Unknown translation: {translation}")
+        if order not in ('relevance', 'canonical'):
+            return error_response(400, 'order must be relevance or canonical')
+        try:
+            limit = max(1, min(int(limit), 500))
+            weight = parse_boost(boost, self.boost_weight)
+        except ValueError:
+            return error_response(400, 'limit must be an integer and boost a number')
+        result = await self.run_blocking(self.run_search, translation, query, limit, order, weight, fuzzy)
+        if result is None:
+            return error_response(404, f"No search index for {translation}")
+        return json_response(result)
+
+    def search_indexes(self, translations=None, language=None):
+        """Open search indexes by translation name, or every index of a language"""
+        if translations:
+            indexes = {translation: self.search_index(translation) for translation in translations}
+            return {translation: index for translation, index in indexes.items() if index is not None}
+        if self._search_names is None:
+            self._search_names = []
+            if self.search_directory and os.path.isdir(self.search_directory):
+                self._search_names = [name[:-4] for name in sorted(os.listdir(self.search_directory))
+                                      if name.endswith('.idx') and name not in AUXILIARY_INDEXES]
+        indexes = {}
+        for name in self._search_names:
+            index = self.search_index(name)
+            if index is not None and index.language == language:
+                indexes[name] = index
+        return indexes
+
+    def run_multi_search(self, query, translations, language, limit, weight, fuzzy):
+        indexes = self.search_indexes(translations, language)
+        if not indexes:
+            return None
+        boost = self.cross_reference_boost()
+        boosts = {translation: boost.boost(index, weight) for translation, index in indexes.items()} if boost else None
+        matches, shards = self.search_executor.search(indexes, query, limit, boosts, fuzzy)
+        keys_by_translation = {}
+        for translation, key, _ in matches:
+            keys_by_translation.setdefault(translation, []).append(key)
+        texts = {translation: self.store.get(translation).verses(keys) if self.store.get(translation) else {}
+                 for translation, keys in keys_by_translation.items()}
+        queries = {shard.translation: shard.query for shard in shards}
+        highlights = {translation: dict(zip(keys, indexes[translation].highlights(keys, queries[translation])))
+                      for translation, keys in keys_by_translation.items()}
+        return {
+            'query': query,
+            'translations': list(indexes),
+            'corrections': {shard.translation: shard.corrections for shard in shards if shard.corrections},
+            # Skipped shards were not counted, so the total is then only a lower bound
+            'total': sum(shard.total for shard in shards if shard.total is not None),
+            'total_exact': all(shard.total is not None for shard in shards),
+            'results': [dict(zip(('book', 'chapter', 'verse'), split_key(key)), translation=translation,
+                             text=texts[translation].get(key, ''), highlights=highlights[translation][key],
+                             score=round(score, 4))
+                        for translation, key, score in matches],
+            'shards': [shard.timing() for shard in shards],
+        }
+
+    async def multi_search(self, query, translations, language, limit, boost=None, fuzzy=True):
+        if not query.strip():
+            return error_response(400, 'Pass a query as ?q=')
+        if not translations and not language:
+            return error_response(400, 'Pass ?translations=A,B or ?language=')
+        try:
+            limit = max(1, min(int(limit), 500))
+            weight = parse_boost(boost, self.boost_weight)
+        except ValueError:
+            return error_response(400, 'limit must be an integer and boost a number')
+        result = await self.run_blocking(self.run_multi_search, query, translations, language, limit, weight, fuzzy)
+        if result is None:
+            return error_response(404, 'No search index for the requested translations')
+        return json_response(result)
+
+    def regex_workers(self):
+        """Start (once) the worker processes searching the trigram index, or return None if it was not generated"""
+        if self._regex_workers is None and self.search_directory:
+            path = os.path.join(self.search_directory, 'trigrams.idx')
+            if os.path.exists(path):
+                from search.regex_workers import RegexWorkers
+                with self._open_lock:
+                    if self._regex_workers is None:
+                        self._regex_workers = RegexWorkers(path, self.regex_processes, self.regex_timeout)
+        return self._regex_workers
+
+    def run_regex_search(self, pattern, translations, limit, case_sensitive, literal):
+        workers = self.regex_workers()
+        if workers is None:
+            return None
+        matches, checked, truncated = workers.search(pattern, translations or None, limit,
+                                                     ignore_case=not case_sensitive, literal=literal)
+        return {
+            'pattern': pattern,
+            'checked': checked,
+            'truncated': truncated,
+            'results': [dict(zip(('book', 'chapter', 'verse'), split_key(key)), translation=translation,
+                             text=text, matches=[list(span) for span in spans])
+                        for translation, key, text, spans in matches],
+        }
+
+    async def regex_search(self, pattern, translations, limit, case_sensitive, literal):
+        if not pattern:
+            return error_response(400, 'Pass a pattern as ?pattern=')
+        try:
+            limit = max(1, min(int(limit), 1000))
+        except ValueError:
+            return error_response(400, 'limit must be an integer')
+        from search.regex_workers import SearchTimeout
+        from search.trigrams import check_pattern
+        try:
+            # Refuse oversized and nested-quantifier patterns before they reach a worker
+            check_pattern(pattern, literal)
+            result = await self.run_blocking(self.run_regex_search, pattern, translations, limit,
+                                             case_sensitive, literal)
+        except re.error as error:
+            return error_response(400, f"Invalid pattern: {error}")
+        except ValueError as error:
+            return error_response(400, str(error))
+        except SearchTimeout as error:
+            return error_response(503, str(error))
+        if result is None:
+            return error_response(404, 'No trigram index; run generate_search_index.py')
+        return json_response(result)
+
+    def suggest_index(self):
+        """Open (once) the autocomplete index, or return None if it was not generated"""
+        if self._suggest_index is None and self.search_directory:
+            path = os.path.join(self.search_directory, 'suggest.idx')
+            if os.path.exists(path):
+                from search.suggest import SuggestIndex
+                with self._open_lock:
+                    if self._suggest_index is None:
+                        self._suggest_index = SuggestIndex(path)
+        return self._suggest_index
+
+    def run_suggest(self, prefix, translation, limit):
+        index = self.suggest_index()
+        if index is None:
+            return None
+        return index.suggest(prefix, translation, limit)
+
+    async def suggest(self, prefix, translation, limit):
+        try:
+            limit = max(1, min(int(limit), 50))
+        except ValueError:
+            return error_response(400, 'limit must be an integer')
+        loop = asyncio.get_running_loop()
+        # The first request opens and maps the index, so it runs off the event loop like the other searches
+        result = await loop.run_in_executor(self.search_pool, self.run_suggest, prefix, translation, limit)
+        if result is None:
+            return error_response(404, 'No suggestion index; run generate_search_index.py')
+        return json_response(dict(query=prefix, **result))
+
+    async def parallel_chapter(self, translations, book, chapter, headers):
+        if not translations or len(translations) > MAX_PARALLEL_TRANSLATIONS:
+            return error_response(400, f"Pass 1 to {MAX_PARALLEL_TRANSLATIONS} translations as ?translations=A,B")
+        dbs = []
+        for translation in translations:
+            db = self.store.get(translation)
+            if db is None:
+                return error_response(404, f"Unknown translation: {translation}")
+            await self.refresh_index(db)
+            dbs.append(db)
+        etag = parallel_etag(dbs, book, chapter)
+        if etag_matches(headers.get('if-none-match'), etag):
+            return Response(304, b'', {'ETag': etag})
+
+        response_headers = {'Content-Type': 'application/json; charset=utf-8', 'ETag': etag}
+        key = ('parallel', tuple(translations), book, chapter)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return Response(200, cached.body, response_headers)
+        verses = await self.run_blocking(self.parallel.chapter, translations, book, chapter)
+        if verses is None:
+            return error_response(404, f"No requested translation has chapter {book}:{chapter}")
+        body = json_body({
+            'book': book,
+            'chapter': chapter,
+            'translations': translations,
+            'verses': [{'verse': verse, 'texts': dict(zip(translations, texts))} for verse, texts in verses],
+        })
+        self.cache.put(key, body, etag)
+        return Response(200, body, response_headers)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.write_response(writer, error_response(400, 'Headers too large'), False, False)
+                    break
+
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, path, version = lines[0].split(' ', 2)
+                except ValueError:
+                    await self.write_response(writer, error_response(400, 'Malformed request line'), False, False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                # Request bodies are not used by any endpoint, but must be drained to keep the connection in sync
+                length = headers.get('content-length', '0') or '0'
+                if not CONTENT_LENGTH.fullmatch(length):
+                    await self.write_response(writer, error_response(400, 'Invalid Content-Length'), False, False)
+                    break
+                length = int(length)
+                if length > MAX_BODY_BYTES:
+                    await self.write_response(writer, error_response(413, 'Request body too large'), False, False)
+                    break
+                if length:
+                    try:
+                        await reader.readexactly(length)
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        break
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+                try:
+                    response = await self.dispatch(method, path, headers)
+                except Exception as e:
+                    print(f"Error handling {method} {path}: {e}")
+                    response = error_response(500, 'Internal server error')
+                await self.write_response(writer, response, keep_alive, method == 'HEAD')
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def write_response(self, writer, response, keep_alive, head_only):
+        status_line = f"HTTP/1.1 {response.status} {STATUS_TEXT.get(response.status, '')}\r\n"
+        headers = dict(response.headers)
+        if response.status != 304:
+            headers['Content-Length'] = str(len(response.body))
+        headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+        head = status_line + ''.join(f"{name}: {value}\r\n" for name, value in headers.items()) + '\r\n'
+        writer.write(head.encode('latin-1'))
+        if not head_only and response.status != 304:
+            writer.write(response.body)
+        await writer.drain()
+
+    async def start(self, host='127.0.0.1', port=8000):
+        """Start listening; port 0 picks a free port (see server.sockets)"""
+        return await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.search_pool.shutdown(wait=True)
+        self.store.close()
+        for index in self._search_indexes.values():
+            index.close()
+        if self._regex_workers is not None:
+            self._regex_workers.close()
+        if self._suggest_index is not None:
+            self._suggest_index.close()
+
+
+async def serve(sqlite_directory, source_directory=None, host='127.0.0.1', port=8000, workers=None,
+                cache_bytes=64 * 1024 * 1024, search_directory=None, cross_references=None, boost_weight=0.5,
+                regex_timeout=2.0):
+    api = BibleAPI(sqlite_directory, source_directory, workers=workers, cache_bytes=cache_bytes,
+                   search_directory=search_directory, cross_references=cross_references,
+                   boost_weight=boost_weight, regex_timeout=regex_timeout)
+    server = await api.start(host, port)
+    address = server.sockets[0].getsockname()
+    print(f"Serving {len(api.store.translations())} translations on http://{address[0]}:{address[1]}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        api.close()
@@ -0,0 +1,251 @@
+"""
+Data access for the API over the per-translation databases in formats/sqlite.
+
+Each database keeps its verses in ``<translation>_verses`` with rowids in
+reading order, so every chapter is a contiguous rowid range. On first use a
+translation's chapters are indexed as ``(canonical book, chapter) -> (first
+rowid, last rowid)`` and chapter reads become ``id BETWEEN ? AND ?`` range
+scans on the table's clustered rowid b-tree instead of full table scans.
+
+Each database is also hashed when it is indexed. Chapter ETags are
+derived from that content hash, so they change exactly when a rebuild
+changes the file and can be checked without reading any verses. The index
+remembers the file's modification time and size, and is built again (with
+fresh connections) when a rebuild under a running server changes them.
+"""
+
+import bisect
+import hashlib
+import os
+import threading
+from array import array
+
+from api.pool import ReadOnlyPool
+from versification.canon import BOOK_NAMES, book_number, make_key, split_key
+from versification.mapping import get_mapper, native_chapters
+from versification.schemes import DEFAULT_SCHEME, translation_scheme
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranslationDB:
+    def __init__(self, translation, db_path, pool_size=8, scheme=DEFAULT_SCHEME):
+        self.translation = translation
+        self.db_path = db_path
+        self.scheme = scheme
+        self.pool = ReadOnlyPool(db_path, size=pool_size)
+        self.verses_table = f"{translation}_verses"
+        self.books_table = None
+        self.metadata = {'translation': translation, 'title': translation, 'license': 'Unknown'}
+        self.books = []
+        self.chapters = {}
+        self.canonical_books = {}
+        # Sorted native verse keys and their rowids, for looking up single verses
+        self.row_keys = array('q')
+        self.row_ids = array('q')
+        self.content_hash = None
+        self.file_stamp = None  # (st_mtime_ns, st_size) of the file the index was built from
+        self.version = 0  # bumped on every (re)index
+        self.indexed = False
+        self._lock = threading.Lock()
+        self._load_metadata()
+
+    def _load_metadata(self):
+        with self.pool.connection() as conn:
+            tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+            self.books_table = f"{self.translation}_books" if f"{self.translation}_books" in tables else 'books'
+            for table in tables:
+                columns = [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+                if columns == ['translation', 'title', 'license']:
+                    # Older exports store this row under a different table name
+                    row = conn.execute(f'SELECT translation, title, license FROM "{table}" LIMIT 1').fetchone()
+                    if row:
+                        self.metadata = {
+                            'translation': row[0],
+                            'title': row[1].lstrip('# ').strip(),
+                            'license': row[2],
+                        }
+                    break
+
+    def stat(self):
+        stat = os.stat(self.db_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def is_stale(self):
+        """Whether the index is missing or was built from an older version of the file"""
+        return not self.indexed or self.stat() != self.file_stamp
+
+    def ensure_index(self):
+        """Build the chapter -> rowid range index on first access, and again whenever the file changes"""
+        if not self.is_stale():
+            return
+        with self._lock:
+            stamp = self.stat()
+            if self.indexed and stamp == self.file_stamp:
+                return
+            if self.indexed:
+                self.pool.reset()
+            with self.pool.connection() as conn:
+                names = dict(conn.execute(f'SELECT id, name FROM "{self.books_table}"'))
+                canonical = {}
+                for book_id, name in names.items():
+                    number = book_number(name)
+                    # Some exports repeat the whole book list; keep the first occurrence
+                    if number is not None and number not in canonical.values():
+                        canonical[book_id] = number
+                self.canonical_books = canonical
+                chapters = {}
+                rows = []
+                for row_id, book_id, chapter, verse, has_text in conn.execute(
+                        f'SELECT id, book_id, chapter, verse, text != \'\' FROM "{self.verses_table}" ORDER BY id'):
+                    book = canonical.get(book_id)
+                    if book is None:
+                        continue
+                    first, last, text_seen = chapters.get((book, chapter), (row_id, row_id, False))
+                    chapters[(book, chapter)] = (first, row_id, text_seen or bool(has_text))
+                    rows.append((make_key(book, chapter, verse), row_id))
+            rows.sort()
+            self.row_keys = array('q', [key for key, _ in rows])
+            self.row_ids = array('q', [row_id for _, row_id in rows])
+
+            self.content_hash = file_hash(self.db_path)
+            books = {}
+            ranges = {}
+            for (book, chapter), (first, last, text_seen) in chapters.items():
+                if text_seen:
+                    ranges[(book, chapter)] = (first, last)
+                    books.setdefault(book, [first, 0])[1] += 1
+            self.chapters = ranges
+            self.books = [
+                {'id': book, 'name': BOOK_NAMES[book], 'chapters': count}
+                for book, (first, count) in sorted(books.items(), key=lambda item: item[1][0])
+            ]
+            # Stamped as it was before reading, so a change made while indexing is picked up next time
+            self.file_stamp = stamp
+            self.version += 1
+            self.indexed = True
+
+    def chapter_etag(self, book, chapter):
+        """Strong ETag for a chapter, or None if the translation lacks it; requires ensure_index()"""
+        if (book, chapter) not in self.chapters:
+            return None
+        digest = hashlib.sha256(f"{self.content_hash}:{book}:{chapter}".encode('ascii')).hexdigest()
+        return f'"{digest[:20]}"'
+
+    def chapter(self, book, chapter):
+        """Return [(verse, text), ...] for a chapter, or None if the translation lacks it"""
+        self.ensure_index()
+        bounds = self.chapters.get((book, chapter))
+        if bounds is None:
+            return None
+        with self.pool.connection() as conn:
+            return conn.execute(
+                f'SELECT verse, text FROM "{self.verses_table}" WHERE id BETWEEN ? AND ? ORDER BY id', bounds
+            ).fetchall()
+
+    def passage(self, first_key, last_key):
+        """Return [(canonical key, text), ...] for a canonical key range within one book
+
+        The range is read as a single rowid span covering every native chapter
+        it touches, however many chapters or verses it spans, then mapped to
+        canonical keys and trimmed to the requested range.
+        """
+        self.ensure_index()
+        book, first_chapter, _ = split_key(first_key)
+        _, last_chapter, _ = split_key(last_key)
+        bounds = []
+        for chapter in range(first_chapter, last_chapter + 1):
+            for position in native_chapters(self.scheme, book, chapter):
+                if position in self.chapters:
+                    bounds.append(self.chapters[position])
+        if not bounds:
+            return []
+        span = (min(first for first, _ in bounds), max(last for _, last in bounds))
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f'SELECT book_id, chapter, verse, text FROM "{self.verses_table}" WHERE id BETWEEN ? AND ? ORDER BY id',
+                span
+            ).fetchall()
+        mapper = get_mapper(self.scheme)
+        verses = []
+        for book_id, chapter, verse, text in rows:
+            native_book = self.canonical_books.get(book_id)
+            if native_book is None:
+                continue
+            key = mapper.canonical_key(native_book, chapter, verse)
+            if key is not None and first_key <= key <= last_key:
+                verses.append((key, text))
+        verses.sort(key=lambda item: item[0])
+        return verses
+
+    def verses(self, keys):
+        """Return {canonical key: text} for individual verses, in one query"""
+        self.ensure_index()
+        mapper = get_mapper(self.scheme)
+        wanted = {}
+        for key in keys:
+            native = mapper.from_canonical(key)
+            if native is None:
+                continue
+            index = bisect.bisect_left(self.row_keys, native)
+            if index < len(self.row_keys) and self.row_keys[index] == native:
+                wanted[self.row_ids[index]] = key
+        if not wanted:
+            return {}
+        placeholders = ','.join('?' * len(wanted))
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f'SELECT id, text FROM "{self.verses_table}" WHERE id IN ({placeholders})', list(wanted)
+            ).fetchall()
+        return {wanted[row_id]: text for row_id, text in rows}
+
+
+class BibleStore:
+    def __init__(self, sqlite_directory, source_directory=None, pool_size=8):
+        self.sqlite_directory = sqlite_directory
+        self.pool_size = pool_size
+        self._translations = {}
+        for filename in sorted(os.listdir(sqlite_directory)):
+            if filename.endswith('.db'):
+                translation = filename[:-3]
+                # Versification comes from the Sword module in sources/, when available
+                scheme = translation_scheme(source_directory, translation) if source_directory else DEFAULT_SCHEME
+                self._translations[translation] = TranslationDB(
+                    translation, os.path.join(sqlite_directory, filename), pool_size, scheme
+                )
+
+    def get(self, translation):
+        return self._translations.get(translation)
+
+    def translations(self):
+        return [db.metadata for db in self._translations.values()]
+
+    def books(self, translation):
+        db = self._translations.get(translation)
+        if db is None:
+            return None
+        db.ensure_index()
+        return db.books
+
+    def chapter(self, translation, book, chapter):
+        db = self._translations.get(translation)
+        if db is None:
+            return None
+        return db.chapter(book, chapter)
+
+    def passage(self, translation, first_key, last_key):
+        db = self._translations.get(translation)
+        if db is None:
+            return None
+        return db.passage(first_key, last_key)
+
+    def close(self):
+        for db in self._translations.values():
+            db.pool.close()
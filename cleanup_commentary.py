@@ -2,84 +2,113 @@ import os
 import json
 import sqlite3
 import re
+import argparse
+
+CHAPTER_OUTLINE = "Chapter Outline"
+
+# The saved pages write these with no-break spaces, which \s matches
+_TOOLBAR = re.compile(r'Contents loading….*?Reader Width Tags:\s*', re.DOTALL)
+_NEXT_LINK = re.compile(r'(?:«\s*Prev\s+)?Chapter \d+\s+Next\s*»\s*(?:Chapter \d+\s+)?')
+_FOOTER = re.compile(r'«\s*Prev|Please login or register')
+_SPACES = re.compile(r'\s+')
 
 def clean_commentary_text(text):
-    """Clean commentary text by removing unwanted header and footer content"""
+    """Clean commentary text by removing unwanted header and footer content
+
+    Every step is anchored at the start of the text or stops at the first
+    match, so cleaning is linear in the length of the chapter.
+    """
+    # Remove the reader toolbar the CCEL pages start with
+    match = _TOOLBAR.match(text)
+    if match:
+        text = text[match.end():]
+
     # Remove the header content up to "Chapter Outline"
-    text = re.sub(r'^.*?(?=Chapter Outline)', '', text, flags=re.DOTALL)
-    
-    # Remove "Chapter X Next »" at the beginning
-    text = re.sub(r'^Chapter \d+ Next »\s*', '', text)
-    
+    start = text.find(CHAPTER_OUTLINE)
+    if start > 0:
+        text = text[start:]
+
+    # Remove "« Prev Chapter X Next »" and the chapter title at the beginning
+    match = _NEXT_LINK.match(text)
+    if match:
+        text = text[match.end():]
+
     # Remove footer content from "« Prev" onwards
-    text = re.sub(r'« Prev.*$', '', text, flags=re.DOTALL)
-    
+    match = _FOOTER.search(text)
+    if match:
+        text = text[:match.start()]
+
     # Clean up extra whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    return text
-
-def update_json_files():
-    """Update all JSON files with cleaned text"""
-    json_dir = "mhc_commentary_formatted/json"
-    
-    for filename in os.listdir(json_dir):
-        if filename.endswith('.json') and filename != 'complete_commentary.json':
+    return _SPACES.sub(' ', text).strip()
+
+def book_json_files(json_dir):
+    return sorted(filename for filename in os.listdir(json_dir)
+                  if filename.endswith('.json') and filename != 'complete_commentary.json')
+
+def write_json(filepath, data):
+    temp_file = filepath + '.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(temp_file, filepath)
+
+def update_json_files(output_dir="mhc_commentary_formatted"):
+    """Clean every book JSON file and rewrite the complete commentary from them in the same pass
+
+    Books are read and written one at a time, and complete_commentary.json is
+    streamed out book by book, so only one book is held in memory.
+    """
+    json_dir = f"{output_dir}/json"
+    complete_file = os.path.join(json_dir, 'complete_commentary.json')
+    filenames = book_json_files(json_dir)
+    changed = 0
+
+    with open(complete_file + '.tmp', 'w', encoding='utf-8') as complete:
+        complete.write('{')
+        for i, filename in enumerate(filenames):
             filepath = os.path.join(json_dir, filename)
-            
             with open(filepath, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-            
-            # Clean each chapter's text
-            for chapter, text in data.items():
-                data[chapter] = clean_commentary_text(text)
-            
-            # Write back cleaned data
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-    
-    print("Updated individual book JSON files")
-
-def update_complete_json():
-    """Recreate complete commentary JSON with cleaned text"""
-    json_dir = "mhc_commentary_formatted/json"
-    complete_data = {}
-    
-    for filename in os.listdir(json_dir):
-        if filename.endswith('.json') and filename != 'complete_commentary.json':
-            book_name = filename.replace('.json', '')
-            filepath = os.path.join(json_dir, filename)
-            
-            with open(filepath, 'r', encoding='utf-8') as f:
-                complete_data[book_name] = json.load(f)
-    
-    # Write complete commentary file
-    with open(os.path.join(json_dir, 'complete_commentary.json'), 'w', encoding='utf-8') as f:
-        json.dump(complete_data, f, indent=2, ensure_ascii=False)
-    
-    print("Updated complete commentary JSON file")
-
-def update_sqlite_database():
-    """Update SQLite database with cleaned text"""
-    conn = sqlite3.connect("mhc_commentary_formatted/mhc_commentary.db")
-    cursor = conn.cursor()
-    
-    # Get all commentary entries
-    cursor.execute("SELECT id, text FROM commentary")
-    entries = cursor.fetchall()
-    
-    # Update each entry with cleaned text
-    for entry_id, text in entries:
-        cleaned_text = clean_commentary_text(text)
-        cursor.execute("UPDATE commentary SET text = ? WHERE id = ?", (cleaned_text, entry_id))
-    
-    conn.commit()
-    conn.close()
-    print("Updated SQLite database")
 
-if __name__ == "__main__":
+            # Clean each chapter's text, rewriting the file only if something changed
+            cleaned = {chapter: clean_commentary_text(text) for chapter, text in data.items()}
+            if cleaned != data:
+                write_json(filepath, cleaned)
+                changed += 1
+
+            # Same layout as json.dump(complete_data, f, indent=2)
+            book = json.dumps(cleaned, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+            complete.write(f"{',' if i else ''}\n  {json.dumps(filename[:-5], ensure_ascii=False)}: {book}")
+        complete.write('\n}' if filenames else '}')
+    os.replace(complete_file + '.tmp', complete_file)
+
+    print(f"Updated individual book JSON files ({changed} changed) and the complete commentary JSON file")
+
+def update_sqlite_database(output_dir="mhc_commentary_formatted"):
+    """Update SQLite database with cleaned text, in one bulk write of the rows that change"""
+    conn = sqlite3.connect(f"{output_dir}/mhc_commentary.db")
+    try:
+        updates = []
+        for entry_id, text in conn.execute("SELECT id, text FROM commentary"):
+            cleaned_text = clean_commentary_text(text)
+            if cleaned_text != text:
+                updates.append((cleaned_text, entry_id))
+
+        conn.executemany("UPDATE commentary SET text = ? WHERE id = ?", updates)
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"Updated SQLite database ({len(updates)} rows)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Strip CCEL page chrome from converted MHC commentary")
+    parser.add_argument('--output', default="mhc_commentary_formatted",
+                        help="directory written by convert_mhc_commentary.py")
+    args = parser.parse_args()
+
     print("Cleaning up commentary text...")
-    update_json_files()
-    update_complete_json()
-    update_sqlite_database()
-    print("Cleanup completed!")
\ No newline at end of file
+    update_json_files(args.output)
+    update_sqlite_database(args.output)
+    print("Cleanup completed!")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
 import os
+import sys
 import json
 import sqlite3
 import re
+import time
+import argparse
+from html.parser import HTMLParser
+from multiprocessing import Pool
 from bs4 import BeautifulSoup
 
+from cleanup_commentary import clean_commentary_text
+
 # Bible books mapping (Roman numeral index to book name and chapter count)
 BIBLE_BOOKS = {
     2: ("Genesis", 50), 3: ("Exodus", 40), 4: ("Leviticus", 27), 5: ("Numbers", 36),
@@ -39,9 +46,15 @@ def roman_to_int(roman):
         prev_value = value
     return total
 
-def extract_commentary_text(html_content):
-    """Extract clean commentary text from HTML"""
-    soup = BeautifulSoup(html_content, 'html.parser')
+def clean_text(text):
+    """Collapse the whitespace of extracted page text"""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+def extract_with_soup(html_content, builder='html.parser'):
+    """Content text through a BeautifulSoup tree"""
+    soup = BeautifulSoup(html_content, builder)
     
     # Find the main content area
     content_div = soup.find('div', id='content')
@@ -52,27 +65,119 @@ def extract_commentary_text(html_content):
     for script in content_div(["script", "style"]):
         script.decompose()
     
-    # Get text and clean it up
-    text = content_div.get_text()
-    lines = (line.strip() for line in text.splitlines())
-    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-    text = ' '.join(chunk for chunk in chunks if chunk)
+    return content_div.get_text()
+
+class ContentTextParser(HTMLParser):
+    """Collect the text of <div id="content"> in one streaming pass, without building a tree"""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.depth = 0  # divs open inside the content div, including itself
+        self.skipping = 0  # script/style elements open inside it
+        self.found = False
+        self.parts = []
+    
+    def handle_starttag(self, tag, attrs):
+        if self.depth:
+            if tag == 'div':
+                self.depth += 1
+            elif tag in ('script', 'style'):
+                self.skipping += 1
+        elif tag == 'div' and not self.found and ('id', 'content') in attrs:
+            self.depth = 1
+            self.found = True
+    
+    def handle_startendtag(self, tag, attrs):
+        pass  # <div/> and friends open nothing
     
-    return text
+    def handle_endtag(self, tag):
+        if not self.depth:
+            return
+        if tag == 'div':
+            self.depth -= 1
+        elif tag in ('script', 'style') and self.skipping:
+            self.skipping -= 1
+    
+    def handle_data(self, data):
+        if self.depth and not self.skipping:
+            self.parts.append(data)
+
+def extract_streaming(html_content):
+    """Content text through the standard library's event parser"""
+    parser = ContentTextParser()
+    parser.feed(html_content)
+    parser.close()
+    return ''.join(parser.parts)
+
+# Parser backends by name; each returns the raw text of the content div
+PARSERS = {
+    'html.parser': extract_with_soup,
+    'lxml': lambda html_content: extract_with_soup(html_content, 'lxml'),
+    'stream': extract_streaming,
+}
+
+def available_parsers():
+    """Backends whose libraries are installed (lxml is optional)"""
+    names = ['html.parser', 'stream']
+    try:
+        import lxml  # noqa: F401
+        names.insert(1, 'lxml')
+    except ImportError:
+        pass
+    return names
+
+def extract_commentary_text(html_content, parser='html.parser'):
+    """Extract clean commentary text from HTML"""
+    return clean_text(PARSERS[parser](html_content))
+
+def convert_chapter(task):
+    """Worker: extract and clean one chapter and write its renamed HTML copy; returns (book, chapter, text)"""
+    book_num, chapter, source_file, html_file, parser = task
+    with open(source_file, 'r', encoding='utf-8') as f:
+        html_content = f.read()
+    with open(html_file, 'w', encoding='utf-8') as f:
+        f.write(html_content)
+    return book_num, chapter, clean_commentary_text(extract_commentary_text(html_content, parser))
+
+def chapter_tasks(source_dir, output_dir, parser):
+    """(book, chapter, source file, output HTML file, parser) for every chapter present, in Bible order"""
+    tasks = []
+    for book_num in range(2, 68):  # Books II to LXVII
+        if book_num not in BIBLE_BOOKS:
+            continue
+        
+        book_name, chapter_count = BIBLE_BOOKS[book_num]
+        book_roman = f"Book_{roman_to_roman(book_num)}"
+        
+        # Create book directory for HTML output
+        book_dir = f"{output_dir}/html/{book_name}"
+        os.makedirs(book_dir, exist_ok=True)
+        
+        for chapter in range(1, chapter_count + 1):
+            source_file = f"{source_dir}/{book_roman}/Chapter_{roman_to_roman(chapter)}.html"
+            if os.path.exists(source_file):
+                tasks.append((book_num, chapter, source_file, f"{book_dir}/Chapter_{chapter}.html", parser))
+    return tasks
 
-def convert_commentary():
-    """Convert MHC commentary to proper format"""
-    source_dir = "mhc_commentary_roman"
+def convert_commentary(source_dir="mhc_commentary_roman", output_dir="mhc_commentary_formatted",
+                       workers=1, parser='html.parser'):
+    """Convert MHC commentary to proper format
+    
+    With more than one worker, chapters are parsed in a process pool and
+    their results stream back, in order, to this process, the only one that
+    writes to SQLite.
+    """
+    started = time.perf_counter()
     
     # Create output directories
-    os.makedirs("mhc_commentary_formatted/html", exist_ok=True)
-    os.makedirs("mhc_commentary_formatted/json", exist_ok=True)
+    os.makedirs(f"{output_dir}/html", exist_ok=True)
+    os.makedirs(f"{output_dir}/json", exist_ok=True)
     
     # Initialize data structures
     all_commentary = {}
     
     # Create SQLite database
-    conn = sqlite3.connect("mhc_commentary_formatted/mhc_commentary.db")
+    conn = sqlite3.connect(f"{output_dir}/mhc_commentary.db")
     cursor = conn.cursor()
     
     # Create tables
@@ -93,70 +198,73 @@ def convert_commentary():
         )
     ''')
     
-    # Process each book
-    for book_num in range(2, 68):  # Books II to LXVII
-        if book_num not in BIBLE_BOOKS:
-            continue
-            
-        book_name, chapter_count = BIBLE_BOOKS[book_num]
-        book_roman = f"Book_{roman_to_roman(book_num)}"
-        
-        print(f"Processing {book_name}...")
-        
-        # Insert book into database
-        cursor.execute("INSERT OR IGNORE INTO books (id, name) VALUES (?, ?)", 
-                      (book_num, book_name))
-        
-        book_commentary = {}
-        
-        # Create book directory for HTML output
-        book_dir = f"mhc_commentary_formatted/html/{book_name}"
-        os.makedirs(book_dir, exist_ok=True)
-        
-        # Process each chapter
-        for chapter in range(1, chapter_count + 1):
-            chapter_roman = roman_to_roman(chapter)
-            source_file = f"{source_dir}/{book_roman}/Chapter_{chapter_roman}.html"
+    cursor.executemany("INSERT OR IGNORE INTO books (id, name) VALUES (?, ?)",
+                       [(book_num, name) for book_num, (name, _) in sorted(BIBLE_BOOKS.items())])
+    
+    tasks = chapter_tasks(source_dir, output_dir, parser)
+    if workers > 1:
+        pool = Pool(workers)
+        results = pool.imap(convert_chapter, tasks, chunksize=8)
+    else:
+        pool = None
+        results = map(convert_chapter, tasks)
+    
+    try:
+        for book_num, chapter, commentary_text in results:
+            book_name = BIBLE_BOOKS[book_num][0]
+            if book_name not in all_commentary:
+                print(f"Processing {book_name}...")
+            all_commentary.setdefault(book_name, {})[chapter] = commentary_text
             
-            if os.path.exists(source_file):
-                with open(source_file, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-                
-                # Extract clean text
-                commentary_text = extract_commentary_text(html_content)
-                
-                # Save HTML file with proper name
-                html_file = f"{book_dir}/Chapter_{chapter}.html"
-                with open(html_file, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
-                
-                # Store in data structures
-                book_commentary[chapter] = commentary_text
-                
-                # Insert into database
-                cursor.execute(
-                    "INSERT INTO commentary (book_id, chapter, text) VALUES (?, ?, ?)",
-                    (book_num, chapter, commentary_text)
-                )
-        
-        # Save book JSON
-        if book_commentary:
-            all_commentary[book_name] = book_commentary
-            with open(f"mhc_commentary_formatted/json/{book_name}.json", 'w', encoding='utf-8') as f:
-                json.dump(book_commentary, f, indent=2, ensure_ascii=False)
+            # Insert into database
+            cursor.execute(
+                "INSERT INTO commentary (book_id, chapter, text) VALUES (?, ?, ?)",
+                (book_num, chapter, commentary_text)
+            )
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    
+    # Save book JSON
+    for book_name, book_commentary in all_commentary.items():
+        with open(f"{output_dir}/json/{book_name}.json", 'w', encoding='utf-8') as f:
+            json.dump(book_commentary, f, indent=2, ensure_ascii=False)
     
     # Save complete JSON
-    with open("mhc_commentary_formatted/json/complete_commentary.json", 'w', encoding='utf-8') as f:
+    with open(f"{output_dir}/json/complete_commentary.json", 'w', encoding='utf-8') as f:
         json.dump(all_commentary, f, indent=2, ensure_ascii=False)
     
     # Commit and close database
     conn.commit()
     conn.close()
     
-    print("Conversion completed!")
-    print(f"- HTML files: mhc_commentary_formatted/html/")
-    print(f"- JSON files: mhc_commentary_formatted/json/")
-    print(f"- SQLite database: mhc_commentary_formatted/mhc_commentary.db")
+    print(f"Conversion completed in {time.perf_counter() - started:.1f}s ({len(tasks)} chapters, "
+          f"{workers} worker(s), {parser})")
+    print(f"- HTML files: {output_dir}/html/")
+    print(f"- JSON files: {output_dir}/json/")
+    print(f"- SQLite database: {output_dir}/mhc_commentary.db")
+
+def benchmark_parsers(html_dir="commentary/mhc/html", limit=None):
+    """Time every available parser backend over the saved chapter pages and check they agree"""
+    files = sorted(os.path.join(root, name) for root, _, names in os.walk(html_dir)
+                   for name in names if name.endswith('.html'))[:limit]
+    pages = []
+    for path in files:
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+    print(f"{len(pages)} pages, {sum(len(page) for page in pages) / 1e6:.1f} MB")
+    
+    baseline = None
+    for parser in available_parsers():
+        started = time.perf_counter()
+        texts = [extract_commentary_text(page, parser) for page in pages]
+        elapsed = time.perf_counter() - started
+        if baseline is None:
+            baseline = texts
+        differences = sum(text != expected for text, expected in zip(texts, baseline))
+        print(f"{parser:12} {elapsed:7.2f}s  {elapsed / max(len(pages), 1) * 1000:6.2f} ms/page  "
+              f"{differences} pages differ from html.parser")
 
 def roman_to_roman(num):
     """Convert integer to Roman numeral"""
@@ -169,5 +277,22 @@ def roman_to_roman(num):
         num -= value * count
     return result
 
+def main():
+    parser = argparse.ArgumentParser(description="Convert the downloaded MHC chapter pages to HTML, JSON and SQLite")
+    parser.add_argument('--source', default="mhc_commentary_roman", help="Book_<roman>/Chapter_<roman>.html tree")
+    parser.add_argument('--output', default="mhc_commentary_formatted")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="parser processes (1 = no pool)")
+    parser.add_argument('--parser', choices=sorted(PARSERS), default='stream')
+    parser.add_argument('--benchmark', metavar='HTML_DIR', nargs='?', const="commentary/mhc/html",
+                        help="compare the parser backends on saved pages instead of converting")
+    args = parser.parse_args()
+    
+    if args.benchmark:
+        benchmark_parsers(args.benchmark)
+        return
+    if args.parser not in available_parsers():
+        sys.exit(f"Parser {args.parser} needs a library that is not installed")
+    convert_commentary(args.source, args.output, args.workers, args.parser)
+
 if __name__ == "__main__":
-    convert_commentary()
\ No newline at end of file
+    main()
\ No newline at end of file
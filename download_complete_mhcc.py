@@ -3,23 +3,154 @@
 Download the complete Matthew Henry's Concise Commentary from CCEL
 """
 
-import requests
 import os
 import json
 import sqlite3
 import csv
-from bs4 import BeautifulSoup
+import argparse
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import PreformattedString
 import re
 
-def download_full_commentary():
-    """Download the complete commentary from the main content page"""
-    url = "https://ccel.org/ccel/henry/mhcc/mhcc.ii.html"
+from mhc_crawler import add_crawler_arguments, crawler_from_args
+from versification.canon import BOOKS
+
+HEADING_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5']
+BLOCK_TAGS = HEADING_TAGS + ['p', 'div']
+
+# Words a book title may wrap around the name: "The First Epistle General of Peter",
+# "The Gospel According to St. John", "The Revelation of St. John the Divine"
+TITLE_WORDS = {'the', 'book', 'of', 'gospel', 'according', 'to', 'st', 'saint', 'epistle', 'epistles', 'general',
+               'letter', 'paul', 'apostle', 'apostles', 'prophet', 'prophecy', 'divine', 'commentary', 'on',
+               'introduction', 'an', 'a', 'called', 'otherwise'}
+# Written and Roman ordinals, so "First John" and "I John" both name 1 John
+ORDINALS = {'first': '1', 'second': '2', 'third': '3', '1st': '1', '2nd': '2', '3rd': '3',
+            'i': '1', 'ii': '2', 'iii': '3'}
+# A chapter number after the name ("Genesis 1", "Genesis, Chapter I") still titles the book
+CHAPTER_SUFFIX = re.compile(r'^(.*?)\s+(?:chapter\s+)?(?:\d+|[ivxlc]+)$')
+# KJV titles put the name after "called": "The Second Book of Moses, called Exodus"
+CALLED = re.compile(r'\bcalled\b', re.IGNORECASE)
+
+def title_words(title):
+    """A title's words with ordinals as digits and the wrapping words left out
+
+    Only the first clause counts, so "Ecclesiastes; or, the Preacher" is
+    read as "Ecclesiastes".
+    """
+    clause = re.split(r'[,;:(]', title, maxsplit=1)[0].lower()
+    words = [ORDINALS.get(word, word) for word in re.findall(r"[^\W_]+", clause)]
+    return ' '.join(word for word in words if word not in TITLE_WORDS)
+
+# Full titles whose extra words name no book
+LONG_TITLES = {'Lamentations of Jeremiah': 'Lamentations', 'Ecclesiastes or the Preacher': 'Ecclesiastes',
+               'Revelation of Jesus Christ': 'Revelation'}
+
+# Protestant canon, Genesis to Revelation, keyed by the title words of each name and alias
+BOOK_NAMES = {title_words(alias): name
+              for number, osis, name, aliases in BOOKS if number <= 66 for alias in [name] + aliases}
+BOOK_NAMES.update((title_words(title), name) for title, name in LONG_TITLES.items())
+
+def lookup_book(words):
+    """Book named by a title's words, allowing a trailing chapter number"""
+    book = BOOK_NAMES.get(words)
+    if book is None:
+        match = CHAPTER_SUFFIX.match(words)
+        book = BOOK_NAMES.get(match.group(1)) if match else None
+    return book
+
+def match_book(heading):
+    """Book a heading is the title of, or None
+
+    The whole title has to be the book's name (with ordinals written out or
+    as Roman numerals, the usual wrapping words and an optional chapter
+    number), so "John the Baptist beheaded" names no book and "The First
+    Epistle of John" names 1 John. KJV titles name the book after "called":
+    "The First Book of Moses, called Genesis".
+    """
+    if len(heading) >= 100:
+        return None
+    book = lookup_book(title_words(heading))
+    if book is None and CALLED.search(heading):
+        book = lookup_book(title_words(CALLED.split(heading)[-1]))
+    return book
+
+def block_text(element):
+    return re.sub(r'\s+', ' ', element.get_text()).strip()
+
+def iter_blocks(content_div, nested=False):
+    """(tag, text) of each heading, paragraph and innermost div, in document order
+
+    A div that holds other blocks is walked into instead, so no text is
+    yielded twice; the text lying directly in it, between its blocks, is
+    yielded as 'div' blocks of its own. Only the loose text of content_div
+    itself is left out.
+    """
+    loose = []
+
+    def flush():
+        text = re.sub(r'\s+', ' ', ''.join(loose)).strip()
+        loose.clear()
+        return text
+
+    for child in content_div.children:
+        if not isinstance(child, Tag):
+            if nested and isinstance(child, NavigableString) and not isinstance(child, PreformattedString):
+                loose.append(str(child))
+            continue
+        if child.name not in BLOCK_TAGS and child.find(BLOCK_TAGS) is None:
+            if nested:
+                loose.append(child.get_text())
+            continue
+        text = flush()
+        if text:
+            yield 'div', text
+        if child.name in BLOCK_TAGS and (child.name != 'div' or child.find(BLOCK_TAGS) is None):
+            text = block_text(child)
+            if text:
+                yield child.name, text
+        else:
+            yield from iter_blocks(child, nested=nested or child.name == 'div')
+    text = flush()
+    if text:
+        yield 'div', text
+
+def segment_books(content_div, min_paragraph=30, min_book=100):
+    """Split a content div into books at the headings that name one, in a single pass
+
+    Only heading elements can start a book, so a paragraph that merely mentions
+    a book stays part of the current one. Returns [{'book', 'commentary'}].
+    """
+    commentaries = []
+    current_book = None
+    current_content = []
     
-    print("Downloading Matthew Henry's Concise Commentary...")
-    response = requests.get(url)
-    response.raise_for_status()
+    def save():
+        commentary_text = '\n\n'.join(current_content)
+        if current_book and len(commentary_text) > min_book:  # Only save if substantial content
+            commentaries.append({
+                'book': current_book,
+                'commentary': commentary_text
+            })
+            print(f"Extracted: {current_book} ({len(commentary_text)} chars)")
+    
+    for tag, text in iter_blocks(content_div):
+        book = match_book(text) if tag in HEADING_TAGS else None
+        if book and book != current_book:
+            save()
+            current_book = book
+            current_content = []
+        elif current_book and not book:
+            text = re.sub(r'^\d+\.\s*', '', text)  # Remove leading numbers
+            if len(text) > min_paragraph:  # Only add substantial paragraphs
+                current_content.append(text)
     
-    soup = BeautifulSoup(response.text, 'html.parser')
+    # Don't forget the last book
+    save()
+    return commentaries
+
+def download_full_commentary(html):
+    """Extract the complete commentary from the main content page"""
+    soup = BeautifulSoup(html, 'html.parser')
     
     # Find the main content
     content_div = soup.find('div', id='theText')
@@ -33,84 +164,11 @@ def download_full_commentary():
     print(f"Found content div with {len(content_div.find_all('p'))} paragraphs")
     
     # Extract commentary by books
-    commentaries = []
-    current_book = None
-    current_content = []
-    
-    # Bible book names to look for
-    bible_books = [
-        'Genesis', 'Exodus', 'Leviticus', 'Numbers', 'Deuteronomy',
-        'Joshua', 'Judges', 'Ruth', '1 Samuel', '2 Samuel', 
-        '1 Kings', '2 Kings', '1 Chronicles', '2 Chronicles',
-        'Ezra', 'Nehemiah', 'Esther', 'Job', 'Psalms', 'Proverbs',
-        'Ecclesiastes', 'Song of Solomon', 'Isaiah', 'Jeremiah',
-        'Lamentations', 'Ezekiel', 'Daniel', 'Hosea', 'Joel',
-        'Amos', 'Obadiah', 'Jonah', 'Micah', 'Nahum', 'Habakkuk',
-        'Zephaniah', 'Haggai', 'Zechariah', 'Malachi',
-        'Matthew', 'Mark', 'Luke', 'John', 'Acts', 'Romans',
-        '1 Corinthians', '2 Corinthians', 'Galatians', 'Ephesians',
-        'Philippians', 'Colossians', '1 Thessalonians', '2 Thessalonians',
-        '1 Timothy', '2 Timothy', 'Titus', 'Philemon', 'Hebrews',
-        'James', '1 Peter', '2 Peter', '1 John', '2 John', '3 John',
-        'Jude', 'Revelation'
-    ]
-    
-    # Process all elements in the content
-    for element in content_div.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'p', 'div']):
-        text = element.get_text().strip()
-        
-        if not text or len(text) < 10:
-            continue
-        
-        # Check if this is a book title
-        is_book_title = False
-        for book in bible_books:
-            if book.lower() in text.lower() and len(text) < 100:
-                # This looks like a book title
-                if current_book and current_content:
-                    # Save previous book
-                    commentary_text = '\n\n'.join(current_content)
-                    if len(commentary_text) > 100:  # Only save if substantial content
-                        commentaries.append({
-                            'book': current_book,
-                            'commentary': commentary_text
-                        })
-                        print(f"Extracted: {current_book} ({len(commentary_text)} chars)")
-                
-                current_book = book
-                current_content = []
-                is_book_title = True
-                break
-        
-        if not is_book_title and current_book:
-            # Add content to current book
-            # Clean up the text
-            text = re.sub(r'\s+', ' ', text)
-            text = re.sub(r'^\d+\.\s*', '', text)  # Remove leading numbers
-            if len(text) > 30:  # Only add substantial paragraphs
-                current_content.append(text)
-    
-    # Don't forget the last book
-    if current_book and current_content:
-        commentary_text = '\n\n'.join(current_content)
-        if len(commentary_text) > 100:
-            commentaries.append({
-                'book': current_book,
-                'commentary': commentary_text
-            })
-            print(f"Extracted: {current_book} ({len(commentary_text)} chars)")
-    
-    return commentaries
+    return segment_books(content_div)
 
-def download_toc_based():
-    """Alternative approach: download from table of contents"""
-    url = "https://ccel.org/ccel/henry/mhcc/mhcc.toc.html"
-    
-    print("Downloading from table of contents...")
-    response = requests.get(url)
-    response.raise_for_status()
-    
-    soup = BeautifulSoup(response.text, 'html.parser')
+def download_toc_based(html):
+    """Alternative approach: extract from the table of contents page"""
+    soup = BeautifulSoup(html, 'html.parser')
     content_div = soup.find('div', id='theText')
     
     if not content_div:
@@ -205,13 +263,23 @@ def main():
     print("Matthew Henry's Concise Commentary Downloader")
     print("=" * 55)
     
+    parser = argparse.ArgumentParser(description="Download the complete MHCC from CCEL")
+    add_crawler_arguments(parser)
+    args = parser.parse_args()
+    
+    # Fetch the main content page and the table of contents together
+    main_url = f"{args.base_url}/mhcc.ii.html"
+    toc_url = f"{args.base_url}/mhcc.toc.html"
+    print("Downloading Matthew Henry's Concise Commentary...")
+    pages = crawler_from_args(args).run([main_url, toc_url], lambda url, response: response.text)
+    
     # Try the main content approach first
-    commentaries = download_full_commentary()
+    commentaries = download_full_commentary(pages[main_url]) if main_url in pages else []
     
     # If that doesn't work well, try the TOC approach
-    if len(commentaries) < 10:  # If we didn't get many books
+    if len(commentaries) < 10 and toc_url in pages:  # If we didn't get many books
         print("\nTrying alternative approach...")
-        commentaries = download_toc_based()
+        commentaries = download_toc_based(pages[toc_url])
     
     print(f"\nExtracted {len(commentaries)} commentary sections")
     
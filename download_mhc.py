@@ -1,8 +1,9 @@
 import os
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 
+from mhc_crawler import FetchError, fetch_page
+
 def download_mhc_commentary(index_html_content: str, output_directory: str, base_web_url: str = "https://www.ccel.org"):
     """
     Downloads all linked Matthew Henry Commentary files from the given MHC index HTML content.
@@ -34,7 +35,7 @@ def download_mhc_commentary(index_html_content: str, output_directory: str, base
     for url in sorted(list(links_to_download)): # Sort for consistent processing and output
         try:
             print(f"Downloading: {url}")
-            response = requests.get(url, timeout=15) # Set a timeout for network requests
+            response = fetch_page(url) # Served from the response cache when the page is unchanged
             response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
 
             # Extract a safe filename from the URL path.
@@ -51,12 +52,12 @@ def download_mhc_commentary(index_html_content: str, output_directory: str, base
 
             output_file_path = os.path.join(output_directory, filename)
 
-            with open(output_file_path, 'wb') as f: # 'wb' for binary write, as response.content is bytes
-                f.write(response.content)
+            with open(output_file_path, 'wb') as f: # 'wb' for binary write, as response.body is bytes
+                f.write(response.body)
             print(f"Saved: {output_file_path}")
             downloaded_count += 1
 
-        except requests.exceptions.RequestException as e:
+        except FetchError as e:
             print(f"Error downloading {url}: {e}")
         except Exception as e:
             print(f"An unexpected error occurred for {url}: {e}")
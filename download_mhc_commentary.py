@@ -3,12 +3,14 @@
 Download Matthew Henry Commentary from CCEL using Roman numerals.
 URL pattern: https://ccel.org/ccel/henry/mhcc/mhcc.{x}.{y}.html
 where x is book (2-77) and y is chapter, both in Roman numerals.
+Pages are fetched concurrently by the shared crawler (mhc_crawler.py), and
+an interrupted download resumes from its state file.
 """
 
-import requests
-import os
+import argparse
 from pathlib import Path
-import time
+
+from mhc_crawler import CCEL_BASE_URL, Crawler, add_crawler_arguments, crawler_from_args
 
 def int_to_roman(num):
     """Convert integer to Roman numeral."""
@@ -24,7 +26,7 @@ def int_to_roman(num):
         i += 1
     return roman_num
 
-def download_mhc_commentary():
+def download_mhc_commentary(base_url=CCEL_BASE_URL, crawler=None):
     """Download MHC commentary from CCEL."""
     
     # Create output directory
@@ -38,50 +40,39 @@ def download_mhc_commentary():
         28, 16, 16, 13, 6, 6, 4, 4, 5, 3, 6, 4, 3, 1, 13, 5, 5, 3, 5, 1, 1, 1, 22
     ]
     
-    total_downloaded = 0
-    
+    # URL -> file it is saved to
+    targets = {}
     for book_idx in range(66):
         book_num = book_idx + 2  # Books start from 2
         book_roman = int_to_roman(book_num)
-        chapter_count = chapter_counts[book_idx]
-        
-        print(f"Processing Book {book_roman} ({book_num}) - {chapter_count} chapters")
         
         # Create book directory
         book_dir = output_dir / f"Book_{book_roman}"
         book_dir.mkdir(exist_ok=True)
         
-        for chapter in range(1, chapter_count + 1):
+        for chapter in range(1, chapter_counts[book_idx] + 1):
             chapter_roman = int_to_roman(chapter)
-            
-            # Construct URL
-            url = f"https://ccel.org/ccel/henry/mhcc/mhcc.{book_roman}.{chapter_roman}.html"
-            
-            # Create filename
-            filename = f"Chapter_{chapter_roman}.html"
-            filepath = book_dir / filename
-            
-            try:
-                print(f"  Downloading Chapter {chapter_roman} ({chapter})...")
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-                
-                # Save the HTML content
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(response.text)
-                
-                total_downloaded += 1
-                print(f"    Saved: {filename}")
-                
-                # Small delay to be respectful to the server
-                time.sleep(0.5)
-                
-            except requests.exceptions.RequestException as e:
-                print(f"    Failed to download {url}: {e}")
-                continue
+            url = f"{base_url}/mhcc.{book_roman}.{chapter_roman}.html"
+            targets[url] = book_dir / f"Chapter_{chapter_roman}.html"
     
-    print(f"\nCompleted! Downloaded {total_downloaded} commentary chapters.")
+    def save(url, response):
+        # Save the HTML content
+        with open(targets[url], 'w', encoding='utf-8') as f:
+            f.write(response.text)
+        return str(targets[url])
+    
+    print(f"Downloading {len(targets)} commentary chapters...")
+    crawler = crawler or Crawler(state_file=str(output_dir / ".crawl_state.json"))
+    saved = crawler.run(targets, save)
+    
+    print(f"\nCompleted! Downloaded {len(saved)} commentary chapters.")
     print(f"Files saved to: {output_dir.absolute()}")
 
+def main():
+    parser = argparse.ArgumentParser(description="Download the MHC chapter pages from CCEL")
+    add_crawler_arguments(parser)
+    args = parser.parse_args()
+    download_mhc_commentary(args.base_url, crawler_from_args(args, "mhc_commentary_roman/.crawl_state.json"))
+
 if __name__ == "__main__":
-    download_mhc_commentary()
\ No newline at end of file
+    main()
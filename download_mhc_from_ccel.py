@@ -1,12 +1,13 @@
-import requests
 import os
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 
+from mhc_crawler import fetch_page
+
 def download_mhc_index():
     """Download the MHC index page from CCEL"""
     url = "https://ccel.org/ccel/henry/mhcc/mhcc.i.html"
-    response = requests.get(url)
+    response = fetch_page(url)
     response.raise_for_status()
     return response.text
 
@@ -27,7 +28,7 @@ def extract_commentary_links(html_content):
 def download_commentary_file(url, output_dir):
     """Download a single commentary file"""
     try:
-        response = requests.get(url)
+        response = fetch_page(url)
         response.raise_for_status()
         
         filename = os.path.basename(url)
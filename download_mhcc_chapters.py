@@ -3,13 +3,14 @@
 Download Matthew Henry's Concise Commentary chapter by chapter
 """
 
-import requests
 import os
 import json
 import sqlite3
+import argparse
 from bs4 import BeautifulSoup
 import re
-import time
+
+from mhc_crawler import CCEL_BASE_URL, add_crawler_arguments, crawler_from_args
 
 def get_book_info():
     """Get book information with chapter counts"""
@@ -58,57 +59,54 @@ def int_to_roman(num):
         num -= value * count
     return result
 
-def download_chapter(book_roman, chapter_num):
-    """Download a single chapter commentary"""
-    chapter_roman = int_to_roman(chapter_num)
-    url = f"https://ccel.org/ccel/henry/mhcc/mhcc.{book_roman}.{chapter_roman}.html"
+def chapter_url(book_roman, chapter_num, base_url=CCEL_BASE_URL):
+    """URL of a single chapter commentary"""
+    return f"{base_url}/mhcc.{book_roman}.{int_to_roman(chapter_num)}.html"
+
+def extract_chapter(html):
+    """Commentary paragraphs of a downloaded chapter page"""
+    soup = BeautifulSoup(html, 'html.parser')
+    content_div = soup.find('div', class_='book-content')
     
-    try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            content_div = soup.find('div', class_='book-content')
-            
-            if content_div:
-                paragraphs = []
-                for p in content_div.find_all('p'):
-                    text = p.get_text().strip()
-                    if text and len(text) > 20:
-                        text = re.sub(r'\s+', ' ', text)
-                        paragraphs.append(text)
-                
-                return '\n\n'.join(paragraphs) if paragraphs else None
+    if content_div:
+        paragraphs = []
+        for p in content_div.find_all('p'):
+            text = p.get_text().strip()
+            if text and len(text) > 20:
+                text = re.sub(r'\s+', ' ', text)
+                paragraphs.append(text)
         
-        return None
-    except Exception as e:
-        print(f"Error downloading {url}: {e}")
-        return None
+        return '\n\n'.join(paragraphs) if paragraphs else None
+    
+    return None
 
 def main():
     """Download all chapter commentaries"""
+    parser = argparse.ArgumentParser(description="Download MHCC chapter commentaries")
+    add_crawler_arguments(parser)
+    args = parser.parse_args()
+    crawler = crawler_from_args(args)
+    
     books = get_book_info()
-    all_commentaries = []
+    chapters = {}
+    for book_name, book_roman, chapter_count in books[:5]:  # Start with first 5 books
+        for chapter in range(1, min(chapter_count + 1, 11)):  # Limit to first 10 chapters per book
+            chapters[chapter_url(book_roman, chapter, args.base_url)] = (book_name, chapter)
     
     print("Downloading Matthew Henry's Concise Commentary by chapters...")
+    results = crawler.run(chapters, lambda url, response: extract_chapter(response.text), tag='mhcc_chapters')
     
-    for book_name, book_roman, chapter_count in books[:5]:  # Start with first 5 books
-        print(f"\nProcessing {book_name} ({chapter_count} chapters)...")
-        
-        for chapter in range(1, min(chapter_count + 1, 11)):  # Limit to first 10 chapters per book
-            print(f"  Chapter {chapter}...", end='')
-            
-            commentary = download_chapter(book_roman, chapter)
-            if commentary:
-                all_commentaries.append({
-                    'book': book_name,
-                    'chapter': chapter,
-                    'commentary': commentary
-                })
-                print(" OK")
-            else:
-                print(" FAILED")
-            
-            time.sleep(0.5)  # Be respectful to the server
+    all_commentaries = []
+    for url, (book_name, chapter) in chapters.items():
+        commentary = results.get(url)
+        if commentary:
+            all_commentaries.append({
+                'book': book_name,
+                'chapter': chapter,
+                'commentary': commentary
+            })
+        else:
+            print(f"  {book_name} {chapter}: FAILED")
     
     # Save results
     if all_commentaries:
@@ -3,17 +3,18 @@
 Explore the structure of Matthew Henry's Concise Commentary on CCEL
 """
 
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 
+from mhc_crawler import fetch_page
+
 def explore_mhcc_index():
     """Explore the MHCC index page to understand the structure"""
     url = "https://ccel.org/ccel/henry/mhcc/mhcc.i.html"
     
     try:
         print(f"Fetching: {url}")
-        response = requests.get(url)
+        response = fetch_page(url)
         response.raise_for_status()
         
         soup = BeautifulSoup(response.text, 'html.parser')
@@ -73,10 +74,10 @@ def test_specific_book_url():
     for url in test_urls:
         try:
             print(f"\n=== Testing: {url} ===")
-            response = requests.get(url)
-            print(f"Status: {response.status_code}")
+            response = fetch_page(url)
+            print(f"Status: {response.status}")
             
-            if response.status_code == 200:
+            if response.status == 200:
                 soup = BeautifulSoup(response.text, 'html.parser')
                 title = soup.find('title')
                 if title:
@@ -4,6 +4,8 @@ import csv
 from bs4 import BeautifulSoup
 import re
 
+from download_complete_mhcc import match_book
+
 def extract_commentary_content(html_file):
     """Extract commentary content from a single HTML file"""
     with open(html_file, 'r', encoding='utf-8') as f:
@@ -19,6 +21,7 @@ def extract_commentary_content(html_file):
     # Extract book title
     title_elem = content_div.find('h2')
     book_title = title_elem.get_text().strip() if title_elem else "Unknown"
+    book_title = match_book(book_title) or book_title
     
     # Extract all paragraphs of commentary
     paragraphs = []
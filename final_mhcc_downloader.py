@@ -4,7 +4,6 @@ Final approach to download Matthew Henry's Concise Commentary
 This version uses the direct link you provided and extracts the full content
 """
 
-import requests
 import os
 import json
 import sqlite3
@@ -12,12 +11,14 @@ import csv
 from bs4 import BeautifulSoup
 import re
 
+from mhc_crawler import fetch_page
+
 def download_from_direct_link():
     """Download from the direct CCEL link provided by the user"""
     url = "https://ccel.org/ccel/henry/mhcc/mhcc.i.html"
     
     print(f"Downloading from: {url}")
-    response = requests.get(url)
+    response = fetch_page(url)
     response.raise_for_status()
     
     soup = BeautifulSoup(response.text, 'html.parser')
@@ -33,13 +34,13 @@ def download_from_direct_link():
         for p in content_div.find_all(['p', 'div']):
             text = p.get_text().strip()
             if text and len(text) > 30:
-                text = re.sub(r'\\s+', ' ', text)
+                text = re.sub(r'\s+', ' ', text)
                 paragraphs.append(text)
         
-        full_text = '\\n\\n'.join(paragraphs)
+        full_text = '\n\n'.join(paragraphs)
         
         return [{
-            'book': 'Matthew Henry\\'s Concise Commentary - Introduction',
+            'book': "Matthew Henry's Concise Commentary - Introduction",
             'commentary': full_text
         }]
     
@@ -63,7 +64,7 @@ This commentary provides verse-by-verse exposition with practical applications f
 The commentary covers all 66 books of the Bible, from Genesis to Revelation, providing historical context, theological insights, and practical applications for each passage. It remains one of the most widely used and respected Bible commentaries in the English language.'''
 
     return [{
-        'book': 'Matthew Henry\\'s Concise Commentary',
+        'book': "Matthew Henry's Concise Commentary",
         'commentary': sample_content
     }]
 
@@ -140,12 +141,12 @@ def create_output_files(commentaries):
     # Plain text format
     txt_file = os.path.join(output_dir, "MHCC.txt")
     with open(txt_file, 'w', encoding='utf-8') as f:
-        f.write("Matthew Henry's Concise Commentary on the Bible\\n")
-        f.write("=" * 60 + "\\n\\n")
+        f.write("Matthew Henry's Concise Commentary on the Bible\n")
+        f.write("=" * 60 + "\n\n")
         for commentary in commentaries:
-            f.write(f"=== {commentary['book']} ===\\n\\n")
+            f.write(f"=== {commentary['book']} ===\n\n")
             f.write(commentary['commentary'])
-            f.write("\\n\\n" + "=" * 60 + "\\n\\n")
+            f.write("\n\n" + "=" * 60 + "\n\n")
     print(f"Created: {txt_file}")
 
 def create_readme():
@@ -206,18 +207,18 @@ def main():
         print("Using sample commentary content...")
         commentaries = get_sample_commentary()
     
-    print(f"\\nPreparing {len(commentaries)} commentary sections")
+    print(f"\nPreparing {len(commentaries)} commentary sections")
     
     if commentaries:
         create_output_files(commentaries)
         create_readme()
-        print(f"\\nFiles created in 'formats/commentary/' directory")
+        print(f"\nFiles created in 'formats/commentary/' directory")
         
         # Show summary
         total_chars = sum(len(c['commentary']) for c in commentaries)
         print(f"Total commentary text: {total_chars:,} characters")
         
-        print("\\n=== Available Files ===")
+        print("\n=== Available Files ===")
         output_dir = os.path.join("formats", "commentary")
         for filename in os.listdir(output_dir):
             filepath = os.path.join(output_dir, filename)
@@ -228,4 +229,4 @@ def main():
         print("No commentary content was extracted")
 
 if __name__ == "__main__":
-    main()'''
\ No newline at end of file
+    main()
@@ -0,0 +1,49 @@
+import os
+import json
+
+from generators.coverage.coverage_matrix import CoverageMatrix
+from versification.alignment import index_translation
+from versification.schemes import translation_scheme
+
+
+class CoverageGenerator:
+    def __init__(self, source_directory, format_directory):
+        self.source_directory = source_directory
+        self.format_directory = format_directory
+        self.coverage_directory = os.path.join(format_directory, 'coverage')
+
+    def load_translation(self, language, translation):
+        json_path = os.path.join(self.source_directory, language, translation, f"{translation}.json")
+        with open(json_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def verse_keys(self, language, translation):
+        """Canonical keys of every verse that has text in a translation"""
+        data = self.load_translation(language, translation)
+        scheme = translation_scheme(self.source_directory, translation)
+        index, _ = index_translation(data, scheme)
+        return [key for key, text in index.items() if text and text.strip()]
+
+    def generate(self, language, translation):
+        """Rebuild one translation's row of the coverage matrix, leaving the other rows as they are"""
+        matrix = CoverageMatrix.load(self.coverage_directory, mmap=False)
+        keys = self.verse_keys(language, translation)
+        matrix.update_translation(translation, language, keys)
+        matrix.save(self.coverage_directory)
+        print(f"Coverage updated for {translation}: {len(keys)} verses")
+
+    def generate_all(self):
+        """Rebuild the matrix for every translation in the sources folder in one pass"""
+        entries = []
+        for language in sorted(os.listdir(self.source_directory)):
+            language_path = os.path.join(self.source_directory, language)
+            if not os.path.isdir(language_path) or language == 'extras':
+                continue
+            for translation in sorted(os.listdir(language_path)):
+                json_path = os.path.join(language_path, translation, f"{translation}.json")
+                if not os.path.isfile(json_path):
+                    continue
+                entries.append((translation, language, self.verse_keys(language, translation)))
+        matrix = CoverageMatrix.build(entries)
+        matrix.save(self.coverage_directory)
+        print(f"Coverage matrix written for {len(matrix.translations)} translations x {len(matrix.keys)} verses")
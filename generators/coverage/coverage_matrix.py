@@ -0,0 +1,177 @@
+"""
+Translation x canonical verse presence matrix.
+
+Row ``i`` is a translation, column ``j`` a canonical verse key, and each
+row is packed eight verses per byte. The matrix is stored in
+``formats/coverage`` as:
+
+- ``coverage_bits.npy``        uint8 array, shape (translations, ceil(keys / 8))
+- ``coverage_keys.npy``        int32 array of sorted canonical keys (the columns)
+- ``coverage_translations.json`` ordered list of {"translation", "language"} (the rows)
+"""
+
+import json
+import os
+
+import numpy as np
+
+from versification.canon import chapter_bounds, make_key
+
+BITS_FILE = 'coverage_bits.npy'
+KEYS_FILE = 'coverage_keys.npy'
+TRANSLATIONS_FILE = 'coverage_translations.json'
+
+
+class CoverageMatrix:
+    def __init__(self, translations=None, keys=None, bits=None):
+        self.translations = translations or []
+        self.keys = keys if keys is not None else np.zeros(0, dtype=np.int32)
+        self.bits = bits if bits is not None else np.zeros((0, 0), dtype=np.uint8)
+        self._rows = {entry['translation']: i for i, entry in enumerate(self.translations)}
+        self.directory = None  # where the matrix was loaded from
+        self._dirty = set()  # files that must be rewritten in full on save
+        self._dirty_rows = set()  # rows of the bit array changed in place since loading
+
+    @classmethod
+    def build(cls, entries):
+        """Build a matrix in one pass from (translation, language, verse keys) entries"""
+        entries = [(translation, language, np.unique(np.asarray(keys, dtype=np.int32)))
+                   for translation, language, keys in entries]
+        keys = np.unique(np.concatenate([entry[2] for entry in entries])) if entries else np.zeros(0, dtype=np.int32)
+        dense = np.zeros((len(entries), len(keys)), dtype=bool)
+        for row, (_, _, verse_keys) in enumerate(entries):
+            dense[row, np.searchsorted(keys, verse_keys)] = True
+        translations = [{'translation': translation, 'language': language} for translation, language, _ in entries]
+        return cls(translations, keys.astype(np.int32), np.packbits(dense, axis=1))
+
+    @classmethod
+    def load(cls, coverage_directory, mmap=True):
+        """Load a stored matrix; the bit array is memory-mapped unless mmap is False"""
+        bits_path = os.path.join(coverage_directory, BITS_FILE)
+        if not os.path.exists(bits_path):
+            return cls()
+        with open(os.path.join(coverage_directory, TRANSLATIONS_FILE), 'r', encoding='utf-8') as file:
+            translations = json.load(file)
+        keys = np.load(os.path.join(coverage_directory, KEYS_FILE))
+        bits = np.load(bits_path, mmap_mode='r' if mmap else None)
+        matrix = cls(translations, keys, bits)
+        matrix.directory = coverage_directory
+        return matrix
+
+    def save(self, coverage_directory):
+        """Write the matrix files, replacing any previous version atomically
+
+        Saving back to the directory the matrix was loaded from writes only
+        what changed: a row updated in place is written into the stored bit
+        array, and the other files are left alone.
+        """
+        os.makedirs(coverage_directory, exist_ok=True)
+        if self.directory is None or os.path.abspath(coverage_directory) != os.path.abspath(self.directory):
+            self._dirty = {KEYS_FILE, BITS_FILE, TRANSLATIONS_FILE}
+        elif BITS_FILE not in self._dirty and self._dirty_rows:
+            stored = np.load(os.path.join(coverage_directory, BITS_FILE), mmap_mode='r+')
+            for row in sorted(self._dirty_rows):
+                stored[row] = self.bits[row]
+            stored.flush()
+            del stored
+        for name, array in ((KEYS_FILE, self.keys), (BITS_FILE, self.bits)):
+            if name not in self._dirty:
+                continue
+            temp_path = os.path.join(coverage_directory, name + '.tmp')
+            with open(temp_path, 'wb') as file:
+                np.save(file, np.ascontiguousarray(array))
+            os.replace(temp_path, os.path.join(coverage_directory, name))
+        if TRANSLATIONS_FILE in self._dirty:
+            temp_path = os.path.join(coverage_directory, TRANSLATIONS_FILE + '.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(self.translations, file, indent=2, ensure_ascii=False)
+            os.replace(temp_path, os.path.join(coverage_directory, TRANSLATIONS_FILE))
+        self.directory = coverage_directory
+        self._dirty = set()
+        self._dirty_rows = set()
+
+    def update_translation(self, translation, language, verse_keys):
+        """Replace (or add) one translation's row; new verse keys widen the matrix
+
+        Only that row is packed again, unless the keys add columns, when the
+        stored rows are widened to the new column set.
+        """
+        verse_keys = np.unique(np.asarray(verse_keys, dtype=np.int32))
+        new_keys = np.setdiff1d(verse_keys, self.keys, assume_unique=True)
+        if len(new_keys):
+            all_keys = np.union1d(self.keys, new_keys).astype(np.int32)
+            dense = np.zeros((len(self.translations), len(all_keys)), dtype=bool)
+            if len(self.translations):
+                dense[:, np.searchsorted(all_keys, self.keys)] = \
+                    np.unpackbits(np.asarray(self.bits), axis=1, count=len(self.keys)).astype(bool)
+            self.keys, self.bits = all_keys, np.packbits(dense, axis=1)
+            self._dirty.update((KEYS_FILE, BITS_FILE))
+
+        row = np.zeros(len(self.keys), dtype=bool)
+        row[np.searchsorted(self.keys, verse_keys)] = True
+        packed = np.packbits(row)
+        if translation in self._rows:
+            index = self._rows[translation]
+            if not np.array_equal(self.bits[index], packed):
+                if not self.bits.flags.writeable:
+                    self.bits = np.array(self.bits)
+                self.bits[index] = packed
+                self._dirty_rows.add(index)
+            if self.translations[index]['language'] != language:
+                self.translations[index]['language'] = language
+                self._dirty.add(TRANSLATIONS_FILE)
+        else:
+            self._rows[translation] = len(self.translations)
+            self.translations.append({'translation': translation, 'language': language})
+            bits = np.asarray(self.bits).reshape(-1, len(packed))
+            self.bits = np.vstack([bits, packed[np.newaxis, :]])
+            self._dirty.update((BITS_FILE, TRANSLATIONS_FILE))
+
+    def _row(self, translation):
+        if translation not in self._rows:
+            raise ValueError(f"Translation not in the coverage matrix: {translation}")
+        return np.unpackbits(self.bits[self._rows[translation]], count=len(self.keys)).astype(bool)
+
+    def _columns(self, first_key, last_key):
+        return np.searchsorted(self.keys, first_key), np.searchsorted(self.keys, last_key, side='right')
+
+    def has_translation(self, translation):
+        return translation in self._rows
+
+    def verse_count(self, translation):
+        """Number of canonical verses present in a translation"""
+        return int(self._row(translation).sum())
+
+    def contains(self, translation, key):
+        """Whether a translation has text for one canonical verse key"""
+        column = np.searchsorted(self.keys, key)
+        if translation not in self._rows or column >= len(self.keys) or self.keys[column] != key:
+            return False
+        byte = self.bits[self._rows[translation], column >> 3]
+        return bool((byte >> (7 - (column & 7))) & 1)
+
+    def translations_with(self, book, chapter=None, verse=None):
+        """List translations with any text in a book, chapter or single verse"""
+        if verse is not None:
+            first_key = last_key = make_key(book, chapter, verse)
+        elif chapter is not None:
+            first_key, last_key = chapter_bounds(book, chapter)
+        else:
+            first_key, last_key = make_key(book, 0, 0), make_key(book, 999, 999)
+        start, stop = self._columns(first_key, last_key)
+        if start == stop:
+            return []
+        # Only unpack the bytes that hold the requested columns
+        first_byte, last_byte = start >> 3, ((stop - 1) >> 3) + 1
+        offset = first_byte * 8
+        window = np.unpackbits(self.bits[:, first_byte:last_byte], axis=1)[:, start - offset:stop - offset]
+        present = window.any(axis=1)
+        return [self.translations[i]['translation'] for i in np.flatnonzero(present)]
+
+    def missing_verses(self, translation, reference=None):
+        """Canonical keys present in the reference translation (or any translation) but not in this one"""
+        if reference is not None:
+            expected = self._row(reference)
+        else:
+            expected = np.unpackbits(np.asarray(self.bits), axis=1, count=len(self.keys)).any(axis=0)
+        return self.keys[expected & ~self._row(translation)].tolist()
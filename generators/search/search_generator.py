@@ -0,0 +1,77 @@
+import os
+import json
+
+from search.index import write_index
+from search.suggest import book_entries, count_book_verses, term_entries, write_suggest_index
+from search.tokenizers import get_tokenizer
+from search.trigrams import write_trigram_index
+from versification.alignment import index_translation
+from versification.schemes import translation_scheme
+
+
+class SearchGenerator:
+    def __init__(self, source_directory, format_directory):
+        self.source_directory = source_directory
+        self.format_directory = format_directory
+        self.search_directory = os.path.join(format_directory, 'search')
+
+    def load_translation(self, language, translation):
+        json_path = os.path.join(self.source_directory, language, translation, f"{translation}.json")
+        with open(json_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def documents(self, language, translation):
+        """Non-empty verses of a translation as (canonical key, text) pairs"""
+        data = self.load_translation(language, translation)
+        scheme = translation_scheme(self.source_directory, translation)
+        index, _ = index_translation(data, scheme)
+        return [(key, text) for key, text in index.items() if text and text.strip()]
+
+    def generate(self, language, translation):
+        """Write formats/search/<translation>.idx, keyed by canonical verse keys"""
+        documents = self.documents(language, translation)
+        index_path = os.path.join(self.search_directory, f"{translation}.idx")
+        header = write_index(index_path, documents, language=language, translation=translation)
+        print(f"Search index written for {translation}: {header['documents']} verses, {header['terms']} terms")
+
+    def translations(self):
+        """(language, translation) of every source translation with a JSON file"""
+        found = []
+        for language in sorted(os.listdir(self.source_directory)):
+            language_path = os.path.join(self.source_directory, language)
+            if not os.path.isdir(language_path) or language == 'extras':
+                continue
+            for translation in sorted(os.listdir(language_path)):
+                if os.path.isfile(os.path.join(language_path, translation, f"{translation}.json")):
+                    found.append((language, translation))
+        return found
+
+    def generate_trigrams(self, translations=None):
+        """Write formats/search/trigrams.idx, one block per translation, for regex and substring search"""
+        translations = translations or self.translations()
+        blocks = write_trigram_index(
+            os.path.join(self.search_directory, 'trigrams.idx'),
+            ((translation, language, self.documents(language, translation)) for language, translation in translations))
+        print(f"Trigram index written for {len(blocks)} translations")
+
+    def generate_suggestions(self, translations=None):
+        """Write formats/search/suggest.idx: book names in every language, then names and frequent terms per translation"""
+        translations = translations or self.translations()
+        verses = {}
+        blocks = []
+        for language, translation in translations:
+            documents = self.documents(language, translation)
+            count_book_verses(documents, verses)
+            tokenizer = get_tokenizer(language)
+            # Character bigrams of unspaced scripts are not words worth completing
+            if not tokenizer.phrase_words:
+                blocks.append((translation, tokenizer.name, term_entries(documents, tokenizer)))
+        write_suggest_index(os.path.join(self.search_directory, 'suggest.idx'), book_entries(verses), blocks)
+        print(f"Suggestion index written for {len(blocks)} translations")
+
+    def generate_all(self):
+        translations = self.translations()
+        for language, translation in translations:
+            self.generate(language, translation)
+        self.generate_trigrams(translations)
+        self.generate_suggestions(translations)
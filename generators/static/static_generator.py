@@ -0,0 +1,202 @@
+"""
+Static pre-rendered API tree for CDN / nginx serving.
+
+Each translation is exploded into the same JSON documents the API server
+returns, laid out so the URL path is the file path:
+
+- ``formats/static/translations.json``
+- ``formats/static/{abbr}/books.json``
+- ``formats/static/{abbr}/{book}/{chapter}.json``
+
+``book`` is the canonical book number. Every document gets ``.gz`` and
+``.br`` siblings (for nginx ``gzip_static`` / ``brotli_static``; the
+``.br`` files are skipped when the brotli package is not installed).
+``manifest.json`` records the SHA-256 of each uncompressed document and
+the compressed variants written for it. A run only rewrites (and
+recompresses) the documents whose hash changed, plus any variant that is
+missing, e.g. ``.br`` files after brotli is installed. Documents whose
+chapter, or whole translation, is gone from the sources are removed.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from versification.canon import BOOK_NAMES, book_number
+
+MANIFEST_FILE = 'manifest.json'
+COMPRESSED_SUFFIXES = ('.gz', '.br')
+
+
+def json_bytes(payload):
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class StaticGenerator:
+    def __init__(self, source_directory, format_directory):
+        self.source_directory = source_directory
+        self.format_directory = format_directory
+        self.static_directory = os.path.join(format_directory, 'static')
+        self.manifest_path = os.path.join(self.static_directory, MANIFEST_FILE)
+        self.written = 0
+        self.unchanged = 0
+
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def save_manifest(self, manifest):
+        os.makedirs(self.static_directory, exist_ok=True)
+        temp_path = self.manifest_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(dict(sorted(manifest.items())), file, indent=1)
+        os.replace(temp_path, self.manifest_path)
+
+    def load_translation(self, language, translation):
+        json_path = os.path.join(self.source_directory, language, translation, f"{translation}.json")
+        with open(json_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def read_metadata(self, language, translation):
+        """Title and license from the translation's README.md"""
+        metadata = {'translation': translation, 'title': translation, 'license': 'Unknown'}
+        readme_path = os.path.join(self.source_directory, language, translation, 'README.md')
+        if os.path.exists(readme_path):
+            with open(readme_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    line = line.strip()
+                    if line.startswith('#') and metadata['title'] == translation:
+                        metadata['title'] = line.strip('# ').strip()
+                    elif line.startswith('**License:**'):
+                        metadata['license'] = line.replace('**License:**', '').strip()
+        return metadata
+
+    def write_document(self, relative_path, content, manifest):
+        """Write a document and its compressed siblings, skipping the files already current
+
+        A document whose hash is in the manifest only gets the variants that
+        are missing from disk or were not written last time.
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        path = os.path.join(self.static_directory, relative_path)
+        suffixes = ['', '.gz'] + (['.br'] if brotli is not None else [])
+        entry = manifest.get(relative_path)
+        if isinstance(entry, dict) and entry['sha256'] == digest:
+            recorded = [''] + entry['variants']
+            missing = [suffix for suffix in suffixes
+                       if suffix not in recorded or not os.path.exists(path + suffix)]
+            if not missing:
+                self.unchanged += 1
+                return
+        else:
+            missing = suffixes
+            # Compressed copies of an older version that this run cannot replace would be stale
+            for suffix in COMPRESSED_SUFFIXES:
+                if suffix not in suffixes and os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        for suffix in missing:
+            if suffix == '.gz':
+                data = gzip.compress(content, compresslevel=9, mtime=0)
+            elif suffix == '.br':
+                data = brotli.compress(content, mode=brotli.MODE_TEXT)
+            else:
+                data = content
+            temp_path = path + suffix + '.tmp'
+            with open(temp_path, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, path + suffix)
+        variants = [suffix for suffix in COMPRESSED_SUFFIXES if os.path.exists(path + suffix)]
+        manifest[relative_path] = {'sha256': digest, 'variants': variants}
+        self.written += 1
+
+    def remove_document(self, relative_path, manifest):
+        path = os.path.join(self.static_directory, relative_path)
+        for variant_path in [path] + [path + suffix for suffix in COMPRESSED_SUFFIXES]:
+            if os.path.exists(variant_path):
+                os.remove(variant_path)
+        manifest.pop(relative_path, None)
+
+    def build_documents(self, translation, data):
+        """Yield (relative path, content) for a translation's books.json and chapter shards"""
+        books = []
+        seen = set()
+        for book in data['books']:
+            number = book_number(book['name'])
+            # Some sources repeat a book; the first copy wins, as in the API
+            if number is None or number in seen:
+                continue
+            seen.add(number)
+            chapter_count = 0
+            for chapter in book['chapters']:
+                if not any(verse['text'].strip() for verse in chapter['verses']):
+                    continue
+                chapter_count += 1
+                payload = {
+                    'translation': translation,
+                    'book': number,
+                    'chapter': chapter['chapter'],
+                    'verses': [{'verse': verse['verse'], 'text': verse['text']} for verse in chapter['verses']],
+                }
+                yield f"{translation}/{number}/{chapter['chapter']}.json", json_bytes(payload)
+            if chapter_count:
+                books.append({'id': number, 'name': BOOK_NAMES[number], 'chapters': chapter_count})
+        yield f"{translation}/books.json", json_bytes(books)
+
+    def generate_translation(self, language, translation, manifest):
+        data = self.load_translation(language, translation)
+        produced = set()
+        for relative_path, content in self.build_documents(translation, data):
+            produced.add(relative_path)
+            self.write_document(relative_path, content, manifest)
+        # Drop shards for chapters that no longer exist in the source
+        for relative_path in [path for path in manifest if path.startswith(f"{translation}/")]:
+            if relative_path not in produced:
+                self.remove_document(relative_path, manifest)
+
+    def list_translations(self):
+        """(language, translation) for every source translation with an extracted JSON file"""
+        translations = []
+        for language in sorted(os.listdir(self.source_directory)):
+            language_path = os.path.join(self.source_directory, language)
+            if not os.path.isdir(language_path) or language == 'extras':
+                continue
+            for translation in sorted(os.listdir(language_path)):
+                if os.path.isfile(os.path.join(language_path, translation, f"{translation}.json")):
+                    translations.append((language, translation))
+        return translations
+
+    def write_translation_list(self, manifest):
+        entries = [self.read_metadata(language, translation) for language, translation in self.list_translations()]
+        self.write_document('translations.json', json_bytes(entries), manifest)
+
+    def generate(self, language, translation):
+        """Refresh one translation's shards and the translation list"""
+        manifest = self.load_manifest()
+        self.generate_translation(language, translation, manifest)
+        self.write_translation_list(manifest)
+        self.save_manifest(manifest)
+        print(f"Static tree updated for {translation}: {self.written} written, {self.unchanged} unchanged")
+
+    def generate_all(self):
+        manifest = self.load_manifest()
+        translations = self.list_translations()
+        for language, translation in translations:
+            self.generate_translation(language, translation, manifest)
+        # Drop the whole tree of a translation whose source is gone
+        names = {translation for _, translation in translations}
+        for relative_path in [path for path in manifest if '/' in path and path.split('/', 1)[0] not in names]:
+            self.remove_document(relative_path, manifest)
+        self.write_translation_list(manifest)
+        self.save_manifest(manifest)
+        if brotli is None:
+            print("brotli is not installed; .br files were not written (pip install brotli)")
+        print(f"Static tree written to {self.static_directory}: {self.written} written, {self.unchanged} unchanged")
@@ -4,13 +4,16 @@ Download Matthew Henry's Concise Commentary from CCEL
 This version targets the complete commentary structure
 """
 
-import requests
 import os
 import json
 import sqlite3
+import argparse
 from bs4 import BeautifulSoup
 import re
 
+from download_complete_mhcc import HEADING_TAGS, iter_blocks, match_book
+from mhc_crawler import CCEL_BASE_URL, add_crawler_arguments, crawler_from_args
+
 def get_mhcc_book_urls():
     """Get all book URLs for Matthew Henry's Concise Commentary"""
     # These are the direct URLs to each book's commentary
@@ -110,14 +113,10 @@ def extract_book_name(url):
     book_abbr = url.split('.')[-2]  # Get part before .html
     return book_mapping.get(book_abbr, book_abbr)
 
-def download_commentary(url):
-    """Download and extract commentary from a single URL"""
+def extract_commentary(url, html):
+    """Extract commentary from a downloaded book page"""
     try:
-        print(f"Downloading: {extract_book_name(url)}")
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = BeautifulSoup(html, 'html.parser')
         
         # Find the main content
         content_div = soup.find('div', class_='book-content')
@@ -127,24 +126,27 @@ def download_commentary(url):
         
         if content_div:
             # Extract all text content
+            book = extract_book_name(url)
             paragraphs = []
-            for p in content_div.find_all(['p', 'div']):
-                text = p.get_text().strip()
-                if text and len(text) > 30:  # Filter short paragraphs
-                    # Clean up text
-                    text = re.sub(r'\s+', ' ', text)
-                    text = re.sub(r'^\d+\.\s*', '', text)  # Remove leading numbers
+            for tag, text in iter_blocks(content_div):
+                if tag in HEADING_TAGS:
+                    # An unmapped URL still gets its book from the page's own title
+                    if match_book(book) is None:
+                        book = match_book(text) or book
+                    continue
+                text = re.sub(r'^\d+\.\s*', '', text)  # Remove leading numbers
+                if len(text) > 30:  # Filter short paragraphs
                     paragraphs.append(text)
             
             commentary_text = '\n\n'.join(paragraphs)
             
             return {
-                'book': extract_book_name(url),
+                'book': book,
                 'commentary': commentary_text
             }
     
     except Exception as e:
-        print(f"Error downloading {url}: {e}")
+        print(f"Error extracting {url}: {e}")
         return None
 
 def create_database_files(commentaries):
@@ -205,11 +207,17 @@ def main():
     print("Matthew Henry's Concise Commentary Downloader")
     print("=" * 55)
     
-    book_urls = get_mhcc_book_urls()
+    parser = argparse.ArgumentParser(description="Download MHCC book pages from CCEL")
+    add_crawler_arguments(parser)
+    args = parser.parse_args()
+    
+    book_urls = [url.replace(CCEL_BASE_URL, args.base_url) for url in get_mhcc_book_urls()]
+    results = crawler_from_args(args).run(book_urls, lambda url, response: extract_commentary(url, response.text),
+                                         tag='full_mhcc')
     commentaries = []
     
     for url in book_urls:
-        commentary = download_commentary(url)
+        commentary = results.get(url)
         if commentary and commentary['commentary']:
             commentaries.append(commentary)
     
@@ -4,7 +4,6 @@ Simple script to download and process Matthew Henry's Concise Commentary
 from CCEL (Christian Classics Ethereal Library)
 """
 
-import requests
 import os
 import json
 import sqlite3
@@ -12,13 +11,15 @@ from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import re
 
+from mhc_crawler import fetch_page
+
 def download_mhcc():
     """Download Matthew Henry's Concise Commentary from CCEL"""
     base_url = "https://ccel.org/ccel/henry/mhcc/"
     index_url = base_url + "mhcc.i.html"
     
     print("Downloading MHCC index...")
-    response = requests.get(index_url)
+    response = fetch_page(index_url)
     response.raise_for_status()
     
     soup = BeautifulSoup(response.text, 'html.parser')
@@ -39,7 +40,7 @@ def download_mhcc():
     for i, url in enumerate(sorted(set(links)), 1):
         try:
             print(f"Downloading {i}/{len(set(links))}: {os.path.basename(url)}")
-            response = requests.get(url)
+            response = fetch_page(url)
             response.raise_for_status()
             
             # Extract content
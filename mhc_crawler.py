@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+Shared asynchronous crawler for the CCEL commentary downloaders.
+
+Pages are fetched over a small keep-alive connection pool (plain asyncio
+streams speaking HTTP/1.1, no extra dependencies) by a fixed number of
+concurrent workers. A token bucket caps the request rate for the whole
+crawl, failed requests (connection errors, 429 and 5xx) are retried with
+exponential backoff, and finished pages are recorded in a JSON state file,
+so an interrupted crawl resumes where it stopped instead of starting over.
+
+The downloaders call ``Crawler.run(urls, handler)``; ``handler(url,
+response)`` saves or parses a page and returns a JSON-serializable result,
+which is what a resumed run gets back for pages it does not fetch again.
+
+Every response is kept in an on-disk cache (commentary/.http_cache by
+default). Page bodies are stored once under their SHA-256. Each URL's ETag
+and Last-Modified are kept next to its body, and a later run revalidates
+the URL with If-None-Match / If-Modified-Since. An unchanged page then
+costs a 304, and with a ``tag`` its handler result is reused instead of
+parsing the page again. ``--offline`` (or MHC_OFFLINE=1 for the scripts
+without options) answers from the cache alone and fails on anything
+missing, so a build can be reproduced without network access.
+
+For testing without touching ccel.org, ``--serve`` starts a local stand-in
+that answers the CCEL chapter URLs from the saved pages in
+commentary/mhc/html:
+
+    python mhc_crawler.py --serve commentary/mhc/html --port 8765
+    python download_mhc_commentary.py --base-url http://127.0.0.1:8765/ccel/henry/mhcc
+"""
+
+import os
+import re
+import ssl
+import json
+import gzip
+import hashlib
+import time
+import random
+import asyncio
+import argparse
+import threading
+from collections import Counter
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import urljoin, urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CCEL_BASE_URL = "https://ccel.org/ccel/henry/mhcc"
+USER_AGENT = "bible_databases-mhc-crawler/1.0"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_REDIRECTS = 5
+DEFAULT_CACHE_DIR = "commentary/.http_cache"
+
+
+class FetchError(Exception):
+    pass
+
+
+def write_atomic(path, data):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_file = path + '.tmp'
+    with open(temp_file, 'wb') as f:
+        f.write(data)
+    os.replace(temp_file, path)
+
+
+def offline_from_environment():
+    return os.environ.get('MHC_OFFLINE', '') not in ('', '0')
+
+
+class Response:
+    def __init__(self, url, status, headers, body, digest=None, source='network'):
+        self.url = url
+        self.status = status
+        self.headers = headers  # lower-cased names
+        self.body = body
+        self.digest = digest  # SHA-256 of the body, once it is in the cache
+        self.source = source  # 'network', 'revalidated' (a 304) or 'offline'
+
+    @property
+    def text(self):
+        match = re.search(r'charset=([\w-]+)', self.headers.get('content-type', ''))
+        return self.body.decode(match.group(1) if match else 'utf-8', errors='replace')
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise FetchError(f"{self.url}: HTTP {self.status}")
+
+
+class ResponseCache:
+    """Fetched pages by SHA-256, with the validators of every URL that served them"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = directory
+        self.index_file = os.path.join(directory, 'index.json')
+        self.entries = {}  # url -> {'sha256', 'etag', 'last_modified', 'content_type'}
+        self.changed = False
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def object_path(self, digest):
+        return os.path.join(self.directory, 'objects', digest[:2], digest)
+
+    def result_path(self, tag, url, digest):
+        name = hashlib.sha256(f"{url}\n{digest}".encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, 'results', tag, name + '.json')
+
+    def load(self, url, source):
+        """The cached Response for ``url``, or None"""
+        entry = self.entries.get(url)
+        if not entry or not os.path.exists(self.object_path(entry['sha256'])):
+            return None
+        with open(self.object_path(entry['sha256']), 'rb') as f:
+            body = f.read()
+        headers = {'content-type': entry.get('content_type') or 'text/html; charset=utf-8'}
+        return Response(url, 200, headers, body, entry['sha256'], source)
+
+    def validators(self, url):
+        """Conditional request headers for revalidating ``url``"""
+        entry = self.entries.get(url) or {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, response):
+        digest = hashlib.sha256(response.body).hexdigest()
+        if not os.path.exists(self.object_path(digest)):
+            write_atomic(self.object_path(digest), response.body)
+        self.entries[url] = {
+            'sha256': digest,
+            'etag': response.headers.get('etag'),
+            'last_modified': response.headers.get('last-modified'),
+            'content_type': response.headers.get('content-type'),
+        }
+        self.changed = True
+        response.digest = digest
+
+    def result(self, tag, url, digest):
+        """{'value': result} stored for this body of ``url`` under ``tag``, or None"""
+        path = self.result_path(tag, url, digest)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def store_result(self, tag, url, digest, value):
+        write_atomic(self.result_path(tag, url, digest), json.dumps({'value': value}, ensure_ascii=False).encode('utf-8'))
+
+    def save(self):
+        if self.changed:
+            write_atomic(self.index_file, json.dumps(self.entries, ensure_ascii=False, indent=1).encode('utf-8'))
+            self.changed = False
+
+
+class TokenBucket:
+    """Allow ``rate`` acquisitions per second on average, in bursts of at most ``burst``"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ConnectionPool:
+    """Idle keep-alive connections per (scheme, host, port)"""
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+        self.idle = {}
+        self.ssl_context = ssl.create_default_context()
+        self.opened = 0
+
+    async def request(self, url, headers=None):
+        """GET one URL, reusing an idle connection to its host when there is one"""
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        origin = (parts.scheme, parts.hostname, port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        extra = ''.join(f"{name}: {value}\r\n" for name, value in (headers or {}).items())
+        request = (f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nUser-Agent: {USER_AGENT}\r\n"
+                   f"Accept-Encoding: gzip\r\n{extra}Connection: keep-alive\r\n\r\n").encode('latin-1')
+
+        while True:
+            reused = bool(self.idle.get(origin))
+            if reused:
+                reader, writer = self.idle[origin].pop()
+            else:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(
+                    parts.hostname, port, ssl=self.ssl_context if parts.scheme == 'https' else None), self.timeout)
+                self.opened += 1
+            try:
+                writer.write(request)
+                await writer.drain()
+                status, headers, body, keep_alive = await asyncio.wait_for(self._read_response(reader), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError) as error:
+                writer.close()
+                if reused:
+                    continue  # the server closed an idle connection; retry on a fresh one
+                raise FetchError(f"{url}: {error!r}") from error
+            except BaseException:
+                writer.close()
+                raise
+            if keep_alive:
+                self.idle.setdefault(origin, []).append((reader, writer))
+            else:
+                writer.close()
+            return Response(url, status, headers, body)
+
+    async def _read_response(self, reader):
+        status_line = await reader.readuntil(b'\r\n')
+        try:
+            version, status = status_line.split(None, 2)[:2]
+            status = int(status)
+        except ValueError:
+            raise FetchError(f"Bad status line {status_line!r}")
+        headers = {}
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = version == b'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                if size == 0:
+                    while await reader.readuntil(b'\r\n') != b'\r\n':
+                        pass  # trailers
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b''.join(chunks)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        elif status in (204, 304) or 100 <= status < 200:
+            body = b''
+        else:
+            body = await reader.read()
+            keep_alive = False
+        if headers.get('content-encoding', '').lower() == 'gzip':
+            body = gzip.decompress(body)
+        return status, headers, body, keep_alive
+
+    def close(self):
+        for connections in self.idle.values():
+            for _, writer in connections:
+                writer.close()
+        self.idle.clear()
+
+
+class Crawler:
+    def __init__(self, rate=2.0, burst=2, concurrency=4, retries=4, backoff=0.5, timeout=30, state_file=None,
+                 cache=None, offline=False):
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.state_file = state_file
+        self.cache = cache
+        self.offline = offline
+        self.sources = Counter()
+        self.pool = None
+        self.bucket = None
+
+    async def fetch(self, url):
+        """GET a URL through the cache, revalidating a cached copy; returns the final Response"""
+        cached = self.cache.load(url, 'offline' if self.offline else 'revalidated') if self.cache else None
+        if self.offline:
+            if cached is None:
+                raise FetchError(f"{url}: not in the cache (offline)")
+            return cached
+        response = await self._fetch_with_retries(url, self.cache.validators(url) if cached else {})
+        if response.status == 304 and cached is not None:
+            return cached
+        if response.status == 200 and self.cache is not None:
+            self.cache.store(url, response)
+        return response
+
+    async def _fetch_with_retries(self, url, headers):
+        """GET a URL with rate limiting, redirects and retries"""
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * 2 ** attempt * (1 + random.random() / 2)
+            try:
+                response = await self._fetch_following_redirects(url, headers)
+            except (FetchError, OSError, asyncio.TimeoutError) as error:
+                if attempt == self.retries:
+                    raise FetchError(f"{url}: {error}") from error
+            else:
+                if response.status not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+                retry_after = response.headers.get('retry-after', '')
+                if retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+            await asyncio.sleep(delay)
+
+    async def _fetch_following_redirects(self, url, headers):
+        for _ in range(MAX_REDIRECTS + 1):
+            await self.bucket.acquire()
+            response = await self.pool.request(url, headers)
+            if response.status not in (301, 302, 303, 307, 308) or 'location' not in response.headers:
+                return response
+            url = urljoin(url, response.headers['location'])
+            headers = {}  # the validators belong to the URL that was asked for
+        raise FetchError(f"Too many redirects for {url}")
+
+    def load_state(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {'done': {}, 'failed': {}}
+        with open(self.state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_state(self, state):
+        if self.cache is not None:
+            self.cache.save()
+        if self.state_file:
+            write_atomic(self.state_file, json.dumps(state, ensure_ascii=False).encode('utf-8'))
+
+    def handle(self, url, response, handler, tag):
+        """``handler``'s result for a page, reused from the cache while the page is unchanged"""
+        if not tag or self.cache is None or response.digest is None:
+            return handler(url, response)
+        cached = self.cache.result(tag, url, response.digest)
+        if cached is not None:
+            return cached['value']
+        value = handler(url, response)
+        self.cache.store_result(tag, url, response.digest, value)
+        return value
+
+    async def crawl(self, urls, handler, tag=None):
+        """Fetch ``urls`` with bounded concurrency; returns {url: handler result} for every finished page
+
+        With a ``tag`` naming the handler, its results are cached by page
+        content and reused for pages that have not changed.
+        """
+        state = self.load_state()
+        state['failed'] = {}
+        queue = asyncio.Queue()
+        for url in dict.fromkeys(urls):
+            if url not in state['done']:
+                queue.put_nowait(url)
+        pending = queue.qsize()
+        if pending < len(set(urls)):
+            print(f"Resuming: {len(set(urls)) - pending} pages already done, {pending} to fetch")
+
+        self.pool = ConnectionPool(self.timeout)
+        self.bucket = TokenBucket(self.rate, self.burst)
+        self.sources = Counter()
+        started = time.monotonic()
+
+        async def worker():
+            while True:
+                try:
+                    url = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    response = await self.fetch(url)
+                    if response.status != 200:
+                        raise FetchError(f"{url}: HTTP {response.status}")
+                    self.sources[response.source] += 1
+                    state['done'][url] = self.handle(url, response, handler, tag)
+                except FetchError as error:
+                    state['failed'][url] = str(error)
+                    print(f"Failed: {error}")
+                except Exception as error:
+                    # A handler that fails on one page (bad markup, a write error) must not stop the other workers
+                    state['failed'][url] = f"{url}: {type(error).__name__}: {error}"
+                    print(f"Failed: {state['failed'][url]}")
+                if len(state['done']) % 25 == 0:
+                    self.save_state(state)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(max(self.concurrency, 1))))
+        finally:
+            self.pool.close()
+            self.save_state(state)
+        print(f"Fetched {pending - len(state['failed'])} of {pending} pages in {time.monotonic() - started:.1f}s "
+              f"over {self.pool.opened} connection(s); {len(state['failed'])} failed")
+        if self.cache is not None:
+            print(f"  {self.sources['network']} downloaded, {self.sources['revalidated']} unchanged (304), "
+                  f"{self.sources['offline']} from the cache offline")
+        return {url: state['done'][url] for url in urls if url in state['done']}
+
+    def run(self, urls, handler, tag=None):
+        """Synchronous entry point for the download scripts"""
+        return asyncio.run(self.crawl(list(urls), handler, tag))
+
+    def get(self, url):
+        """Fetch a single page synchronously"""
+        return asyncio.run(self._get(url))
+
+    async def _get(self, url):
+        self.pool = ConnectionPool(self.timeout)
+        self.bucket = TokenBucket(self.rate, self.burst)
+        try:
+            return await self.fetch(url)
+        finally:
+            self.pool.close()
+            if self.cache is not None:
+                self.cache.save()
+
+
+def add_crawler_arguments(parser, base_url=CCEL_BASE_URL):
+    parser.add_argument('--base-url', default=base_url, help="CCEL mhcc URL prefix (point it at a --serve stand-in to test)")
+    parser.add_argument('--rate', type=float, default=2.0, help="requests per second (0 = unlimited)")
+    parser.add_argument('--concurrency', type=int, default=4, help="requests in flight at once")
+    parser.add_argument('--retries', type=int, default=4)
+    parser.add_argument('--state-file', default=None, help="progress file for resuming an interrupted crawl")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="on-disk HTTP response cache")
+    parser.add_argument('--no-cache', action='store_true', help="neither read nor write the response cache")
+    parser.add_argument('--offline', action='store_true', default=offline_from_environment(),
+                        help="serve every page from the cache without network access (or set MHC_OFFLINE=1)")
+
+
+def crawler_from_args(args, state_file=None):
+    cache = None if args.no_cache and not args.offline else ResponseCache(args.cache_dir)
+    return Crawler(rate=args.rate, burst=max(int(args.rate), 1), concurrency=args.concurrency,
+                   retries=args.retries, state_file=args.state_file or state_file, cache=cache, offline=args.offline)
+
+
+def fetch_page(url, cache_dir=DEFAULT_CACHE_DIR, offline=None):
+    """One page through the response cache, for the scripts that fetch a page at a time
+
+    Offline when MHC_OFFLINE is set, unless ``offline`` says otherwise.
+    """
+    offline = offline_from_environment() if offline is None else offline
+    return Crawler(cache=ResponseCache(cache_dir), offline=offline).get(url)
+
+
+def make_standin_server(html_dir="commentary/mhc/html", host='127.0.0.1', port=0, error_rate=0.0):
+    """HTTP/1.1 keep-alive server answering /ccel/henry/mhcc/mhcc.<book>.<chapter>.html from saved pages
+
+    Book and chapter are Roman numerals, in either case, numbered as in
+    convert_mhc_commentary.BIBLE_BOOKS. ``error_rate`` answers that share of
+    requests with a 503, to exercise retries.
+    """
+    from convert_mhc_commentary import BIBLE_BOOKS, roman_to_int
+
+    chapter_path = re.compile(r'^/ccel/henry/mhcc/mhcc\.([ivxlcdm]+)\.([ivxlcdm]+)\.html$', re.IGNORECASE)
+
+    class StandinHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if error_rate and random.random() < error_rate:
+                return self.reply(503, b'Try again', {'Retry-After': '0'})
+            match = chapter_path.match(self.path)
+            book = BIBLE_BOOKS.get(roman_to_int(match.group(1).upper())) if match else None
+            path = book and os.path.join(html_dir, book[0], f"Chapter_{roman_to_int(match.group(2).upper())}.html")
+            if not path or not os.path.isfile(path):
+                return self.reply(404, b'Not found')
+            with open(path, 'rb') as f:
+                body = f.read()
+            modified = int(os.path.getmtime(path))
+            validators = {'ETag': '"%s"' % hashlib.sha256(body).hexdigest()[:32],
+                          'Last-Modified': formatdate(modified, usegmt=True)}
+            if self.not_modified(validators['ETag'], modified):
+                return self.reply(304, b'', validators)
+            self.reply(200, body, {'Content-Type': 'text/html; charset=utf-8', **validators})
+
+        def not_modified(self, etag, modified):
+            if 'If-None-Match' in self.headers:
+                return etag in [tag.strip() for tag in self.headers['If-None-Match'].split(',')]
+            try:
+                return parsedate_to_datetime(self.headers['If-Modified-Since']).timestamp() >= modified
+            except (TypeError, ValueError):
+                return False
+
+        def reply(self, status, body, headers=None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            if status != 304:
+                self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), StandinHandler)
+
+
+def start_standin_server(html_dir="commentary/mhc/html", error_rate=0.0):
+    """Run a stand-in on a free port in a background thread; returns (server, base URL)"""
+    server = make_standin_server(html_dir, error_rate=error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/ccel/henry/mhcc"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve saved MHC pages as a local stand-in for ccel.org")
+    parser.add_argument('--serve', metavar='HTML_DIR', default="commentary/mhc/html")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered with 503")
+    args = parser.parse_args()
+
+    server = make_standin_server(args.serve, args.host, args.port, args.error_rate)
+    print(f"Serving {args.serve} as http://{args.host}:{args.port}/ccel/henry/mhcc/mhcc.<book>.<chapter>.html")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Export a Bible translation interleaved with Matthew Henry's commentary.
+
+The verses, sorted by canonical key, and the commentary segments built by
+mhc_segments.py, sorted by start key, are merge-joined in a single pass.
+Each segment is written just before the first verse at or after its
+start, and each verse lists the segments whose range covers it, so the
+whole bundle is built without a lookup per verse:
+
+- NDJSON, one record per line: a {"type": "commentary", ...} record, then
+  the {"type": "verse", ..., "commentary": [segment ids]} records after it
+- in the segment database, the verses (mhc_verses), the verse-to-segment
+  pairs (mhc_verse_segments) and a mhc_verse_commentary view joining them
+
+    python mhc_segments.py
+    python mhc_export.py --ndjson formats/mhc/kjv_mhc.ndjson
+"""
+
+import os
+import sys
+import json
+import heapq
+import sqlite3
+import argparse
+
+from versification.alignment import index_translation
+from versification.canon import split_key
+from versification.references import format_range
+from versification.schemes import translation_scheme
+
+EXPORT_TABLES = '''
+    DROP VIEW IF EXISTS mhc_verse_commentary;
+    DROP TABLE IF EXISTS mhc_verse_segments;
+    DROP TABLE IF EXISTS mhc_verses;
+    CREATE TABLE mhc_verses (
+        key INTEGER PRIMARY KEY,
+        book INTEGER NOT NULL,
+        chapter INTEGER NOT NULL,
+        verse INTEGER NOT NULL,
+        text TEXT NOT NULL
+    );
+    CREATE TABLE mhc_verse_segments (
+        verse_key INTEGER NOT NULL,
+        segment_id INTEGER NOT NULL,
+        PRIMARY KEY (verse_key, segment_id)
+    ) WITHOUT ROWID;
+    CREATE VIEW mhc_verse_commentary AS
+        SELECT v.key, v.book, v.chapter, v.verse, v.text,
+               s.id AS segment_id, s.start_key, s.end_key, s.heading, s.text AS commentary
+        FROM mhc_verses v
+        LEFT JOIN mhc_verse_segments l ON l.verse_key = v.key
+        LEFT JOIN mhc_segments s ON s.id = l.segment_id;
+'''
+BATCH_SIZE = 5000
+
+
+def load_verses(source_directory, language, translation):
+    """Non-empty verses of a source translation as (canonical key, text), in canonical order"""
+    json_path = os.path.join(source_directory, language, translation, f"{translation}.json")
+    with open(json_path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    index, _ = index_translation(data, translation_scheme(source_directory, translation))
+    return sorted((key, text) for key, text in index.items() if text and text.strip())
+
+
+def iter_segments(conn):
+    """(id, start_key, end_key, heading, text) of every segment, by start key"""
+    return conn.execute(
+        "SELECT id, start_key, end_key, heading, text FROM mhc_segments ORDER BY start_key, end_key, id")
+
+
+def merge_join(verses, segments):
+    """Interleave sorted verses with sorted segments in one pass
+
+    Yields ('commentary', segment) as each segment starts, and ('verse', key,
+    text, segment ids) for each verse with the segments covering it. Segments
+    that have started sit in a heap by end key until a verse passes them.
+    """
+    segments = iter(segments)
+    upcoming = next(segments, None)
+    active = []  # (end_key, id) of started segments
+    for key, text in verses:
+        while upcoming is not None and upcoming[1] <= key:
+            yield 'commentary', upcoming
+            heapq.heappush(active, (upcoming[2], upcoming[0]))
+            upcoming = next(segments, None)
+        while active and active[0][0] < key:
+            heapq.heappop(active)
+        yield 'verse', key, text, sorted(segment_id for _, segment_id in active)
+    while upcoming is not None:
+        # Commentary past the last verse, e.g. on a book the translation lacks
+        yield 'commentary', upcoming
+        upcoming = next(segments, None)
+
+
+def export(database, verses, ndjson_file=None):
+    """Write the joined verses and commentary to ``database`` and, if given, an NDJSON stream
+
+    Returns (verses, segments, verse-segment pairs) written.
+    """
+    conn = sqlite3.connect(database)
+    out = None
+    if ndjson_file == '-':
+        out = sys.stdout
+    elif ndjson_file:
+        os.makedirs(os.path.dirname(ndjson_file) or '.', exist_ok=True)
+        out = open(ndjson_file + '.tmp', 'w', encoding='utf-8')
+    counts = [0, 0, 0]
+    try:
+        conn.executescript(EXPORT_TABLES)
+        verse_rows, link_rows = [], []
+        # The segments are read on a second cursor while the first one writes
+        for record in merge_join(verses, iter_segments(conn.cursor())):
+            if record[0] == 'commentary':
+                segment_id, start_key, end_key, heading, text = record[1]
+                counts[1] += 1
+                entry = {'type': 'commentary', 'id': segment_id, 'start_key': start_key, 'end_key': end_key,
+                         'reference': format_range(start_key, end_key), 'heading': heading, 'text': text}
+            else:
+                _, key, text, segment_ids = record
+                book, chapter, verse = split_key(key)
+                counts[0] += 1
+                counts[2] += len(segment_ids)
+                verse_rows.append((key, book, chapter, verse, text))
+                link_rows.extend((key, segment_id) for segment_id in segment_ids)
+                entry = {'type': 'verse', 'key': key, 'book': book, 'chapter': chapter, 'verse': verse,
+                         'text': text, 'commentary': segment_ids}
+            if out is not None:
+                out.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            if len(verse_rows) >= BATCH_SIZE:
+                write_rows(conn, verse_rows, link_rows)
+        write_rows(conn, verse_rows, link_rows)
+        conn.commit()
+    finally:
+        conn.close()
+        if out is not None and out is not sys.stdout:
+            out.close()
+    if out is not None and out is not sys.stdout:
+        os.replace(ndjson_file + '.tmp', ndjson_file)
+    return tuple(counts)
+
+
+def write_rows(conn, verse_rows, link_rows):
+    conn.executemany("INSERT INTO mhc_verses (key, book, chapter, verse, text) VALUES (?, ?, ?, ?, ?)", verse_rows)
+    conn.executemany("INSERT INTO mhc_verse_segments (verse_key, segment_id) VALUES (?, ?)", link_rows)
+    verse_rows.clear()
+    link_rows.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a translation interleaved with the MHC commentary segments")
+    parser.add_argument('--sources', default="sources", help="directory of <language>/<translation>/<translation>.json")
+    parser.add_argument('--language', default='en')
+    parser.add_argument('--translation', default='KJV')
+    parser.add_argument('--database', default="commentary/mhc/mhc_books.db", help="database holding mhc_segments")
+    parser.add_argument('--ndjson', metavar='FILE', help="also stream the joined records here ('-' for stdout)")
+    args = parser.parse_args()
+
+    verses = load_verses(args.sources, args.language, args.translation)
+    verse_count, segment_count, pair_count = export(args.database, verses, args.ndjson)
+    print(f"Joined {verse_count} {args.translation} verses with {segment_count} commentary segments "
+          f"({pair_count} verse-segment pairs) in {args.database}", file=sys.stderr if args.ndjson == '-' else sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Split Matthew Henry's Concise Commentary into verse-anchored segments.
+
+The CCEL chapter pages in commentary/mhc/html head each part of the
+commentary with the verses it covers, in one of two layouts:
+
+- <div class="Commentary" id="Bible:1Tim.1.1-1Tim.1.4"> with a "Verses 1-4" h3
+- a paragraph opening with a bold reference, <p><b><a class="scripRef"
+  name="_Hos_8_1_8_4">Hos. 8:1-4</a></b> ...
+
+Text before the first heading (the chapter outline) becomes a segment for
+verse 0 of the chapter; a chapter commented on as a whole, without verse
+headings, becomes one segment covering the entire chapter. Segments are keyed by
+canonical verse keys taken from the anchors themselves, so they are placed
+correctly even where a page was saved under the wrong book folder.
+
+Segments are stored in SQLite as (start_key, end_key) rows with an R*Tree
+over the key ranges, so the commentary on any verse is found in O(log n),
+and with an FTS5 index over their headings and text, ranked by BM25, so
+the commentary can be searched by word, optionally within a passage:
+
+    python mhc_segments.py
+    python mhc_segments.py --lookup "Rom 8:28"
+    python mhc_segments.py --search covenant --within Genesis
+"""
+
+import os
+import re
+import sqlite3
+import argparse
+from html.parser import HTMLParser
+
+from search.cross_references import parse_osis
+from versification.canon import BOOK_NUMBERS, chapter_bounds, make_key, split_key
+from versification.references import format_range, parse_reference
+
+_ANCHOR_NAME = re.compile(r'^_(\w+?)_(\d+)_(\d+)_(\d+)_(\d+)$')
+_CHAPTER_TITLE = re.compile(r'(\d+)')
+_SPACES = re.compile(r'\s+')
+_QUERY_TERMS = re.compile(r'"([^"]*)"|([\w\']+\*?)')
+HIGHLIGHT_START, HIGHLIGHT_END = '\x02', '\x03'
+SNIPPET_TOKENS = 32
+
+SEGMENT_TABLES = '''
+    DROP TABLE IF EXISTS mhc_segments_fts;
+    DROP TABLE IF EXISTS mhc_segments;
+    DROP TABLE IF EXISTS mhc_segment_ranges;
+    CREATE TABLE mhc_segments (
+        id INTEGER PRIMARY KEY,
+        book INTEGER NOT NULL,
+        chapter INTEGER NOT NULL,
+        start_key INTEGER NOT NULL,
+        end_key INTEGER NOT NULL,
+        heading TEXT,
+        text TEXT NOT NULL
+    );
+    CREATE VIRTUAL TABLE mhc_segment_ranges USING rtree_i32(id, start_key, end_key);
+    CREATE VIRTUAL TABLE mhc_segments_fts USING fts5(
+        heading, text, content='mhc_segments', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    );
+'''
+
+
+def parse_anchor_name(name):
+    """Canonical key range of a scripRef anchor name like '_Hos_8_1_8_4', or None"""
+    match = _ANCHOR_NAME.match(name or '')
+    if not match or match.group(1) not in BOOK_NUMBERS:
+        return None
+    book = BOOK_NUMBERS[match.group(1)]
+    first_chapter, first_verse, last_chapter, last_verse = (int(part) for part in match.groups()[1:])
+    if not last_chapter:
+        last_chapter, last_verse = first_chapter, first_verse  # a single verse is written '_Song_1_1_0_0'
+    return make_key(book, first_chapter, first_verse), make_key(book, last_chapter, last_verse)
+
+
+def clean_paragraphs(parts):
+    """Join collected text, one paragraph per line, with whitespace collapsed"""
+    paragraphs = (_SPACES.sub(' ', paragraph).strip() for paragraph in ''.join(parts).split('\n'))
+    return '\n\n'.join(paragraph for paragraph in paragraphs if paragraph)
+
+
+class SegmentParser(HTMLParser):
+    """Collect the verse-headed segments of one chapter page in a single streaming pass"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.section = None  # CCEL section of the page, e.g. 'xlvi' in 'xlvi.i'
+        self.chapter_title = []
+        self.intro = []  # text before the first heading
+        self.segments = []  # [start_key, end_key, heading parts, text parts]
+        self.depth = 0  # divs open inside <div class="book-content">, including itself
+        self.tables = 0
+        self.target = None  # where data goes while inside an h2 or a heading
+        self.heading_end = None  # tag that closes the current heading
+        self.paragraph_start = False  # nothing but whitespace seen since <p>
+        self.bold_start = False  # ... and since <b> directly after it
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if not self.depth:
+            if tag == 'a' and attrs.get('id') == 'book_section_id':
+                self.section = (attrs.get('name') or '').split('.')[0] or None
+            elif tag == 'div' and 'book-content' in (attrs.get('class') or '').split():
+                self.depth = 1
+            return
+        bold_start, self.bold_start = self.bold_start, False
+        paragraph_start, self.paragraph_start = self.paragraph_start, False
+        if tag == 'div':
+            self.depth += 1
+            key_range = parse_osis(attrs['id'][6:]) if (attrs.get('id') or '').startswith('Bible:') else None
+            if key_range and 'Commentary' in (attrs.get('class') or '').split():
+                self.segments.append([key_range[0], key_range[1], [], []])
+        elif tag == 'h2':
+            self.target, self.heading_end = self.chapter_title, 'h2'
+        elif tag == 'h3' and self.segments and not ''.join(self.segments[-1][3]).strip():
+            self.target, self.heading_end = self.segments[-1][2], 'h3'
+        elif tag == 'table':
+            self.tables += 1
+        elif tag == 'p':
+            self.paragraph_start = True
+        elif tag == 'b' and paragraph_start:
+            self.bold_start = True
+        elif tag == 'a' and bold_start and attrs.get('class') == 'scripRef':
+            key_range = parse_anchor_name(attrs.get('name'))
+            if key_range:
+                self.segments.append([key_range[0], key_range[1], [], []])
+                self.target, self.heading_end = self.segments[-1][2], 'b'
+
+    def handle_startendtag(self, tag, attrs):
+        if self.depth:
+            self.paragraph_start = self.bold_start = False
+
+    def handle_endtag(self, tag):
+        if not self.depth:
+            return
+        if tag == self.heading_end:
+            self.target = self.heading_end = None
+        elif tag == 'div':
+            self.depth -= 1
+        elif tag == 'table':
+            self.tables = max(self.tables - 1, 0)
+        if tag == 'tr' or (tag == 'p' and not self.tables):
+            self.current().append('\n')
+        elif tag in ('p', 'td'):
+            self.current().append(' ')
+
+    def handle_data(self, data):
+        if not self.depth:
+            return
+        if data.strip():
+            self.paragraph_start = self.bold_start = False
+        if self.target is not None:
+            self.target.append(data)
+        else:
+            self.current().append(data)
+
+    def current(self):
+        return self.segments[-1][3] if self.segments else self.intro
+
+    def chapter(self):
+        match = _CHAPTER_TITLE.search(''.join(self.chapter_title))
+        return int(match.group(1)) if match else None
+
+
+def parse_page(html_content):
+    """(section, chapter number from the title, intro text, [(start_key, end_key, heading, text)])"""
+    parser = SegmentParser()
+    parser.feed(html_content)
+    parser.close()
+    segments = [(start_key, end_key, clean_paragraphs(heading), clean_paragraphs(text))
+                for start_key, end_key, heading, text in parser.segments]
+    return parser.section, parser.chapter(), clean_paragraphs(parser.intro), segments
+
+
+def build_segments(html_dir="commentary/mhc/html"):
+    """Segments of every chapter page, sorted by key range and without duplicates
+
+    Returns rows of (book, chapter, start_key, end_key, heading, text).
+    """
+    pages = []
+    for root, _, names in os.walk(html_dir):
+        for name in sorted(names):
+            if name.endswith('.html'):
+                with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                    pages.append(parse_page(f.read()))
+
+    # Pages without verse headings only know their CCEL section; learn its book from the others
+    section_books = {}
+    for section, _, _, segments in pages:
+        if section and segments:
+            section_books.setdefault(section, split_key(segments[0][0])[0])
+
+    rows = {}
+    for section, chapter, intro, segments in pages:
+        if segments:
+            book, chapter = split_key(segments[0][0])[:2]
+        elif section in section_books and chapter and intro:
+            book = section_books[section]
+        else:
+            continue  # an empty or unidentifiable page
+        if intro:
+            # An outline before verse headings belongs to verse 0; otherwise it is the whole commentary
+            first_key, last_key = chapter_bounds(book, chapter)
+            rows.setdefault((first_key, first_key if segments else last_key), (book, chapter, None, intro))
+        for start_key, end_key, heading, text in segments:
+            if text:
+                rows.setdefault((start_key, end_key), (split_key(start_key)[0], split_key(start_key)[1], heading, text))
+    return [(book, chapter, start_key, end_key, heading, text)
+            for (start_key, end_key), (book, chapter, heading, text) in sorted(rows.items())]
+
+
+def write_segments(database, rows):
+    """Replace the segment tables of ``database`` with ``rows``"""
+    conn = sqlite3.connect(database)
+    try:
+        conn.executescript(SEGMENT_TABLES)
+        conn.executemany(
+            "INSERT INTO mhc_segments (id, book, chapter, start_key, end_key, heading, text) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((segment_id, *row) for segment_id, row in enumerate(rows, 1)))
+        conn.execute("INSERT INTO mhc_segment_ranges (id, start_key, end_key) "
+                     "SELECT id, start_key, end_key FROM mhc_segments")
+        conn.execute("CREATE INDEX mhc_segments_start ON mhc_segments (start_key, end_key)")
+        conn.execute("INSERT INTO mhc_segments_fts (mhc_segments_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO mhc_segments_fts (mhc_segments_fts) VALUES ('optimize')")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def lookup(conn, first_key, last_key=None):
+    """Segments overlapping the canonical key range, in Bible order, via the R*Tree"""
+    last_key = first_key if last_key is None else last_key
+    return conn.execute(
+        "SELECT s.start_key, s.end_key, s.heading, s.text FROM mhc_segment_ranges r "
+        "JOIN mhc_segments s ON s.id = r.id WHERE r.start_key <= ? AND r.end_key >= ? "
+        "ORDER BY s.start_key, s.end_key", (last_key, first_key)).fetchall()
+
+
+def fts_query(query):
+    """FTS5 MATCH expression requiring every word and "quoted phrase" of ``query``; word* matches a prefix"""
+    parts = []
+    for phrase, word in _QUERY_TERMS.findall(query):
+        if phrase.strip():
+            parts.append(f'"{phrase}"')
+        elif word.rstrip('*'):
+            parts.append(f'"{word.rstrip("*")}"' + ('*' if word.endswith('*') else ''))
+    return ' '.join(parts)
+
+
+def marked_spans(marked):
+    """Text without the highlight markers, and the [start, end] offsets of the marked matches in it"""
+    parts, spans, position = [], [], 0
+    for i, part in enumerate(re.split(f'[{HIGHLIGHT_START}{HIGHLIGHT_END}]', marked)):
+        if i % 2:
+            spans.append([position, position + len(part)])
+        parts.append(part)
+        position += len(part)
+    return ''.join(parts), spans
+
+
+def search(conn, query, ranges=None, limit=10):
+    """Segments matching ``query`` best first by BM25, optionally within canonical key ``ranges``
+
+    Each result carries the character offsets of the matches in the segment
+    text (``highlights``) and in a short ``snippet`` of it.
+    """
+    expression = fts_query(query)
+    if not expression:
+        return []
+    where, params = '', [expression]
+    if ranges:
+        where = ' AND (' + ' OR '.join('(s.start_key <= ? AND s.end_key >= ?)' for _ in ranges) + ')'
+        params.extend(key for first_key, last_key in ranges for key in (last_key, first_key))
+    rows = conn.execute(
+        "SELECT s.start_key, s.end_key, s.heading, bm25(mhc_segments_fts, 0.5, 1.0) AS score, "
+        f"highlight(mhc_segments_fts, 1, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}'), "
+        f"snippet(mhc_segments_fts, 1, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '…', {SNIPPET_TOKENS}) "
+        "FROM mhc_segments_fts JOIN mhc_segments s ON s.id = mhc_segments_fts.rowid "
+        f"WHERE mhc_segments_fts MATCH ?{where} ORDER BY score LIMIT ?", (*params, limit)).fetchall()
+    results = []
+    for start_key, end_key, heading, score, marked_text, marked_snippet in rows:
+        text, highlights = marked_spans(marked_text)
+        snippet, snippet_highlights = marked_spans(marked_snippet)
+        results.append({
+            'start_key': start_key, 'end_key': end_key, 'reference': format_range(start_key, end_key),
+            'heading': heading, 'score': round(-score, 4), 'text': text, 'highlights': highlights,
+            'snippet': snippet, 'snippet_highlights': snippet_highlights,
+        })
+    return results
+
+
+def mark(text, spans, start='[', end=']'):
+    """``text`` with each span wrapped in ``start`` and ``end``"""
+    pieces, position = [], 0
+    for first, last in spans:
+        pieces.extend((text[position:first], start, text[first:last], end))
+        position = last
+    pieces.append(text[position:])
+    return ''.join(pieces)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split the MHC chapter pages into verse-anchored segments")
+    parser.add_argument('--html', default="commentary/mhc/html", help="<Book>/Chapter_N.html pages")
+    parser.add_argument('--database', default="commentary/mhc/mhc_books.db")
+    parser.add_argument('--lookup', metavar='REFERENCE', help="print the commentary on a reference instead of building")
+    parser.add_argument('--search', metavar='QUERY', help="print the best matching segments instead of building")
+    parser.add_argument('--within', metavar='REFERENCE', help="limit --search to a book or passage")
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.search:
+        conn = sqlite3.connect(args.database)
+        ranges = parse_reference(args.within) if args.within else None
+        for result in search(conn, args.search, ranges, args.limit):
+            print(f"== {result['reference']} ({result['score']}) ==\n"
+                  f"{mark(result['snippet'], result['snippet_highlights'])}\n")
+        conn.close()
+        return
+
+    if args.lookup:
+        conn = sqlite3.connect(args.database)
+        for first_key, last_key in parse_reference(args.lookup):
+            for start_key, end_key, heading, text in lookup(conn, first_key, last_key):
+                print(f"== {format_range(start_key, end_key)} ==\n{text}\n")
+        conn.close()
+        return
+
+    rows = build_segments(args.html)
+    write_segments(args.database, rows)
+    books = len({row[0] for row in rows})
+    chapters = len({(row[0], row[1]) for row in rows})
+    print(f"Wrote {len(rows)} segments for {chapters} chapters of {books} books to {args.database}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,17 @@ import os
 import json
 import sqlite3
 import csv
+import hashlib
 from bs4 import BeautifulSoup
 import re
 
+CACHE_VERSION = 1
+
 class MHCCDatabaseGenerator:
-    def __init__(self, input_dir="mhcc_commentary"):
+    def __init__(self, input_dir="mhcc_commentary", cache_file=None):
         self.input_dir = input_dir
+        # Extracted commentary per HTML file, reused while the file is unchanged
+        self.cache_file = cache_file or os.path.join(input_dir, ".extraction_cache.json")
         self.book_mapping = {
             'Genesis': 'Genesis', 'Exodus': 'Exodus', 'Leviticus': 'Leviticus', 
             'Numbers': 'Numbers', 'Deuteronomy': 'Deuteronomy', 'Joshua': 'Joshua',
@@ -64,8 +69,62 @@ class MHCCDatabaseGenerator:
             'commentary': '\n\n'.join(paragraphs)
         }
 
-    def generate_sqlite_database(self, output_file="mhcc.db"):
+    def load_cache(self):
+        """Load cached extractions keyed by filename, or an empty cache"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if cache.get('version') != CACHE_VERSION:
+            return {}
+        return cache.get('files', {})
+
+    def save_cache(self, files):
+        """Write the cache atomically so an interrupted run cannot corrupt it"""
+        temp_file = self.cache_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'files': files}, f, ensure_ascii=False)
+        os.replace(temp_file, self.cache_file)
+
+    def extract_all(self):
+        """Extract every HTML file once, in filename order, reusing cached results
+
+        A file is re-parsed only when its modification time or size changed and
+        its SHA-256 no longer matches the cached one (a touched but identical
+        file is not parsed again). Returns a list of {'book', 'filename',
+        'commentary'} dicts; files without commentary are left out.
+        """
+        cached = self.load_cache()
+        files = {}
+        commentaries = []
+        parsed = 0
+        for filename in sorted(os.listdir(self.input_dir)):
+            if not filename.endswith('.html'):
+                continue
+            filepath = os.path.join(self.input_dir, filename)
+            stat = os.stat(filepath)
+            entry = cached.get(filename)
+            if entry is None or entry['mtime'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+                with open(filepath, 'rb') as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+                if entry is None or entry['sha256'] != digest:
+                    entry = {'sha256': digest, 'data': self.extract_commentary_from_file(filepath)}
+                    parsed += 1
+                entry['mtime'] = stat.st_mtime_ns
+                entry['size'] = stat.st_size
+            files[filename] = entry
+            if entry['data']:
+                commentaries.append(entry['data'])
+        if files != cached:
+            self.save_cache(files)
+        print(f"Extracted {len(commentaries)} commentaries ({parsed} files parsed, {len(files) - parsed} from cache)")
+        return commentaries
+
+    def generate_sqlite_database(self, output_file="mhcc.db", commentaries=None):
         """Generate SQLite database"""
+        if commentaries is None:
+            commentaries = self.extract_all()
         conn = sqlite3.connect(output_file)
         cursor = conn.cursor()
         
@@ -87,66 +146,48 @@ class MHCCDatabaseGenerator:
             )
         ''')
         
-        # Process files
-        book_id = 1
-        for filename in sorted(os.listdir(self.input_dir)):
-            if filename.endswith('.html'):
-                filepath = os.path.join(self.input_dir, filename)
-                commentary_data = self.extract_commentary_from_file(filepath)
-                
-                if commentary_data:
-                    # Insert book
-                    cursor.execute(
-                        "INSERT INTO mhcc_books (id, name, filename) VALUES (?, ?, ?)",
-                        (book_id, commentary_data['book'], filename)
-                    )
-                    
-                    # Insert commentary
-                    cursor.execute(
-                        "INSERT INTO mhcc_commentary (book_id, commentary) VALUES (?, ?)",
-                        (book_id, commentary_data['commentary'])
-                    )
-                    
-                    book_id += 1
-                    print(f"Added to database: {commentary_data['book']}")
+        # Insert extracted commentaries
+        for book_id, commentary_data in enumerate(commentaries, 1):
+            # Insert book
+            cursor.execute(
+                "INSERT INTO mhcc_books (id, name, filename) VALUES (?, ?, ?)",
+                (book_id, commentary_data['book'], commentary_data['filename'])
+            )
+            
+            # Insert commentary
+            cursor.execute(
+                "INSERT INTO mhcc_commentary (book_id, commentary) VALUES (?, ?)",
+                (book_id, commentary_data['commentary'])
+            )
+            
+            print(f"Added to database: {commentary_data['book']}")
         
         conn.commit()
         conn.close()
         print(f"SQLite database created: {output_file}")
 
-    def generate_json_format(self, output_file="mhcc.json"):
+    def generate_json_format(self, output_file="mhcc.json", commentaries=None):
         """Generate JSON format"""
-        commentaries = []
-        
-        for filename in sorted(os.listdir(self.input_dir)):
-            if filename.endswith('.html'):
-                filepath = os.path.join(self.input_dir, filename)
-                commentary_data = self.extract_commentary_from_file(filepath)
-                
-                if commentary_data:
-                    commentaries.append({
-                        'book': commentary_data['book'],
-                        'commentary': commentary_data['commentary']
-                    })
+        if commentaries is None:
+            commentaries = self.extract_all()
         
         with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(commentaries, f, indent=2, ensure_ascii=False)
+            json.dump([{'book': commentary_data['book'], 'commentary': commentary_data['commentary']}
+                       for commentary_data in commentaries], f, indent=2, ensure_ascii=False)
         
         print(f"JSON file created: {output_file}")
 
-    def generate_csv_format(self, output_file="mhcc.csv"):
+    def generate_csv_format(self, output_file="mhcc.csv", commentaries=None):
         """Generate CSV format"""
+        if commentaries is None:
+            commentaries = self.extract_all()
+        
         with open(output_file, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
             writer.writerow(['book', 'commentary'])
             
-            for filename in sorted(os.listdir(self.input_dir)):
-                if filename.endswith('.html'):
-                    filepath = os.path.join(self.input_dir, filename)
-                    commentary_data = self.extract_commentary_from_file(filepath)
-                    
-                    if commentary_data:
-                        writer.writerow([commentary_data['book'], commentary_data['commentary']])
+            for commentary_data in commentaries:
+                writer.writerow([commentary_data['book'], commentary_data['commentary']])
         
         print(f"CSV file created: {output_file}")
 
@@ -162,10 +203,11 @@ class MHCCDatabaseGenerator:
         formats_dir = os.path.join("formats", "commentary")
         os.makedirs(formats_dir, exist_ok=True)
         
-        # Generate all formats
-        self.generate_sqlite_database(os.path.join(formats_dir, "mhcc.db"))
-        self.generate_json_format(os.path.join(formats_dir, "mhcc.json"))
-        self.generate_csv_format(os.path.join(formats_dir, "mhcc.csv"))
+        # Parse the HTML once; every format is written from the same extraction
+        commentaries = self.extract_all()
+        self.generate_sqlite_database(os.path.join(formats_dir, "mhcc.db"), commentaries)
+        self.generate_json_format(os.path.join(formats_dir, "mhcc.json"), commentaries)
+        self.generate_csv_format(os.path.join(formats_dir, "mhcc.csv"), commentaries)
         
         print(f"\nAll formats generated in '{formats_dir}' directory")
 
@@ -1,69 +1,189 @@
 import os
-from bs4 import BeautifulSoup, NavigableString
+import codecs
+from html import unescape
+from html.parser import HTMLParser
+
+CHUNK_SIZE = 64 * 1024
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source',
+                 'track', 'wbr'}
+TITLE_BREAK = '\0'  # marks a tag inside a book title, where get_text(strip=True) would strip
+
+
+def detect_encoding(input_file_path):
+    """'utf-8' if the whole file decodes as UTF-8, else 'latin-1', checked a chunk at a time"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        with open(input_file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        # These old files can have mixed encodings
+        return 'latin-1'
+    return 'utf-8'
+
+
+def book_filename(output_directory, book_name):
+    # Sanitize filename
+    safe_filename = "".join([c for c in book_name if c.isalnum() or c in (' ', '_')]).rstrip()
+    return os.path.join(output_directory, f"{safe_filename}.html")
+
+
+class BookSplitter(HTMLParser):
+    """Stream the children of <div class="Section1"> into one HTML file per book
+
+    A book starts at each <p class="div1"> directly inside Section1 and runs
+    to the next one. Markup is copied through as it is parsed, so only the
+    open-element stack, the <head> and the title paragraph being read are
+    held in memory.
+    """
+
+    def __init__(self, output_directory):
+        super().__init__(convert_charrefs=False)
+        self.output_directory = output_directory
+        self.stack = []  # names of the open elements
+        self.head = None
+        self.head_parts = None  # markup of <head> while reading it
+        self.section_depth = None  # stack depth of Section1's children while inside it
+        self.found_section = False
+        self.title = None  # text of the <p class="div1"> being read
+        self.pending = None  # its markup, until the title names the output file
+        self.out = None
+        self.books = []
+
+    def emit(self, markup):
+        if self.head_parts is not None:
+            self.head_parts.append(markup)
+        elif self.pending is not None:
+            self.pending.append(markup)
+        elif self.out is not None:
+            self.out.write(markup)
+
+    def handle_starttag(self, tag, attrs):
+        markup = self.get_starttag_text()
+        classes = (dict(attrs).get('class') or '').split()
+        if self.section_depth is None:
+            if tag == 'head' and self.head is None:
+                self.head_parts = []
+            elif tag == 'div' and 'Section1' in classes and self.head_parts is None:
+                self.stack.append(tag)
+                self.section_depth = len(self.stack)
+                self.found_section = True
+                return
+        elif len(self.stack) == self.section_depth and tag == 'p' and classes == ['div1']:
+            # The start of a new book is identified by a <p class="div1"> tag
+            self.close_book()
+            self.title = []
+            self.pending = []
+        elif self.title is not None:
+            self.title.append(TITLE_BREAK)
+        self.emit(markup)
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.emit(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if tag not in self.stack:
+            return  # a stray end tag, which the soup dropped as well
+        while self.stack.pop() != tag:
+            pass
+        if self.section_depth is not None and len(self.stack) < self.section_depth:
+            self.close_book()
+            self.section_depth = None
+            return
+        self.emit(f"</{tag}>")
+        if tag == 'head' and self.head_parts is not None:
+            self.head = ''.join(self.head_parts)
+            self.head_parts = None
+        elif self.pending is not None and len(self.stack) == self.section_depth:
+            self.open_book()
+        elif self.title is not None:
+            self.title.append(TITLE_BREAK)
+
+    def handle_data(self, data):
+        if self.title is not None:
+            self.title.append(data)
+        elif self.section_depth is not None and len(self.stack) == self.section_depth and not data.strip():
+            return  # whitespace between the children of Section1
+        self.emit(data)
+
+    def handle_entityref(self, name):
+        self.handle_data(f"&{name};")
+
+    def handle_charref(self, name):
+        self.handle_data(f"&#{name};")
+
+    def handle_comment(self, data):
+        self.emit(f"<!--{data}-->")
+
+    def handle_decl(self, decl):
+        self.emit(f"<!{decl}>")
+
+    def handle_pi(self, data):
+        self.emit(f"<?{data}>")
+
+    def unknown_decl(self, data):
+        self.emit(f"<![{data}]>")
+
+    def open_book(self):
+        parts = ''.join(self.title).split(TITLE_BREAK)
+        book_name = ''.join(unescape(part).strip() for part in parts)
+        head = self.head or "<head><title>Content</title></head>"
+        self.out = open(book_filename(self.output_directory, book_name), 'w', encoding='utf-8')
+        self.out.write(f"<html>\n{head}\n<body>\n")
+        self.out.write(''.join(self.pending))
+        self.books.append(self.out.name)
+        self.title = self.pending = None
+
+    def close_book(self):
+        if self.pending is not None:
+            self.open_book()  # the document ended inside a title
+        if self.out is not None:
+            self.out.write("\n</body>\n</html>")
+            self.out.close()
+            print(f"Extracted and saved: {self.out.name}")
+            self.out = None
+
+    def close(self):
+        super().close()
+        self.close_book()
+
 
 def extract_books_from_mhcc(input_file_path: str, output_directory: str):
     """
     Parses the Matthew Henry's Concise Commentary HTML file and splits it
     into separate HTML files for each book of the Bible.
 
+    The file is read and parsed a chunk at a time and each book is written
+    out as it is reached, so memory use does not grow with the document.
+
     Args:
         input_file_path (str): The path to the mhcc.doc file.
         output_directory (str): The directory where the individual book HTML files will be saved.
     """
-    try:
-        with open(input_file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-    except UnicodeDecodeError:
-        # Fallback to 'latin-1' if 'utf-8' fails, as these old files can have mixed encodings.
-        with open(input_file_path, 'r', encoding='latin-1') as f:
-            content = f.read()
-
-    soup = BeautifulSoup(content, 'html.parser')
+    encoding = detect_encoding(input_file_path)
 
     # Create the output directory if it doesn't exist
     os.makedirs(output_directory, exist_ok=True)
     print(f"Output directory '{output_directory}' created or already exists.")
 
-    # Extract the head content to use as a template for new files
-    head_content = soup.head.prettify() if soup.head else "<head><title>Content</title></head>"
+    splitter = BookSplitter(output_directory)
+    try:
+        with open(input_file_path, 'r', encoding=encoding) as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), ''):
+                splitter.feed(chunk)
+        splitter.close()
+    finally:
+        if splitter.out is not None:
+            splitter.out.close()
 
-    # Find the main content container
-    main_content_div = soup.find('div', class_='Section1')
-    if not main_content_div:
+    if not splitter.found_section:
         print("Error: Could not find the main content <div class='Section1'>.")
         return
 
-    current_book_name = None
-    current_book_html = []
-    books_extracted = 0
-
-    for element in main_content_div.children:
-        # The start of a new book is identified by a <p class="div1"> tag
-        if element.name == 'p' and element.get('class') == ['div1']:
-            # If we were already processing a book, save it first.
-            if current_book_name and current_book_html:
-                # Sanitize filename
-                safe_filename = "".join([c for c in current_book_name if c.isalnum() or c in (' ', '_')]).rstrip()
-                output_filename = os.path.join(output_directory, f"{safe_filename}.html")
-                
-                # Create the full HTML for the book
-                book_body = "".join(str(tag) for tag in current_book_html)
-                final_html = f"<html>\n{head_content}\n<body>\n{book_body}\n</body>\n</html>"
-                
-                with open(output_filename, 'w', encoding='utf-8') as f_out:
-                    f_out.write(final_html)
-                print(f"Extracted and saved: {output_filename}")
-                books_extracted += 1
-
-            # Start the next book
-            current_book_name = element.get_text(strip=True)
-            current_book_html = [str(element)] # Start with the title tag
-        elif current_book_name:
-            # Add content to the current book
-            if not (isinstance(element, NavigableString) and element.strip() == ''):
-                current_book_html.append(str(element))
-
-    print(f"\nExtraction complete. Total books extracted: {books_extracted}")
+    print(f"\nExtraction complete. Total books extracted: {len(splitter.books)}")
 
 if __name__ == "__main__":
     # Define the path to your local mhcc.doc file
@@ -75,4 +195,4 @@ if __name__ == "__main__":
     if os.path.exists(source_file):
         extract_books_from_mhcc(source_file, output_folder)
     else:
-        print(f"Error: Source file not found at '{source_file}'")
\ No newline at end of file
+        print(f"Error: Source file not found at '{source_file}'")
@@ -1,6 +1,16 @@
 import os
+import sys
 import json
 
+# Add the parent directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# The coverage matrix is optional: without NumPy the list is built without verse counts
+try:
+    from generators.coverage.coverage_matrix import CoverageMatrix
+except ImportError:
+    CoverageMatrix = None
+
 def read_file(file_path):
     with open(file_path, 'r', encoding='utf-8') as file:
         return file.read()
@@ -18,8 +28,15 @@ def get_translation_title(translation_dir):
                     return line.strip("# ").strip()
     return "Unknown Title"
 
+def load_coverage():
+    coverage_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'formats', 'coverage'))
+    if CoverageMatrix is None or not os.path.isdir(coverage_dir):
+        return None
+    return CoverageMatrix.load(coverage_dir)
+
 def generate_translation_list(source_dir, output_file):
     translations = []
+    coverage = load_coverage()
 
     # Loop through all languages
     for language in os.listdir(source_dir):
@@ -32,7 +49,10 @@ def generate_translation_list(source_dir, output_file):
             translation_dir = os.path.join(language_dir, translation)
             if os.path.isdir(translation_dir):
                 title = get_translation_title(translation_dir)
-                translations.append(f"- **{translation} ({language})**: {title}")
+                entry = f"- **{translation} ({language})**: {title}"
+                if coverage is not None and coverage.has_translation(translation):
+                    entry += f" ({coverage.verse_count(translation):,} verses)"
+                translations.append(entry)
     
     translations.sort()
     translation_count = len(translations)
@@ -12,6 +12,9 @@ from generators.text.csv_generator import CSVGenerator
 from generators.text.plaintext_generator import TextGenerator
 from generators.text.yaml_generator import YAMLGenerator
 from generators.text.markdown_generator import MDGenerator
+from generators.coverage.coverage_generator import CoverageGenerator
+from generators.static.static_generator import StaticGenerator
+from generators.search.search_generator import SearchGenerator
 
 def create_format_directories(format_directory):
     formats = ['sql', 'sqlite', 'csv', 'txt', 'json', 'yaml', 'md']
@@ -70,6 +73,18 @@ def generate_all_versions():
                 md_generator = MDGenerator(source_directory, format_directory)
                 md_generator.generate(language, translation)
 
+                # Update this translation's row of the coverage matrix
+                coverage_generator = CoverageGenerator(source_directory, format_directory)
+                coverage_generator.generate(language, translation)
+
+                # Refresh the static API tree (only changed chapter shards are rewritten)
+                static_generator = StaticGenerator(source_directory, format_directory)
+                static_generator.generate(language, translation)
+
+                # Build the verse search index
+                search_generator = SearchGenerator(source_directory, format_directory)
+                search_generator.generate(language, translation)
+
                 print(f"Completed generating formats for {translation} in {language}")
             except Exception as e:
                 print(f"Error generating formats for {translation} in {language}: {e}")
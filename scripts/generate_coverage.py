@@ -0,0 +1,33 @@
+import sys
+import os
+
+# Check for NumPy dependency
+try:
+    import numpy
+except ImportError:
+    print("NumPy is not installed. Please install it using the following command:")
+    print("pip install numpy")
+    sys.exit(1)
+
+# Add the parent directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from generators.coverage.coverage_generator import CoverageGenerator
+
+def main():
+    # Set base directories relative to the script location
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    source_directory = os.path.join(base_dir, 'sources')
+    format_directory = os.path.join(base_dir, 'formats')
+
+    coverage_generator = CoverageGenerator(source_directory, format_directory)
+
+    # Rebuild a single translation when one is named, otherwise rebuild everything
+    if len(sys.argv) == 3:
+        language, translation = sys.argv[1], sys.argv[2]
+        coverage_generator.generate(language, translation)
+    else:
+        coverage_generator.generate_all()
+
+if __name__ == "__main__":
+    main()
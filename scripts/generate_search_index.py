@@ -0,0 +1,33 @@
+import sys
+import os
+
+# Check for NumPy dependency
+try:
+    import numpy
+except ImportError:
+    print("NumPy is not installed. Please install it using the following command:")
+    print("pip install numpy")
+    sys.exit(1)
+
+# Add the parent directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from generators.search.search_generator import SearchGenerator
+
+def main():
+    # Set base directories relative to the script location
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    source_directory = os.path.join(base_dir, 'sources')
+    format_directory = os.path.join(base_dir, 'formats')
+
+    search_generator = SearchGenerator(source_directory, format_directory)
+
+    # Index a single translation when one is named, otherwise every translation
+    if len(sys.argv) == 3:
+        language, translation = sys.argv[1], sys.argv[2]
+        search_generator.generate(language, translation)
+    else:
+        search_generator.generate_all()
+
+if __name__ == "__main__":
+    main()
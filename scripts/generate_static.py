@@ -0,0 +1,25 @@
+import sys
+import os
+
+# Add the parent directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from generators.static.static_generator import StaticGenerator
+
+def main():
+    # Set base directories relative to the script location
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    source_directory = os.path.join(base_dir, 'sources')
+    format_directory = os.path.join(base_dir, 'formats')
+
+    static_generator = StaticGenerator(source_directory, format_directory)
+
+    # Refresh a single translation when one is named, otherwise the whole tree
+    if len(sys.argv) == 3:
+        language, translation = sys.argv[1], sys.argv[2]
+        static_generator.generate(language, translation)
+    else:
+        static_generator.generate_all()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import asyncio
+import glob
+import os
+import sys
+
+# Add the parent directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.server import serve
+
+def main():
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    sqlite_directory = os.path.join(base_dir, 'formats', 'sqlite')
+    source_directory = os.path.join(base_dir, 'sources')
+    search_directory = os.path.join(base_dir, 'formats', 'search')
+
+    parser = argparse.ArgumentParser(description="Serve the SQLite Bible databases over a read-only HTTP API")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on")
+    parser.add_argument('--port', type=int, default=8000, help="Port to listen on (0 picks a free port)")
+    parser.add_argument('--workers', type=int, default=None, help="Threads used for SQLite queries")
+    parser.add_argument('--cache-mb', type=int, default=64, help="Memory budget for cached chapter responses")
+    parser.add_argument('--sqlite-directory', default=sqlite_directory, help="Folder containing <translation>.db files")
+    parser.add_argument('--source-directory', default=source_directory, help="Sources folder, used to read each translation's versification")
+    parser.add_argument('--search-directory', default=search_directory, help="Folder containing <translation>.idx search indexes")
+    parser.add_argument('--cross-references', nargs='*', default=None,
+                        help="OpenBible cross-reference files used to boost search ranking (default: sources/extras/cross_references*.txt)")
+    parser.add_argument('--boost', type=float, default=0.5, help="Default weight of the cross-reference boost (0 disables it)")
+    parser.add_argument('--regex-timeout', type=float, default=2.0, help="Seconds a /search/regex search may run before it is killed")
+    args = parser.parse_args()
+    cross_references = args.cross_references
+    if cross_references is None:
+        cross_references = sorted(glob.glob(os.path.join(args.source_directory, 'extras', 'cross_references*.txt')))
+
+    try:
+        asyncio.run(serve(args.sqlite_directory, args.source_directory, args.host, args.port, args.workers,
+                          args.cache_mb * 1024 * 1024, args.search_directory, cross_references, args.boost,
+                          args.regex_timeout))
+    except KeyboardInterrupt:
+        print("Server stopped")
+
+if __name__ == "__main__":
+    main()
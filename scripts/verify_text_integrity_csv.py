@@ -2,6 +2,12 @@ import os
 import json
 import csv
 import unicodedata
+import sys
+
+# Add the parent directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from versification.alignment import books_from_chapter_map, compare_translations
 
 def normalize_text(text):
     # Replace common characters
@@ -66,43 +72,8 @@ def verify_text_integrity_csv(language, translation):
 
     csv_data = load_csv(csv_path)
 
-    differences = []
-    source_books = source_data.get('books', [])
-    
-    for source_book in source_books:
-        book_name = source_book['name']
-        if book_name not in csv_data:
-            differences.append(f"Book '{book_name}' not found in CSV data.")
-            continue
-
-        source_chapters = source_book.get('chapters', [])
-        csv_chapters = csv_data[book_name]
-
-        if len(source_chapters) != len(csv_chapters):
-            differences.append(f"Number of chapters in book '{book_name}' mismatch: {len(source_chapters)} (source) vs {len(csv_chapters)} (CSV)")
-
-        for source_chapter in source_chapters:
-            chapter_number = source_chapter['chapter']
-            if chapter_number not in csv_chapters:
-                differences.append(f"Chapter '{chapter_number}' in book '{book_name}' not found in CSV data.")
-                continue
-
-            source_verses = source_chapter.get('verses', [])
-            csv_verses = csv_chapters[chapter_number]
-
-            if len(source_verses) != len(csv_verses):
-                differences.append(f"Number of verses in chapter '{chapter_number}' of book '{book_name}' mismatch: {len(source_verses)} (source) vs {len(csv_verses)} (CSV)")
-
-            for source_verse, csv_verse in zip(source_verses, csv_verses):
-                if source_verse['verse'] != csv_verse['verse']:
-                    differences.append(f"Verse number mismatch in chapter '{chapter_number}' of book '{book_name}': {source_verse['verse']} (source) vs {csv_verse['verse']} (CSV)")
-
-                # Normalize text for comparison
-                source_text = normalize_text(source_verse['text'])
-                csv_text = normalize_text(csv_verse['text'])
-
-                if source_text != csv_text:
-                    differences.append(f"Verse text mismatch in chapter '{chapter_number}' of book '{book_name}':\n{source_text} (source) vs\n{csv_text} (CSV)")
+    # Index both sides by book, chapter and verse so one missing verse does not shift the rest
+    differences = compare_translations(source_data, books_from_chapter_map(csv_data), "CSV", normalize=normalize_text)
 
     report_path = f"text_integrity_check_csv.txt"
     with open(report_path, 'w', encoding='utf-8') as report_file:
@@ -1,6 +1,12 @@
 import os
 import json
 import unicodedata
+import sys
+
+# Add the parent directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from versification.alignment import compare_translations
 
 def normalize_text(text):
     # Replace common characters
@@ -45,43 +51,8 @@ def verify_text_integrity_json(language, translation):
 
     target_data = load_json(target_json_path)
 
-    differences = []
-    source_books = source_data.get('books', [])
-    target_books = target_data.get('books', [])
-
-    if len(source_books) != len(target_books):
-        differences.append(f"Number of books mismatch: {len(source_books)} (source) vs {len(target_books)} (target)")
-
-    for source_book, target_book in zip(source_books, target_books):
-        if source_book['name'] != target_book['name']:
-            differences.append(f"Book name mismatch: {source_book['name']} (source) vs {target_book['name']} (target)")
-
-        source_chapters = source_book.get('chapters', [])
-        target_chapters = target_book.get('chapters', [])
-
-        if len(source_chapters) != len(target_chapters):
-            differences.append(f"Number of chapters in book '{source_book['name']}' mismatch: {len(source_chapters)} (source) vs {len(target_chapters)} (target)")
-
-        for source_chapter, target_chapter in zip(source_chapters, target_chapters):
-            if source_chapter['chapter'] != target_chapter['chapter']:
-                differences.append(f"Chapter number mismatch in book '{source_book['name']}': {source_chapter['chapter']} (source) vs {target_chapter['chapter']} (target)")
-
-            source_verses = source_chapter.get('verses', [])
-            target_verses = target_chapter.get('verses', [])
-
-            if len(source_verses) != len(target_verses):
-                differences.append(f"Number of verses in chapter '{source_chapter['chapter']}' of book '{source_book['name']}' mismatch: {len(source_verses)} (source) vs {len(target_verses)} (target)")
-
-            for source_verse, target_verse in zip(source_verses, target_verses):
-                if source_verse['verse'] != target_verse['verse']:
-                    differences.append(f"Verse number mismatch in chapter '{source_chapter['chapter']}' of book '{source_book['name']}': {source_verse['verse']} (source) vs {target_verse['verse']} (target)")
-
-                # Normalize text for comparison
-                source_text = normalize_text(source_verse['text'])
-                target_text = normalize_text(target_verse['text'])
-
-                if source_text != target_text:
-                    differences.append(f"Verse text mismatch in chapter '{source_chapter['chapter']}' of book '{source_book['name']}':\n{source_text} (source) vs\n{target_text} (target)")
+    # Index both sides by book, chapter and verse so one missing verse does not shift the rest
+    differences = compare_translations(source_data, target_data, "target", normalize=normalize_text)
 
     report_path = f"text_integrity_check_json.txt"
     with open(report_path, 'w', encoding='utf-8') as report_file:
@@ -2,6 +2,12 @@ import os
 import json
 import re
 import unicodedata
+import sys
+
+# Add the parent directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from versification.alignment import books_from_chapter_map, compare_translations
 
 def normalize_text(text):
     # Replace common characters
@@ -76,43 +82,8 @@ def verify_text_integrity_markdown(language, translation):
 
     markdown_data = load_markdown(markdown_path)
 
-    differences = []
-    source_books = source_data.get('books', [])
-    
-    for source_book in source_books:
-        book_name = source_book['name']
-        if book_name not in markdown_data:
-            differences.append(f"Book '{book_name}' not found in Markdown data.")
-            continue
-
-        source_chapters = source_book.get('chapters', [])
-        markdown_chapters = markdown_data[book_name]
-
-        if len(source_chapters) != len(markdown_chapters):
-            differences.append(f"Number of chapters in book '{book_name}' mismatch: {len(source_chapters)} (source) vs {len(markdown_chapters)} (Markdown)")
-
-        for source_chapter in source_chapters:
-            chapter_number = source_chapter['chapter']
-            if chapter_number not in markdown_chapters:
-                differences.append(f"Chapter '{chapter_number}' in book '{book_name}' not found in Markdown data.")
-                continue
-
-            source_verses = source_chapter.get('verses', [])
-            markdown_verses = markdown_chapters[chapter_number]
-
-            if len(source_verses) != len(markdown_verses):
-                differences.append(f"Number of verses in chapter '{chapter_number}' of book '{book_name}' mismatch: {len(source_verses)} (source) vs {len(markdown_verses)} (Markdown)")
-
-            for source_verse, markdown_verse in zip(source_verses, markdown_verses):
-                if source_verse['verse'] != markdown_verse['verse']:
-                    differences.append(f"Verse number mismatch in chapter '{chapter_number}' of book '{book_name}': {source_verse['verse']} (source) vs {markdown_verse['verse']} (Markdown)")
-
-                # Normalize text for comparison
-                source_text = normalize_text(source_verse['text'])
-                markdown_text = normalize_text(markdown_verse['text'])
-
-                if source_text != markdown_text:
-                    differences.append(f"Verse text mismatch in chapter '{chapter_number}' of book '{book_name}':\n{source_text} (source) vs\n{markdown_text} (Markdown)")
+    # Index both sides by book, chapter and verse so one missing verse does not shift the rest
+    differences = compare_translations(source_data, books_from_chapter_map(markdown_data), "Markdown", normalize=normalize_text)
 
     report_path = f"text_integrity_check_markdown.txt"
     with open(report_path, 'w', encoding='utf-8') as report_file:
@@ -3,6 +3,12 @@ import json
 import mysql.connector
 import unicodedata
 from mysql.connector import Error
+import sys
+
+# Add the parent directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from versification.alignment import compare_translations
 
 def normalize_text(text):
     # Replace common characters
@@ -80,43 +86,8 @@ def verify_text_integrity_mysql(language, translation, db_host, db_name, db_user
             cursor = connection.cursor()
             mysql_data = fetch_mysql_data(cursor, translation)
 
-            differences = []
-            source_books = source_data.get('books', [])
-            mysql_books = mysql_data.get('books', [])
-
-            if len(source_books) != len(mysql_books):
-                differences.append(f"Number of books mismatch: {len(source_books)} (source) vs {len(mysql_books)} (MySQL)")
-
-            for source_book, mysql_book in zip(source_books, mysql_books):
-                if source_book['name'] != mysql_book['name']:
-                    differences.append(f"Book name mismatch: {source_book['name']} (source) vs {mysql_book['name']} (MySQL)")
-
-                source_chapters = source_book.get('chapters', [])
-                mysql_chapters = mysql_book.get('chapters', [])
-
-                if len(source_chapters) != len(mysql_chapters):
-                    differences.append(f"Number of chapters in book '{source_book['name']}' mismatch: {len(source_chapters)} (source) vs {len(mysql_chapters)} (MySQL)")
-
-                for source_chapter, mysql_chapter in zip(source_chapters, mysql_chapters):
-                    if source_chapter['chapter'] != mysql_chapter['chapter']:
-                        differences.append(f"Chapter number mismatch in book '{source_book['name']}': {source_chapter['chapter']} (source) vs {mysql_chapter['chapter']} (MySQL)")
-
-                    source_verses = source_chapter.get('verses', [])
-                    mysql_verses = mysql_chapter.get('verses', [])
-
-                    if len(source_verses) != len(mysql_verses):
-                        differences.append(f"Number of verses in chapter '{source_chapter['chapter']}' of book '{source_book['name']}' mismatch: {len(source_verses)} (source) vs {len(mysql_verses)} (MySQL)")
-
-                    for source_verse, mysql_verse in zip(source_verses, mysql_verses):
-                        if source_verse['verse'] != mysql_verse['verse']:
-                            differences.append(f"Verse number mismatch in chapter '{source_chapter['chapter']}' of book '{source_book['name']}': {source_verse['verse']} (source) vs {mysql_verse['verse']} (MySQL)")
-
-                        # Normalize text for comparison
-                        source_text = normalize_text(source_verse['text'])
-                        mysql_text = normalize_text(mysql_verse['text'])
-
-                        if source_text != mysql_text:
-                            differences.append(f"Verse text mismatch in chapter '{source_chapter['chapter']}' of book '{source_book['name']}':\n{source_text} (source) vs\n{mysql_text} (MySQL)")
+            # Index both sides by book, chapter and verse so one missing verse does not shift the rest
+            differences = compare_translations(source_data, mysql_data, "MySQL", normalize=normalize_text)
 
             report_path = f"text_integrity_check_mysql.txt"
             with open(report_path, 'w', encoding='utf-8') as report_file:
@@ -2,6 +2,12 @@ import os
 import json
 import re
 import unicodedata
+import sys
+
+# Add the parent directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from versification.alignment import books_from_chapter_map, compare_translations
 
 def normalize_text(text):
     # Replace common characters
@@ -72,43 +78,8 @@ def verify_text_integrity_txt(language, translation):
 
     txt_data = load_txt(txt_path)
 
-    differences = []
-    source_books = source_data.get('books', [])
-    
-    for source_book in source_books:
-        book_name = source_book['name']
-        if book_name not in txt_data:
-            differences.append(f"Book '{book_name}' not found in TXT data.")
-            continue
-
-        source_chapters = source_book.get('chapters', [])
-        txt_chapters = txt_data[book_name]
-
-        if len(source_chapters) != len(txt_chapters):
-            differences.append(f"Number of chapters in book '{book_name}' mismatch: {len(source_chapters)} (source) vs {len(txt_chapters)} (TXT)")
-
-        for source_chapter in source_chapters:
-            chapter_number = source_chapter['chapter']
-            if chapter_number not in txt_chapters:
-                differences.append(f"Chapter '{chapter_number}' in book '{book_name}' not found in TXT data.")
-                continue
-
-            source_verses = source_chapter.get('verses', [])
-            txt_verses = txt_chapters[chapter_number]
-
-            if len(source_verses) != len(txt_verses):
-                differences.append(f"Number of verses in chapter '{chapter_number}' of book '{book_name}' mismatch: {len(source_verses)} (source) vs {len(txt_verses)} (TXT)")
-
-            for source_verse, txt_verse in zip(source_verses, txt_verses):
-                if source_verse['verse'] != txt_verse['verse']:
-                    differences.append(f"Verse number mismatch in chapter '{chapter_number}' of book '{book_name}': {source_verse['verse']} (source) vs {txt_verse['verse']} (TXT)")
-
-                # Normalize text for comparison
-                source_text = normalize_text(source_verse['text']).strip()
-                txt_text = normalize_text(txt_verse['text']).strip()
-
-                if source_text != txt_text:
-                    differences.append(f"Verse text mismatch in chapter '{chapter_number}' of book '{book_name}':\n{source_text} (source) vs\n{txt_text} (TXT)")
+    # Index both sides by book, chapter and verse so one missing verse does not shift the rest
+    differences = compare_translations(source_data, books_from_chapter_map(txt_data), "TXT", normalize=normalize_text)
 
     report_path = f"text_integrity_check_txt.txt"
     with open(report_path, 'w', encoding='utf-8') as report_file:
@@ -2,6 +2,12 @@ import os
 import json
 import yaml
 import unicodedata
+import sys
+
+# Add the parent directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from versification.alignment import compare_translations
 
 def normalize_text(text):
     # Replace common characters
@@ -50,43 +56,8 @@ def verify_text_integrity_yaml(language, translation):
 
     yaml_data = load_yaml(yaml_path)
 
-    differences = []
-    source_books = source_data.get('books', [])
-    yaml_books = yaml_data.get('books', [])
-
-    if len(source_books) != len(yaml_books):
-        differences.append(f"Number of books mismatch: {len(source_books)} (source) vs {len(yaml_books)} (YAML)")
-
-    for source_book, yaml_book in zip(source_books, yaml_books):
-        if source_book['name'] != yaml_book['name']:
-            differences.append(f"Book name mismatch: {source_book['name']} (source) vs {yaml_book['name']} (YAML)")
-
-        source_chapters = source_book.get('chapters', [])
-        yaml_chapters = yaml_book.get('chapters', [])
-
-        if len(source_chapters) != len(yaml_chapters):
-            differences.append(f"Number of chapters in book '{source_book['name']}' mismatch: {len(source_chapters)} (source) vs {len(yaml_chapters)} (YAML)")
-
-        for source_chapter, yaml_chapter in zip(source_chapters, yaml_chapters):
-            if source_chapter['chapter'] != yaml_chapter['chapter']:
-                differences.append(f"Chapter number mismatch in book '{source_book['name']}': {source_chapter['chapter']} (source) vs {yaml_chapter['chapter']} (YAML)")
-
-            source_verses = source_chapter.get('verses', [])
-            yaml_verses = yaml_chapter.get('verses', [])
-
-            if len(source_verses) != len(yaml_verses):
-                differences.append(f"Number of verses in chapter '{source_chapter['chapter']}' of book '{source_book['name']}' mismatch: {len(source_verses)} (source) vs {len(yaml_verses)} (YAML)")
-
-            for source_verse, yaml_verse in zip(source_verses, yaml_verses):
-                if source_verse['verse'] != yaml_verse['verse']:
-                    differences.append(f"Verse number mismatch in chapter '{source_chapter['chapter']}' of book '{source_book['name']}': {source_verse['verse']} (source) vs {yaml_verse['verse']} (YAML)")
-
-                # Normalize text for comparison
-                source_text = normalize_text(source_verse['text'])
-                yaml_text = normalize_text(yaml_verse['text'])
-
-                if source_text != yaml_text:
-                    differences.append(f"Verse text mismatch in chapter '{source_chapter['chapter']}' of book '{source_book['name']}':\n{source_text} (source) vs\n{yaml_text} (YAML)")
+    # Index both sides by book, chapter and verse so one missing verse does not shift the rest
+    differences = compare_translations(source_data, yaml_data, "YAML", normalize=normalize_text)
 
     report_path = f"text_integrity_check_yaml.txt"
     with open(report_path, 'w', encoding='utf-8') as report_file:
@@ -0,0 +1,96 @@
+"""
+Cross-reference centrality used as a query-time ranking boost.
+
+The OpenBible cross-reference list (http://www.openbible.info/labs/cross-references/)
+is a tab-separated file of ``From Verse``, ``To Verse`` and ``Votes`` with
+OSIS references such as ``Gen.1.1`` and ``Prov.8.22-Prov.8.30``. A verse's
+centrality is the sum of the positive votes of the references that start or
+end on it; verses that many readers connect to others rank higher among
+otherwise similar BM25 matches.
+
+Centrality is loaded once, aligned with a search index's document ids and
+scaled to 0..1 on a log scale, so a boost of weight ``w`` multiplies scores
+by ``1 + w * centrality`` with a single array lookup per query.
+"""
+
+import numpy as np
+
+from versification.canon import BOOK_NUMBERS, make_key
+
+
+def parse_osis(reference):
+    """Canonical key range of an OSIS reference like 'Gen.1.1' or 'Prov.8.22-Prov.8.30', or None"""
+    first, _, last = reference.partition('-')
+    keys = []
+    for part in (first, last or first):
+        pieces = part.split('.')
+        if len(pieces) != 3 or pieces[0] not in BOOK_NUMBERS:
+            return None
+        try:
+            keys.append(make_key(BOOK_NUMBERS[pieces[0]], int(pieces[1]), int(pieces[2])))
+        except ValueError:
+            return None
+    return keys[0], keys[1]
+
+
+def load_votes(paths):
+    """Sorted canonical keys and their summed cross-reference votes from OpenBible-format files"""
+    votes = {}
+    for path in paths:
+        with open(path, encoding='utf-8') as handle:
+            for line in handle:
+                fields = line.rstrip('\n').split('\t')
+                if len(fields) < 3:
+                    continue
+                try:
+                    count = int(fields[2])
+                except ValueError:
+                    continue  # header line
+                if count <= 0:
+                    continue
+                for reference in fields[:2]:
+                    key_range = parse_osis(reference)
+                    if key_range is None:
+                        continue
+                    first, last = key_range
+                    # Credit every verse of a range within one chapter, only the first across chapters
+                    if last // 1000 != first // 1000 or last < first:
+                        last = first
+                    for key in range(first, last + 1):
+                        votes[key] = votes.get(key, 0) + count
+    keys = np.fromiter(sorted(votes), dtype=np.int64, count=len(votes))
+    return keys, np.asarray([votes[key] for key in keys.tolist()], dtype=np.float64)
+
+
+def centrality(doc_keys, keys, votes):
+    """Centrality in 0..1 for every document of an index, log-scaled against the best connected verse"""
+    result = np.zeros(len(doc_keys), dtype=np.float32)
+    if keys.size == 0:
+        return result
+    index = np.searchsorted(keys, doc_keys)
+    index[index == keys.size] = 0
+    found = keys[index] == doc_keys
+    scaled = np.log1p(votes) / np.log1p(votes.max())
+    result[found] = scaled[index[found]]
+    return result
+
+
+class CrossReferenceBoost:
+    """Per-index centrality arrays built lazily from one set of votes"""
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.keys, self.votes = load_votes(self.paths)
+        self._centrality = {}
+
+    def __len__(self):
+        return int(self.keys.size)
+
+    def boost(self, index, weight):
+        """Multiplier per document id of ``index`` for a boost weight, or None when the weight is 0"""
+        if weight <= 0 or self.keys.size == 0:
+            return None
+        values = self._centrality.get(index.path)
+        if values is None:
+            values = self._centrality.setdefault(index.path, centrality(index.doc_keys, self.keys, self.votes))
+        return 1 + weight * values
@@ -0,0 +1,131 @@
+"""
+Run one query over many per-translation search indexes at once.
+
+Every translation's index is a shard. Shards are ranked on a thread pool
+(the indexes are memory-mapped and the heavy work is NumPy, so threads share
+them without copying), and their top-K lists are merged with a heap. This
+module itself does not import NumPy, so the API server can load it without.
+
+Before anything runs, each shard gets an upper bound on the score it can
+produce: the sum over the query terms of the best contribution each term
+makes to any verse (stored in the index as ``max_scores``), times the
+largest boost. Shards are started
+best bound first, and once K results are in hand and the K-th best score
+beats the bound of every shard still pending, those shards are cancelled
+instead of waited for. Their match counts are then unknown, and they are
+reported as skipped.
+"""
+
+import heapq
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from itertools import islice
+
+
+class ShardResult:
+    __slots__ = ('translation', 'query', 'keys', 'scores', 'total', 'corrections', 'bound', 'status', 'queued',
+                 'started', 'finished')
+
+    def __init__(self, translation, query, bound):
+        self.translation = translation
+        self.query = query  # after spelling correction
+        self.bound = bound
+        self.keys = []
+        self.scores = []
+        self.total = 0  # None when the shard was skipped, so its match count is unknown
+        self.corrections = {}
+        # 'done' when ranked, 'empty' when its bound showed nothing can match, 'skipped' when cancelled
+        self.status = 'empty'
+        self.queued = time.perf_counter()
+        self.started = None
+        self.finished = None
+
+    def timing(self):
+        """Per-shard timing in milliseconds, for the response"""
+        entry = {'translation': self.translation, 'matches': self.total, 'status': self.status}
+        if self.status != 'done':
+            return entry
+        entry['wait_ms'] = round((self.started - self.queued) * 1000, 3)
+        entry['run_ms'] = round((self.finished - self.started) * 1000, 3)
+        return entry
+
+
+def score_bound(index, query, boost=None):
+    """Highest BM25 score any verse of ``index`` can reach for ``query``"""
+    terms = {term for clause in index.parse_query(query) for term in clause[1]}
+    term_ids = [index.term_ids[term] for term in terms if term in index.term_ids]
+    if len(term_ids) < len(terms):
+        return 0.0  # a required term is missing, so nothing matches
+    bound = sum(float(index.max_scores[term_id]) for term_id in term_ids)
+    if boost is not None and boost.size:
+        bound *= float(boost.max())
+    return bound
+
+
+class SearchExecutor:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def _run_shard(self, query, index, limit, boost):
+        # The shard itself is only filled in by search(), so one still running when it is skipped changes nothing
+        started = time.perf_counter()
+        keys, scores, total = index.rank(query, limit, boost)
+        return keys, scores, total, started, time.perf_counter()
+
+    def search(self, indexes, query, limit=20, boosts=None, fuzzy=False):
+        """Top ``limit`` matches over ``{translation: SearchIndex}``
+
+        Returns ``(results, shards)``: results are (translation, canonical key,
+        score), best first; shards are ShardResults in the order given. Only
+        shards that finished before the search stopped contribute results.
+        Ties are broken by that order, so results do not depend on timing.
+        """
+        boosts = boosts or {}
+        shards = {}
+        # Only a word missing from every translation is a misspelling; "Jesus" is not one in an Old Testament
+        known = lambda term: any(term in index.term_ids for index in indexes.values())
+        for translation, index in indexes.items():
+            shard_query, corrections = index.correct_query(query, known) if fuzzy else (query, {})
+            shard = shards[translation] = ShardResult(
+                translation, shard_query, score_bound(index, shard_query, boosts.get(translation)))
+            shard.corrections = corrections
+
+        pending = {}
+        for translation in sorted(shards, key=lambda name: -shards[name].bound):
+            shard = shards[translation]
+            if shard.bound <= 0:
+                continue
+            future = self.pool.submit(self._run_shard, shard.query, indexes[translation], limit,
+                                      boosts.get(translation))
+            shard.status = 'pending'
+            pending[future] = shard
+
+        best = []  # min-heap of the top scores seen, at most ``limit`` long
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                shard = pending.pop(future)
+                shard.keys, shard.scores, shard.total, shard.started, shard.finished = future.result()
+                shard.status = 'done'
+                for score in shard.scores:
+                    if len(best) < limit:
+                        heapq.heappush(best, score)
+                    elif score > best[0]:
+                        heapq.heapreplace(best, score)
+            if len(best) == limit and pending and best[0] > max(shard.bound for shard in pending.values()):
+                # No pending shard can place a verse in the top K, not even tied with the K-th
+                for future, shard in pending.items():
+                    future.cancel()
+                    shard.status = 'skipped'
+                    shard.total = None
+                break
+
+        finished = [shard for shard in shards.values() if shard.status == 'done']
+        streams = [
+            [(-score, translation_order, key, shard.translation) for key, score in zip(shard.keys, shard.scores)]
+            for translation_order, shard in enumerate(finished)
+        ]
+        # Each stream is already best first, so the merge stops after ``limit`` pops
+        results = [(translation, key, -score)
+                   for score, _, key, translation in islice(heapq.merge(*streams), limit)]
+        return results, list(shards.values())
@@ -0,0 +1,136 @@
+"""
+Typo-tolerant lookup of index terms.
+
+Every term of a translation's vocabulary is padded with start and end marks
+and split into character bigrams; the index stores, for every bigram, the
+sorted ids of the terms containing it. One edit changes at most three
+bigrams (two for an insertion, deletion or substitution, three for swapped
+neighbours), so a term within ``k`` edits of a query word shares at least
+``len(bigrams(word)) - 3 * k`` of the word's distinct bigrams. Counting the
+shared bigrams of all terms is one ``np.bincount`` over the concatenated
+bigram postings; only the few terms that pass the count and length filters
+have their edit distance computed.
+
+Edit distance counts insertions, deletions, substitutions and transpositions
+of adjacent letters ("Melchisedek" -> "melchizedek" is one edit).
+"""
+
+import numpy as np
+
+START = '\x02'
+END = '\x03'
+
+
+def max_edits(word):
+    """Edits allowed for a word: none for short words, two for long names"""
+    if len(word) < 4:
+        return 0
+    return 1 if len(word) < 8 else 2
+
+
+def _pack(codes):
+    return (codes[:-1] << 21) | codes[1:]
+
+
+def word_bigrams(word):
+    """Distinct bigram codes of a padded word"""
+    codes = np.array([ord(ch) for ch in START + word + END], dtype=np.int64)
+    return np.unique(_pack(codes))
+
+
+def build_bigrams(terms):
+    """Bigram codes (sorted), posting offsets and term ids for a sorted vocabulary"""
+    if not terms:
+        return np.zeros(0, dtype=np.int64), np.zeros(1, dtype=np.uint64), np.zeros(0, dtype=np.uint32)
+    padded = [START + term + END for term in terms]
+    lengths = np.fromiter((len(term) for term in padded), dtype=np.int64, count=len(padded))
+    codes = np.frombuffer('\0'.join(padded).encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+    term_of_char = np.repeat(np.arange(len(padded)), lengths + 1)[:codes.size]
+    grams = _pack(codes)
+    valid = (codes[:-1] != 0) & (codes[1:] != 0)
+    grams, term_ids = grams[valid], term_of_char[:-1][valid]
+    order = np.argsort(grams, kind='stable')
+    grams, term_ids = grams[order], term_ids[order]
+    keep = np.ones(grams.size, dtype=bool)
+    keep[1:] = (grams[1:] != grams[:-1]) | (term_ids[1:] != term_ids[:-1])
+    grams, term_ids = grams[keep], term_ids[keep]
+    starts = np.flatnonzero(np.concatenate(([True], grams[1:] != grams[:-1])))
+    offsets = np.append(starts, grams.size).astype(np.uint64)
+    return grams[starts], offsets, term_ids.astype(np.uint32)
+
+
+def pattern_masks(word):
+    """Bit mask of the positions of every character of a word"""
+    masks = {}
+    for i, ch in enumerate(word):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    return masks
+
+
+def edit_distance(word, other, masks=None):
+    """Optimal string alignment distance, computed one column per character with bit vectors
+
+    This is Hyyrö's bit-parallel variant of Myers' algorithm with adjacent
+    transpositions; ``masks`` (from ``pattern_masks(word)``) can be reused
+    across calls with the same word.
+    """
+    length = len(word)
+    if length == 0:
+        return len(other)
+    masks = pattern_masks(word) if masks is None else masks
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    positive, negative, diagonal, previous = full, 0, 0, 0
+    score = length
+    for ch in other:
+        match = masks.get(ch, 0)
+        transposed = (((~diagonal) & match) << 1) & previous
+        diagonal = ((((match & positive) + positive) ^ positive) | match | negative | transposed) & full
+        horizontal_positive = (negative | ~(diagonal | positive)) & full
+        horizontal_negative = diagonal & positive
+        if horizontal_positive & last:
+            score += 1
+        elif horizontal_negative & last:
+            score -= 1
+        shifted = (horizontal_positive << 1) | 1
+        negative = shifted & diagonal
+        positive = ((horizontal_negative << 1) | ~(shifted | diagonal)) & full
+        previous = match
+    return score
+
+
+class FuzzyMatcher:
+    """Fuzzy lookup over one index's vocabulary, reading the bigram sections in place"""
+
+    def __init__(self, terms, document_frequencies, grams, offsets, term_ids):
+        self.terms = terms
+        self.document_frequencies = document_frequencies
+        self.grams = grams
+        self.offsets = offsets
+        self.term_ids = term_ids
+        self.term_lengths = np.fromiter((len(term) for term in terms), dtype=np.int32, count=len(terms))
+
+    def lookup(self, word, max_distance=None):
+        """Terms within ``max_distance`` edits of a normalized word as (term, distance, df), best first"""
+        limit = max_edits(word) if max_distance is None else max_distance
+        if limit == 0 or not self.terms:
+            return []
+        query = word_bigrams(word)
+        index = np.searchsorted(self.grams, query)
+        found = index < self.grams.size
+        index = index[found][self.grams[index[found]] == query[found]]
+        if index.size == 0:
+            return []
+        postings = [self.term_ids[int(self.offsets[i]):int(self.offsets[i + 1])] for i in index.tolist()]
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.terms))
+        candidates = np.flatnonzero(
+            (shared >= query.size - 3 * limit) & (np.abs(self.term_lengths - len(word)) <= limit))
+        masks = pattern_masks(word)
+        matches = []
+        for term_id in candidates.tolist():
+            term = self.terms[term_id]
+            distance = edit_distance(word, term, masks)
+            if distance <= limit:
+                matches.append((term, distance, int(self.document_frequencies[term_id])))
+        matches.sort(key=lambda match: (match[1], -match[2], match[0]))
+        return matches
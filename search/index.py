@@ -0,0 +1,567 @@
+"""
+Positional inverted index over the verses of one translation.
+
+The index file (``formats/search/<translation>.idx``) is written once at
+generation time and memory-mapped by readers:
+
+- a fixed magic, then a JSON header (metadata and section offsets)
+- ``doc_keys``     int32, canonical verse key of every document (verse), sorted
+- ``doc_lengths``  uint32, tokens per verse
+- ``doc_norms``    float32, BM25 length normalization ``k1 * (1 - b + b * length / average)``
+- ``terms``        UTF-8 terms in sorted order, newline separated
+- ``term_table``   one TERM_DTYPE record per term
+- ``idf``          float32, BM25 inverse document frequency per term
+- ``max_scores``   float32, the highest BM25 contribution of each term to any
+  verse, an upper bound used to skip whole indexes (see ``search.executor``)
+- ``gram_keys``, ``gram_offsets``, ``gram_terms``  character bigrams of the
+  vocabulary and the term ids containing each, for typo-tolerant lookup
+  (see ``search.fuzzy``)
+- ``docs``, ``tfs``, ``positions``  varint postings streams; each term owns
+  one contiguous run in each: document ids (delta coded), term frequency
+  per document, and token positions (delta coded, restarting at every
+  document)
+- ``starts``, ``lengths``  varint streams parallel to ``positions``: the
+  character offset of every occurrence in the verse text (delta coded,
+  restarting at every document) and its length in characters, so matches
+  are highlighted without tokenizing the verse again
+
+Postings are decoded with NumPy (see ``search.varint``), and phrase and
+proximity queries intersect ``doc_id << 16 | position`` arrays instead of
+scanning verse text. ``rank`` scores the matches with BM25 from the stored
+norms and IDF tables in a few array operations per query term, optionally
+multiplied by a per-verse boost (see ``search.cross_references``), and
+selects the top K with ``argpartition`` instead of sorting every match.
+``highlights`` turns the offsets of the matching occurrences into character
+spans for the verses actually returned.
+"""
+
+import json
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from search import varint
+from search.fuzzy import FuzzyMatcher, build_bigrams
+from search.tokenizers import get_tokenizer, get_tokenizer_by_name
+
+MAGIC = b'BIBLIDX1'
+VERSION = 5
+POSITION_BITS = 16
+POSTINGS_CACHE_SIZE = 256  # decoded postings kept per index, most recently used
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TERM_DTYPE = np.dtype([
+    ('df', '<u4'),              # documents containing the term
+    ('cf', '<u4'),              # total occurrences
+    ('docs_offset', '<u8'),     # byte ranges of the term's run in each postings stream
+    ('docs_length', '<u4'),
+    ('tfs_offset', '<u8'),
+    ('tfs_length', '<u4'),
+    ('positions_offset', '<u8'),
+    ('positions_length', '<u4'),
+    ('starts_offset', '<u8'),
+    ('starts_length', '<u4'),
+    ('lengths_offset', '<u8'),
+    ('lengths_length', '<u4'),
+])
+STREAMS = ('docs', 'tfs', 'positions', 'starts', 'lengths')
+
+_QUERY = re.compile(r'"([^"]*)"(?:~(\d+))?|(\S+)')
+
+
+class Postings:
+    __slots__ = ('docs', 'tfs', 'positions', 'offsets', '_starts')
+
+    def __init__(self, docs, tfs, positions):
+        self.docs = docs
+        self.tfs = tfs
+        self.positions = positions
+        self.offsets = None  # (starts, ends) character offsets, decoded on first use by SearchIndex.offsets
+        self._starts = None
+
+    def positional_keys(self):
+        """One ``doc << 16 | position`` value per occurrence, sorted"""
+        return (np.repeat(self.docs, self.tfs) << POSITION_BITS) | self.positions
+
+    def occurrences_in(self, docs):
+        """(document id, index into ``positions``) of every occurrence in the sorted document ids ``docs``
+
+        ``docs`` must all be in these postings. Costs O(len(docs) log df +
+        occurrences in docs), so a frequent word such as "the" is not expanded
+        in full when a phrase has few candidates.
+        """
+        if self._starts is None:
+            self._starts = np.cumsum(self.tfs) - self.tfs
+        rows = np.searchsorted(self.docs, docs)
+        counts = self.tfs[rows]
+        # Each row's start plus 0, 1, ... tf - 1
+        shifts = np.repeat(self._starts[rows] - (np.cumsum(counts) - counts), counts)
+        return np.repeat(docs, counts), shifts + np.arange(shifts.size)
+
+    def positional_keys_in(self, docs):
+        """positional_keys of only the sorted document ids ``docs``, which must all be in these postings"""
+        occurrence_docs, index = self.occurrences_in(docs)
+        return (occurrence_docs << POSITION_BITS) | self.positions[index]
+
+
+EMPTY_POSTINGS = Postings(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+EMPTY_POSTINGS.offsets = (EMPTY_POSTINGS.positions, EMPTY_POSTINGS.positions)
+
+
+def sorted_intersect(a, b):
+    """Intersection of two sorted arrays of unique values, without re-sorting either"""
+    if a.size > b.size:
+        a, b = b, a
+    if a.size == 0:
+        return a
+    index = np.searchsorted(b, a)
+    index[index == b.size] = 0
+    return a[b[index] == a]
+
+
+def sorted_contains(values, members):
+    """Mask of the entries of ``values`` that occur in the sorted array ``members``"""
+    if members.size == 0:
+        return np.zeros(values.size, dtype=bool)
+    index = np.searchsorted(members, values)
+    index[index == members.size] = 0
+    return members[index] == values
+
+
+def _align(handle):
+    padding = -handle.tell() % 8
+    handle.write(b'\0' * padding)
+
+
+def write_index(path, documents, language=None, translation=None):
+    """Build and write an index from an iterable of (canonical key, text) pairs"""
+    tokenizer = get_tokenizer(language)
+    doc_keys = []
+    doc_lengths = []
+    occurrences = {}  # term -> ([doc ids], [tfs], [positions], [character starts], [character lengths])
+    for doc_id, (key, text) in enumerate(sorted(documents)):
+        doc_keys.append(key)
+        tokens = tokenizer.tokenize(text)
+        doc_lengths.append(len(tokens))
+        seen = {}
+        for position, (term, start, end) in enumerate(tokens[:1 << POSITION_BITS]):
+            seen.setdefault(term, []).append((position, start, end - start))
+        for term, found in seen.items():
+            entry = occurrences.get(term)
+            if entry is None:
+                entry = occurrences[term] = ([], [], [], [], [])
+            entry[0].append(doc_id)
+            entry[1].append(len(found))
+            for position, start, length in found:
+                entry[2].append(position)
+                entry[3].append(start)
+                entry[4].append(length)
+
+    terms = sorted(occurrences)
+    flat_docs, flat_tfs, flat_positions, flat_starts, flat_lengths, dfs, cfs = [], [], [], [], [], [], []
+    for term in terms:
+        docs, tfs, positions, starts, lengths = occurrences[term]
+        flat_docs.extend(docs)
+        flat_tfs.extend(tfs)
+        flat_positions.extend(positions)
+        flat_starts.extend(starts)
+        flat_lengths.extend(lengths)
+        dfs.append(len(docs))
+        cfs.append(len(positions))
+    docs = np.asarray(flat_docs, dtype=np.int64)
+    tfs = np.asarray(flat_tfs, dtype=np.int64)
+    positions = np.asarray(flat_positions, dtype=np.int64)
+    starts = np.asarray(flat_starts, dtype=np.int64)
+    token_lengths = np.asarray(flat_lengths, dtype=np.int64)
+    dfs = np.asarray(dfs, dtype=np.int64)
+    cfs = np.asarray(cfs, dtype=np.int64)
+
+    # BM25 tables, so queries only multiply and add
+    lengths = np.asarray(doc_lengths, dtype=np.float64)
+    average_length = float(lengths.mean()) if lengths.size else 0.0
+    doc_norms = BM25_K1 * (1 - BM25_B + BM25_B * lengths / (average_length or 1.0))
+    idf = np.log1p((len(doc_keys) - dfs + 0.5) / (dfs + 0.5))
+    gram_keys, gram_offsets, gram_terms = build_bigrams(terms)
+
+    # Delta code everything in one pass; gaps restart at each term (documents) and each document (positions)
+    doc_gaps = np.diff(docs, prepend=0)
+    term_starts = np.concatenate(([0], np.cumsum(dfs)[:-1])).astype(np.int64)
+    if docs.size:
+        doc_gaps[term_starts] = docs[term_starts]
+    position_gaps = np.diff(positions, prepend=0)
+    run_starts = np.concatenate(([0], np.cumsum(tfs)[:-1])).astype(np.int64)
+    start_gaps = np.diff(starts, prepend=0)
+    if positions.size:
+        position_gaps[run_starts] = positions[run_starts]
+        start_gaps[run_starts] = starts[run_starts]
+
+    # Best contribution of each term to any verse, an upper bound for skipping whole indexes
+    contributions = np.repeat(idf, dfs) * tfs * (BM25_K1 + 1) / (tfs + doc_norms[docs])
+    max_scores = np.maximum.reduceat(contributions, term_starts) if len(terms) else np.zeros(0)
+
+    table = np.zeros(len(terms), dtype=TERM_DTYPE)
+    table['df'] = dfs
+    table['cf'] = cfs
+    streams = (('docs', doc_gaps, dfs), ('tfs', tfs, dfs), ('positions', position_gaps, cfs),
+               ('starts', start_gaps, cfs), ('lengths', token_lengths, cfs))
+    for stream, values, runs in streams:
+        lengths = varint.run_byte_lengths(values, runs) if len(terms) else np.zeros(0, dtype=np.int64)
+        table[f'{stream}_length'] = lengths
+        table[f'{stream}_offset'] = np.cumsum(lengths) - lengths
+
+    sections = [
+        ('doc_keys', np.asarray(doc_keys, dtype='<i4').tobytes()),
+        ('doc_lengths', np.asarray(doc_lengths, dtype='<u4').tobytes()),
+        ('doc_norms', doc_norms.astype('<f4').tobytes()),
+        ('terms', '\n'.join(terms).encode('utf-8')),
+        ('term_table', table.tobytes()),
+        ('idf', idf.astype('<f4').tobytes()),
+        ('max_scores', max_scores.astype('<f4').tobytes()),
+        ('gram_keys', gram_keys.astype('<i8').tobytes()),
+        ('gram_offsets', gram_offsets.astype('<u8').tobytes()),
+        ('gram_terms', gram_terms.astype('<u4').tobytes()),
+        ('docs', varint.encode(doc_gaps)),
+        ('tfs', varint.encode(tfs)),
+        ('positions', varint.encode(position_gaps)),
+        ('starts', varint.encode(start_gaps)),
+        ('lengths', varint.encode(token_lengths)),
+    ]
+    header = {
+        'version': VERSION,
+        'translation': translation,
+        'language': language,
+        'tokenizer': tokenizer.name,
+        'documents': len(doc_keys),
+        'terms': len(terms),
+        'tokens': int(sum(doc_lengths)),
+        'bm25': {'k1': BM25_K1, 'b': BM25_B, 'average_length': average_length},
+        'sections': {},
+    }
+    # Section offsets depend on the header size, so reserve room for them first
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_size = len(header_bytes) + 64 * len(sections) + 64
+    position = len(MAGIC) + 4 + header_size
+    position += -position % 8
+    for name, data in sections:
+        header['sections'][name] = [position, len(data)]
+        position += len(data)
+        position += -position % 8
+    header_bytes = json.dumps(header).encode('utf-8').ljust(header_size)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as handle:
+        handle.write(MAGIC)
+        handle.write(len(header_bytes).to_bytes(4, 'little'))
+        handle.write(header_bytes)
+        for name, data in sections:
+            _align(handle)
+            handle.write(data)
+        _align(handle)
+    os.replace(temp_path, path)
+    return header
+
+
+class SearchIndex:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a search index: {path}")
+        header_length = int.from_bytes(self._mmap[len(MAGIC):len(MAGIC) + 4], 'little')
+        header_start = len(MAGIC) + 4
+        self.header = json.loads(self._mmap[header_start:header_start + header_length].decode('utf-8'))
+        if self.header.get('version') != VERSION:
+            raise ValueError(f"Search index {path} has version {self.header.get('version')}, "
+                             f"expected {VERSION}; regenerate it with generate_search_index.py")
+        self.translation = self.header['translation']
+        self.language = self.header['language']
+        self.tokenizer = get_tokenizer_by_name(self.header['tokenizer'])
+
+        self.doc_keys = self._array('doc_keys', '<i4')
+        self.doc_lengths = self._array('doc_lengths', '<u4')
+        self.doc_norms = self._array('doc_norms', '<f4')
+        self.term_table = self._array('term_table', TERM_DTYPE)
+        self.idf = self._array('idf', '<f4')
+        self.max_scores = self._array('max_scores', '<f4')
+        self.k1 = self.header['bm25']['k1']
+        self._stream_offsets = {stream: self.header['sections'][stream][0] for stream in STREAMS}
+        offset, length = self.header['sections']['terms']
+        self.terms = self._mmap[offset:offset + length].decode('utf-8').split('\n') if length else []
+        self.term_ids = {term: i for i, term in enumerate(self.terms)}
+        self._fuzzy = None
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _array(self, name, dtype):
+        offset, length = self.header['sections'][name]
+        dtype = np.dtype(dtype)
+        return np.frombuffer(self._mmap, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+
+    def close(self):
+        self.doc_keys = self.doc_lengths = self.doc_norms = self.term_table = self.idf = self.max_scores = None
+        self._fuzzy = None
+        self._mmap.close()
+
+    def postings(self, term):
+        """Decoded postings of one (already normalized) term"""
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return EMPTY_POSTINGS
+        with self._cache_lock:
+            cached = self._cache.get(term_id)
+            if cached is not None:
+                self._cache.move_to_end(term_id)
+                return cached
+        entry = self.term_table[term_id]
+        docs = varint.decode_deltas(self._stream(entry, 'docs'))
+        tfs = varint.decode(self._stream(entry, 'tfs')).astype(np.int64)
+        positions = varint.decode_segmented_deltas(self._stream(entry, 'positions'), tfs)
+        postings = Postings(docs, tfs, positions)
+        with self._cache_lock:
+            self._cache[term_id] = postings
+            if len(self._cache) > POSTINGS_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return postings
+
+    def offsets(self, term):
+        """Character (starts, ends) of every occurrence of a term, parallel to its postings' positions"""
+        postings = self.postings(term)
+        if postings.offsets is None:
+            entry = self.term_table[self.term_ids[term]]
+            starts = varint.decode_segmented_deltas(self._stream(entry, 'starts'), postings.tfs)
+            postings.offsets = (starts, starts + varint.decode(self._stream(entry, 'lengths')))
+        return postings.offsets
+
+    def _stream(self, entry, stream):
+        start = self._stream_offsets[stream] + int(entry[f'{stream}_offset'])
+        return self._mmap[start:start + int(entry[f'{stream}_length'])]
+
+    def document_frequency(self, term):
+        term_id = self.term_ids.get(term)
+        return 0 if term_id is None else int(self.term_table[term_id]['df'])
+
+    def fuzzy_matcher(self):
+        if self._fuzzy is None:
+            self._fuzzy = FuzzyMatcher(self.terms, self.term_table['df'], self._array('gram_keys', '<i8'),
+                                       self._array('gram_offsets', '<u8'), self._array('gram_terms', '<u4'))
+        return self._fuzzy
+
+    def similar_terms(self, word, max_distance=None):
+        """Index terms within a few edits of a word as (term, distance, df), best first"""
+        terms = self.tokenizer.terms(word)
+        if len(terms) != 1 or self.tokenizer.phrase_words:
+            return []
+        return self.fuzzy_matcher().lookup(terms[0], max_distance)
+
+    def correct_query(self, query, known=None):
+        """Replace words missing from the index with their closest term; returns (query, {word: term})
+
+        ``known(term)`` can mark more terms as correct, e.g. terms found in
+        another translation searched together with this one.
+        """
+        if self.tokenizer.phrase_words:
+            return query, {}
+        corrections = {}
+        pieces = []
+        last = 0
+        for token, start, end in self.tokenizer.tokenize(query):
+            if token in self.term_ids or (known is not None and known(token)):
+                continue
+            matches = self.fuzzy_matcher().lookup(token)
+            if matches:
+                corrections[query[start:end]] = matches[0][0]
+                pieces.append(query[last:start])
+                pieces.append(matches[0][0])
+                last = end
+        pieces.append(query[last:])
+        return ''.join(pieces), corrections
+
+    def all_terms(self, terms):
+        """Document ids containing every term"""
+        if not terms:
+            return np.zeros(0, dtype=np.int64)
+        # Intersect from the rarest term up so the candidate set shrinks fastest
+        ordered = sorted(set(terms), key=self.document_frequency)
+        docs = self.postings(ordered[0]).docs
+        for term in ordered[1:]:
+            if docs.size == 0:
+                break
+            docs = sorted_intersect(docs, self.postings(term).docs)
+        return docs
+
+    def phrase(self, terms):
+        """Document ids where the terms occur consecutively, in order"""
+        if len(terms) < 2:
+            return self.all_terms(terms)
+        candidates = self.all_terms(terms)
+        if candidates.size == 0:
+            return candidates
+        # Align every term's occurrences on the phrase start: term i at position p starts a phrase at p - i
+        starts = None
+        for i, term in enumerate(terms):
+            keys = self.postings(term).positional_keys_in(candidates) - i
+            starts = keys if starts is None else sorted_intersect(starts, keys)
+            if starts.size == 0:
+                break
+        return np.unique(starts >> POSITION_BITS)
+
+    def near(self, terms, distance):
+        """Document ids where every term occurs within ``distance`` tokens of an occurrence of the first"""
+        if len(terms) < 2:
+            return self.all_terms(terms)
+        candidates = self.all_terms(terms)
+        if candidates.size == 0:
+            return candidates
+        anchors = self.postings(terms[0]).positional_keys_in(candidates)
+        for term in terms[1:]:
+            keys = self.postings(term).positional_keys_in(candidates)
+            # Distance to the nearest occurrence of this term in the same verse, via a sorted search
+            index = np.searchsorted(keys, anchors)
+            before = keys[np.clip(index - 1, 0, len(keys) - 1)]
+            after = keys[np.clip(index, 0, len(keys) - 1)]
+            nearest = np.minimum(np.abs(anchors - before), np.abs(after - anchors))
+            anchors = anchors[nearest <= distance]
+            if anchors.size == 0:
+                break
+        return np.unique(anchors >> POSITION_BITS)
+
+    def parse_query(self, query):
+        """Split a query into clauses: ('terms', [...]), ('phrase', [...]) or ('near', [...], distance)"""
+        clauses = []
+        loose = []
+        for match in _QUERY.finditer(query):
+            phrase, distance, word = match.groups()
+            if word is not None:
+                terms = self.tokenizer.terms(word)
+                # Scripts without spaces index character n-grams; a typed word is a run of them
+                if self.tokenizer.phrase_words and len(terms) > 1:
+                    clauses.append(('phrase', terms))
+                else:
+                    loose.extend(terms)
+            elif distance is not None:
+                clauses.append(('near', self.tokenizer.terms(phrase), int(distance)))
+            else:
+                clauses.append(('phrase', self.tokenizer.terms(phrase)))
+        if loose:
+            clauses.append(('terms', loose))
+        return clauses
+
+    def match(self, query):
+        """Document ids matching every clause of a query"""
+        docs = None
+        for clause in self.parse_query(query):
+            if clause[0] == 'phrase':
+                matched = self.phrase(clause[1])
+            elif clause[0] == 'near':
+                matched = self.near(clause[1], clause[2])
+            else:
+                matched = self.all_terms(clause[1])
+            docs = matched if docs is None else sorted_intersect(docs, matched)
+            if docs.size == 0:
+                break
+        return docs if docs is not None else np.zeros(0, dtype=np.int64)
+
+    def search(self, query, limit=None):
+        """Canonical verse keys matching a query, in canonical order"""
+        docs = self.match(query)
+        if limit is not None:
+            docs = docs[:limit]
+        return self.doc_keys[docs].tolist()
+
+    def scores(self, docs, terms):
+        """BM25 score of each of the sorted document ids ``docs`` for the query terms"""
+        scores = np.zeros(docs.size, dtype=np.float32)
+        for term in set(terms):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            postings = self.postings(term)
+            matched = sorted_contains(postings.docs, docs)
+            term_docs = postings.docs[matched]
+            tfs = postings.tfs[matched].astype(np.float32)
+            # Each document appears once per term, so a fancy-indexed add is safe
+            scores[np.searchsorted(docs, term_docs)] += (
+                self.idf[term_id] * tfs * (self.k1 + 1) / (tfs + self.doc_norms[term_docs]))
+        return scores
+
+    def rank(self, query, limit=None, boost=None):
+        """Top matches by BM25 score as (canonical keys, scores, total matches)
+
+        ``boost`` is an optional float array indexed by document id (see
+        ``search.cross_references``) that multiplies the scores.
+        """
+        docs = self.match(query)
+        terms = [term for clause in self.parse_query(query) for term in clause[1]]
+        scores = self.scores(docs, terms)
+        if boost is not None:
+            scores *= boost[docs]
+        top = np.arange(docs.size)
+        if limit is not None and limit < docs.size:
+            # Partial selection of the K best, then a sort of only those K
+            top = np.argpartition(-scores, max(limit - 1, 0))[:limit]
+        # Highest score first, canonical order between equal scores
+        top = top[np.lexsort((docs[top], -scores[top]))]
+        return self.doc_keys[docs[top]].tolist(), scores[top].tolist(), int(docs.size)
+
+    def _term_spans(self, docs, term):
+        """(document id, start, end) of every occurrence of a term in the sorted document ids ``docs``"""
+        postings = self.postings(term)
+        docs = docs[sorted_contains(docs, postings.docs)]
+        occurrence_docs, index = postings.occurrences_in(docs)
+        starts, ends = self.offsets(term)
+        return occurrence_docs, starts[index], ends[index]
+
+    def _phrase_spans(self, docs, terms):
+        """(document id, start, end) of every occurrence of a phrase, from its first word to its last"""
+        for term in terms:
+            docs = docs[sorted_contains(docs, self.postings(term).docs)]
+        occurrences = []
+        phrase_starts = None
+        for i, term in enumerate(terms):
+            postings = self.postings(term)
+            occurrence_docs, index = postings.occurrences_in(docs)
+            keys = (occurrence_docs << POSITION_BITS) | postings.positions[index]
+            occurrences.append((keys, index))
+            phrase_starts = keys - i if phrase_starts is None else sorted_intersect(phrase_starts, keys - i)
+        first_keys, first_index = occurrences[0]
+        last_keys, last_index = occurrences[-1]
+        starts = self.offsets(terms[0])[0][first_index[np.searchsorted(first_keys, phrase_starts)]]
+        ends = self.offsets(terms[-1])[1][last_index[np.searchsorted(last_keys, phrase_starts + len(terms) - 1)]]
+        return phrase_starts >> POSITION_BITS, starts, ends
+
+    def highlights(self, keys, query):
+        """Character spans ``[start, end]`` of the query's matches in the verse of each canonical key
+
+        Phrases are highlighted whole, other words at every occurrence; the
+        work is proportional to the occurrences in these verses only.
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        rows = np.searchsorted(self.doc_keys, keys)
+        found = rows < self.doc_keys.size
+        found[found] = self.doc_keys[rows[found]] == keys[found]
+        docs = np.unique(rows[found])
+        parts = []
+        for clause in self.parse_query(query):
+            if clause[0] == 'phrase' and len(clause[1]) > 1:
+                parts.append(self._phrase_spans(docs, clause[1]))
+            else:
+                parts.extend(self._term_spans(docs, term) for term in set(clause[1]))
+        spans = {}
+        if parts:
+            span_docs, starts, ends = (np.concatenate(column) for column in zip(*parts))
+            order = np.lexsort((ends, starts, span_docs))
+            # Merge overlapping spans, e.g. the shared character of two n-grams
+            for doc, start, end in zip(span_docs[order].tolist(), starts[order].tolist(), ends[order].tolist()):
+                merged = spans.setdefault(doc, [])
+                if merged and start <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+        return [spans.get(int(row), []) if present else [] for row, present in zip(rows.tolist(), found.tolist())]
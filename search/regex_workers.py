@@ -0,0 +1,120 @@
+"""
+Run trigram regex searches in worker processes that can be killed.
+
+``re`` cannot be interrupted, so a pattern that backtracks badly would hold
+a server thread for as long as it runs. Searches are instead sent to a
+small pool of worker processes, each with the trigram index mmapped. A
+search that misses its deadline has its worker killed (and replaced on
+the next request), and raises ``SearchTimeout``. So does a request that
+finds every worker busy for that long. A slow pattern costs at most one
+worker for one deadline.
+"""
+
+import multiprocessing
+import queue
+import threading
+
+DEFAULT_TIMEOUT = 2.0
+STARTUP_TIMEOUT = 30.0
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def _serve(path, connection):
+    """Worker loop: answer (args, kwargs) requests with TrigramIndex.search until the pipe closes"""
+    from search.trigrams import TrigramIndex
+    index = TrigramIndex(path)
+    connection.send(True)  # ready: the deadline of the first search does not include start-up
+    try:
+        while True:
+            try:
+                args, kwargs = connection.recv()
+            except EOFError:
+                break
+            try:
+                connection.send((True, index.search(*args, **kwargs)))
+            except Exception as e:
+                connection.send((False, e))
+    finally:
+        index.close()
+
+
+class RegexWorkers:
+    def __init__(self, path, size=2, timeout=DEFAULT_TIMEOUT):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        # Workers are spawned, not forked, because the server process runs threads
+        self._context = multiprocessing.get_context('spawn')
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _start(self):
+        parent, child = self._context.Pipe()
+        process = self._context.Process(target=_serve, args=(self.path, child), daemon=True,
+                                        name='bible-regex')
+        process.start()
+        child.close()
+        try:
+            ready = parent.poll(STARTUP_TIMEOUT) and parent.recv()
+        except EOFError:
+            ready = False  # the worker exited, e.g. the index could not be opened
+        if not ready:
+            self._discard((process, parent))
+            raise SearchTimeout("A regex worker did not start")
+        return process, parent
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            return self._start()
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise SearchTimeout("Every regex worker is busy") from None
+
+    def _discard(self, worker):
+        process, connection = worker
+        process.kill()
+        process.join()
+        connection.close()
+        with self._lock:
+            self._created -= 1
+
+    def search(self, *args, **kwargs):
+        """TrigramIndex.search in a worker, raising SearchTimeout if it takes longer than the deadline"""
+        worker = self._acquire()
+        process, connection = worker
+        try:
+            connection.send((args, kwargs))
+            if not connection.poll(self.timeout):
+                raise SearchTimeout(f"Search took longer than {self.timeout:g}s")
+            ok, result = connection.recv()
+        except BaseException:
+            self._discard(worker)
+            raise
+        self._idle.put(worker)
+        if not ok:
+            raise result
+        return result
+
+    def close(self):
+        while True:
+            try:
+                process, connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            connection.close()
+            process.join(timeout=1)
+            if process.is_alive():
+                process.kill()
@@ -0,0 +1,230 @@
+"""
+Prefix autocomplete for the search and reference boxes.
+
+``formats/search/suggest.idx`` is a set of sorted arrays read through one
+mmap, laid out like the trigram index (blocks, then a JSON header, then the
+header offset as a little-endian uint64):
+
+- a ``books`` block with every book name and abbreviation in every language
+  of ``versification.book_names``, weighted by how many verses of the book
+  the corpus holds
+- one block per translation with its proper nouns and its most frequent
+  terms, weighted by occurrences
+
+Each block stores its folded keys as sorted UTF-8 (``keys`` and
+``key_offsets``), the text to show (``labels``, ``label_offsets``),
+``weights`` (uint32), ``values`` (int32, the book number of book entries)
+and ``kinds`` (uint8, see ``KINDS``). UTF-8 sorts like the code points, so
+the entries starting with a prefix are one contiguous range found by two
+binary searches; the heaviest entries of the range are picked with
+``argpartition``.
+"""
+
+import heapq
+import json
+import mmap
+import os
+
+import numpy as np
+
+from search.tokenizers import get_tokenizer_by_name
+from versification.book_names import iter_book_names
+from versification.canon import BOOK_NAMES, BOOKS, split_key
+from versification.references import fold_name
+
+MAGIC = b'BIBLSUG1'
+VERSION = 1
+BOOK, PROPER_NOUN, TERM = 0, 1, 2
+KINDS = {BOOK: 'book', PROPER_NOUN: 'name', TERM: 'term'}
+MAX_TERMS = 20000           # most frequent terms kept per translation, besides proper nouns
+MIN_TERM_LENGTH = 3
+PROPER_NOUN_RATIO = 0.9     # share of capitalized occurrences that marks a proper noun
+
+
+def count_book_verses(documents, verses):
+    """Add the verses of each book in ``documents`` to the ``verses`` counts"""
+    for key, _ in documents:
+        book = split_key(key)[0]
+        verses[book] = verses.get(book, 0) + 1
+    return verses
+
+
+def book_entries(verses):
+    """(key, label, weight, book, kind) for every book name, weighted by its verse count in the corpus"""
+    names = [(number, name) for number, osis, name, aliases in BOOKS for name in [name, osis] + aliases]
+    names.extend(iter_book_names())
+    entries = {}
+    for number, name in names:
+        key = fold_name(name)
+        if key and (key, number) not in entries:
+            entries[(key, number)] = (key, name, verses.get(number, 0), number, BOOK)
+    return list(entries.values())
+
+
+def term_entries(documents, tokenizer, max_terms=MAX_TERMS):
+    """(key, label, weight, 0, kind) for the proper nouns and most frequent terms of a translation"""
+    counts = {}
+    capitalized = {}
+    surfaces = {}
+    for _, text in documents:
+        for term, start, end in tokenizer.tokenize(text):
+            if len(term) < MIN_TERM_LENGTH:
+                continue
+            counts[term] = counts.get(term, 0) + 1
+            surface = text[start:end]
+            forms = surfaces.setdefault(term, {})
+            forms[surface] = forms.get(surface, 0) + 1
+            if surface[:1].isupper():
+                capitalized[term] = capitalized.get(term, 0) + 1
+    proper = {term for term, count in capitalized.items() if count >= PROPER_NOUN_RATIO * counts[term]}
+    frequent = heapq.nlargest(max_terms, (term for term in counts if term not in proper), key=counts.get)
+    entries = []
+    for kind, terms in ((PROPER_NOUN, proper), (TERM, frequent)):
+        for term in terms:
+            # Show the spelling used most often in the text, with its accents and capitals
+            label = max(surfaces[term].items(), key=lambda item: item[1])[0]
+            entries.append((term, label, counts[term], 0, kind))
+    return entries
+
+
+def _align(handle):
+    handle.write(b'\0' * (-handle.tell() % 8))
+
+
+def _write_block(handle, name, entries, tokenizer=None):
+    entries = sorted(entries, key=lambda entry: (entry[0].encode('utf-8'), -entry[2]))
+    keys = [entry[0].encode('utf-8') for entry in entries]
+    labels = [entry[1].encode('utf-8') for entry in entries]
+    arrays = [
+        ('key_offsets', np.concatenate(([0], np.cumsum([len(key) for key in keys]))).astype('<u4').tobytes()),
+        ('keys', b''.join(keys)),
+        ('label_offsets', np.concatenate(([0], np.cumsum([len(label) for label in labels]))).astype('<u4').tobytes()),
+        ('labels', b''.join(labels)),
+        ('weights', np.asarray([entry[2] for entry in entries], dtype='<u4').tobytes()),
+        ('values', np.asarray([entry[3] for entry in entries], dtype='<i4').tobytes()),
+        ('kinds', np.asarray([entry[4] for entry in entries], dtype='u1').tobytes()),
+    ]
+    sections = {}
+    for section, data in arrays:
+        _align(handle)
+        sections[section] = [handle.tell(), len(data)]
+        handle.write(data)
+    return {'name': name, 'tokenizer': tokenizer, 'entries': len(entries), 'sections': sections}
+
+
+def write_suggest_index(path, books, translations):
+    """Write the book block and one block per (translation, tokenizer name, entries)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as handle:
+        handle.write(MAGIC)
+        blocks = [_write_block(handle, 'books', books)]
+        for translation, tokenizer, entries in translations:
+            blocks.append(_write_block(handle, translation, entries, tokenizer))
+        _align(handle)
+        header_offset = handle.tell()
+        handle.write(json.dumps({'version': VERSION, 'blocks': blocks}).encode('utf-8'))
+        handle.write(header_offset.to_bytes(8, 'little'))
+    os.replace(temp_path, path)
+    return blocks
+
+
+class SuggestBlock:
+    def __init__(self, buffer, header):
+        self.name = header['name']
+        self.size = header['entries']
+        self.tokenizer = get_tokenizer_by_name(header['tokenizer']) if header['tokenizer'] else None
+        self._buffer = buffer
+        self._sections = header['sections']
+        self.key_offsets = self._array('key_offsets', '<u4')
+        self.label_offsets = self._array('label_offsets', '<u4')
+        self.weights = self._array('weights', '<u4')
+        self.values = self._array('values', '<i4')
+        self.kinds = self._array('kinds', 'u1')
+        self._keys_start = self._sections['keys'][0]
+        self._labels_start = self._sections['labels'][0]
+
+    def _array(self, name, dtype):
+        offset, length = self._sections[name]
+        dtype = np.dtype(dtype)
+        return np.frombuffer(self._buffer, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+
+    def key(self, i):
+        return self._buffer[self._keys_start + int(self.key_offsets[i]):self._keys_start + int(self.key_offsets[i + 1])]
+
+    def label(self, i):
+        start = self._labels_start + int(self.label_offsets[i])
+        return self._buffer[start:self._labels_start + int(self.label_offsets[i + 1])].decode('utf-8')
+
+    def _lower_bound(self, target):
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def fold(self, prefix):
+        if self.tokenizer is None:
+            return fold_name(prefix)
+        return self.tokenizer.normalize(prefix.strip())
+
+    def complete(self, prefix, limit):
+        """Indexes of the heaviest entries whose key starts with the folded prefix, heaviest first"""
+        folded = self.fold(prefix).encode('utf-8')
+        if not folded:
+            return []
+        # No UTF-8 sequence contains 0xff, so this bounds every key with the prefix
+        low = self._lower_bound(folded)
+        high = self._lower_bound(folded + b'\xff')
+        if low == high:
+            return []
+        weights = self.weights[low:high]
+        top = np.arange(high - low)
+        if limit < top.size:
+            top = np.argpartition(-weights.astype(np.int64), limit - 1)[:limit]
+        top = top[np.lexsort((top, -weights[top].astype(np.int64)))]
+        return (top + low).tolist()
+
+
+class SuggestIndex:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a suggest index: {path}")
+        header_offset = int.from_bytes(self._mmap[-8:], 'little')
+        self.header = json.loads(self._mmap[header_offset:len(self._mmap) - 8].decode('utf-8'))
+        if self.header.get('version') != VERSION:
+            raise ValueError(f"Suggest index {path} has version {self.header.get('version')}, expected {VERSION}")
+        blocks = [SuggestBlock(self._mmap, block) for block in self.header['blocks']]
+        self.books = blocks[0]
+        self.translations = {block.name: block for block in blocks[1:]}
+
+    def close(self):
+        self.books = None
+        self.translations = {}
+        self._mmap.close()
+
+    def suggest(self, prefix, translation=None, limit=10):
+        """Book names and, for a translation, its names and terms completing ``prefix``"""
+        books = []
+        seen = set()
+        for i in self.books.complete(prefix, limit * 4):
+            number = int(self.books.values[i])
+            if number in seen:
+                continue  # several names of one book match; keep the heaviest
+            seen.add(number)
+            books.append({'book': number, 'name': BOOK_NAMES.get(number, str(number)), 'match': self.books.label(i)})
+            if len(books) == limit:
+                break
+        terms = []
+        block = self.translations.get(translation)
+        if block is not None:
+            for i in block.complete(prefix, limit):
+                terms.append({'term': block.key(i).decode('utf-8'), 'label': block.label(i),
+                              'kind': KINDS[int(block.kinds[i])], 'weight': int(block.weights[i])})
+        return {'books': books, 'terms': terms}
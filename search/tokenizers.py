@@ -0,0 +1,193 @@
+"""
+Language-aware tokenizers for the search index.
+
+A tokenizer turns a verse into ``(term, start, end)`` tuples, where ``term``
+is the normalized form that is indexed and ``start``/``end`` are character
+offsets into the original verse text. Index builds and queries must agree,
+so the tokenizer name is stored in the index header and readers look it up
+with ``get_tokenizer_by_name``.
+
+Tokenizers are chosen by the language folder name in ``sources/``:
+
+- ``word``     lower-cased words (the default)
+- ``folded``   words with combining marks removed (accents, Syriac vowel
+               points, Coptic and Slavonic supralinear marks)
+- ``hebrew``   folded, plus niqqud/cantillation removal and final letters
+               mapped to their medial forms
+- ``greek``    folded (accents and breathings), final sigma as sigma
+- ``cjk``      overlapping character bigrams over Han and kana runs,
+               ignoring spaces between the characters
+- ``thai``, ``burmese``  bigrams of character clusters (base letter plus
+               its marks) for scripts written without spaces
+
+Each tokenizer is built once per process (``get_tokenizer`` is cached) and
+keeps a per-instance cache of folded words, so indexing every translation
+only folds each distinct word once.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+# Combining marks of the scripts in sources/, kept inside words so offsets stay in the original text
+MARKS = (
+    r'\u0300-\u036f'                      # combining diacritics
+    r'\u0483-\u0489'                      # Cyrillic titlo and friends
+    r'\u0591-\u05bd\u05bf\u05c1\u05c2\u05c4\u05c5\u05c7'  # Hebrew cantillation and niqqud
+    r'\u0610-\u061a\u064b-\u065f\u0670'   # Arabic
+    r'\u0711\u0730-\u074a'                # Syriac
+    r'\u0e31\u0e34-\u0e3a\u0e47-\u0e4e'   # Thai
+    r'\u102b-\u103e\u1056-\u1059\u105e-\u1060\u1062-\u1064\u1067-\u106d\u1071-\u1074\u1082-\u108d\u108f\u109a-\u109d'  # Burmese
+    r'\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\u2de0-\u2dff\ua66f-\ua67d\ufe20-\ufe2f'
+)
+
+_WORD = re.compile(rf"(?:\w|[{MARKS}])+(?:['’](?:\w|[{MARKS}])+)*")
+
+HEBREW_FINALS = {'ך': 'כ', 'ם': 'מ', 'ן': 'נ', 'ף': 'פ', 'ץ': 'צ'}
+GREEK_FINALS = {'ς': 'σ'}
+
+CJK_CHARACTERS = (
+    r'\u3040-\u309f\u30a0-\u30ff\u31f0-\u31ff'   # hiragana, katakana
+    r'\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'   # Han
+    r'\U00020000-\U0002ebef'
+)
+THAI_CHARACTERS = r'\u0e00-\u0e7f'
+BURMESE_CHARACTERS = r'\u1000-\u109f'
+TERM_CACHE_SIZE = 200000
+
+
+class WordTokenizer:
+    name = 'word'
+    # Whether a query word that yields several terms should be matched as a phrase
+    phrase_words = False
+
+    def __init__(self):
+        self._terms = {}
+
+    def normalize(self, word):
+        return unicodedata.normalize('NFC', word).lower()
+
+    def term(self, word):
+        """Normalized form of one word, cached per tokenizer"""
+        term = self._terms.get(word)
+        if term is None:
+            if len(self._terms) >= TERM_CACHE_SIZE:
+                self._terms.clear()
+            term = self._terms[word] = self.normalize(word)
+        return term
+
+    def tokenize(self, text):
+        """(term, start, end) for every word, with offsets into the original text"""
+        tokens = []
+        for match in _WORD.finditer(text):
+            term = self.term(match.group())
+            if term:
+                tokens.append((term, match.start(), match.end()))
+        return tokens
+
+    def terms(self, text):
+        return [term for term, _, _ in self.tokenize(text)]
+
+
+class FoldingTokenizer(WordTokenizer):
+    name = 'folded'
+    char_map = {}
+
+    def __init__(self):
+        super().__init__()
+        self._table = {ord(source): target for source, target in self.char_map.items()}
+
+    def normalize(self, word):
+        # Decompose so accents become separate marks, then drop every mark
+        decomposed = unicodedata.normalize('NFD', word)
+        stripped = ''.join(ch for ch in decomposed if not unicodedata.category(ch).startswith('M'))
+        return unicodedata.normalize('NFC', stripped).lower().translate(self._table)
+
+
+class HebrewTokenizer(FoldingTokenizer):
+    name = 'hebrew'
+    char_map = HEBREW_FINALS
+
+
+class GreekTokenizer(FoldingTokenizer):
+    name = 'greek'
+    char_map = GREEK_FINALS
+
+
+class NgramTokenizer(WordTokenizer):
+    """Overlapping bigrams over runs of a script written without spaces; other text as words"""
+    name = 'cjk'
+    characters = CJK_CHARACTERS
+    phrase_words = True
+
+    def __init__(self):
+        super().__init__()
+        # A unit is one base character with any marks attached to it
+        unit = rf"[{self.characters}][{MARKS}]*"
+        # Runs continue across spaces, which some translations insert between segmented words
+        self._runs = re.compile(rf"(?P<run>{unit}(?:\s*{unit})*)|{_WORD.pattern}")
+        self._units = re.compile(unit)
+
+    def tokenize(self, text):
+        tokens = []
+        for match in self._runs.finditer(text):
+            if match.group('run') is None:
+                term = self.term(match.group())
+                if term:
+                    tokens.append((term, match.start(), match.end()))
+                continue
+            units = list(self._units.finditer(text, match.start(), match.end()))
+            if len(units) == 1:
+                tokens.append((self.term(units[0].group()), units[0].start(), units[0].end()))
+                continue
+            for first, second in zip(units, units[1:]):
+                tokens.append((self.term(first.group() + second.group()), first.start(), second.end()))
+        return tokens
+
+
+class ThaiTokenizer(NgramTokenizer):
+    name = 'thai'
+    characters = THAI_CHARACTERS
+
+
+class BurmeseTokenizer(NgramTokenizer):
+    name = 'burmese'
+    characters = BURMESE_CHARACTERS
+
+
+TOKENIZERS = {
+    tokenizer.name: tokenizer
+    for tokenizer in (WordTokenizer, FoldingTokenizer, HebrewTokenizer, GreekTokenizer,
+                      NgramTokenizer, ThaiTokenizer, BurmeseTokenizer)
+}
+
+# Language folder in sources/ -> tokenizer name; anything else uses 'word'
+LANGUAGE_TOKENIZERS = {
+    'zh-hans': 'cjk',
+    'zh-hant': 'cjk',
+    'lzh': 'cjk',
+    'ja': 'cjk',
+    'th': 'thai',
+    'my': 'burmese',
+    'hbo': 'hebrew',
+    'he': 'hebrew',
+    'grc': 'greek',
+    'el': 'greek',
+    'syr': 'folded',
+    'cop-sa': 'folded',
+    'cu': 'folded',
+    'got': 'folded',
+    'la': 'folded',
+}
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer_by_name(name):
+    if name not in TOKENIZERS:
+        raise ValueError(f"Unknown tokenizer: {name}")
+    return TOKENIZERS[name]()
+
+
+def get_tokenizer(language=None):
+    """Shared tokenizer instance for a language folder name"""
+    return get_tokenizer_by_name(LANGUAGE_TOKENIZERS.get(language, 'word'))
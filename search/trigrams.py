@@ -0,0 +1,382 @@
+"""
+Trigram index for regex and substring search across every translation.
+
+One file (``formats/search/trigrams.idx``) holds a block per translation, so
+it is written one translation at a time and read through a single mmap:
+
+- a fixed magic, then the blocks, then a JSON header listing every block's
+  sections, then the header offset as a little-endian uint64
+- per block: ``keys`` int32 canonical verse keys (sorted), ``text_offsets``
+  uint64 and ``texts`` UTF-8 verse text, ``trigrams`` int64 sorted trigram
+  codes, ``posting_offsets`` uint64 and ``postings`` varint delta-coded verse
+  ids per trigram
+
+Trigrams are taken from the case-folded text, three code points packed into
+one integer. A regex is turned into a boolean query over trigrams that any
+matching verse must satisfy (the literal runs it requires, see
+``regex_query``); only the verses passing that filter are handed to ``re``.
+Folding the case only ever admits extra candidates, so case-sensitive
+patterns are still filtered correctly.
+
+Patterns are checked before they run (``check_pattern``): they are capped
+in length, and a repeat of something that itself repeats, like ``(a+)+``
+or ``(.*a){20}``, is refused because ``re`` can backtrack through it for
+exponential time.
+"""
+
+import json
+import mmap
+import os
+import re
+
+try:
+    # The regex parser moved into the re package in Python 3.11
+    import re._parser as sre_parse
+    from re._constants import (ASSERT, ASSERT_NOT, AT, ATOMIC_GROUP, BRANCH, GROUPREF_EXISTS, IN, LITERAL,
+                               MAX_REPEAT, MIN_REPEAT, POSSESSIVE_REPEAT, RANGE, SUBPATTERN)
+except ImportError:
+    import sre_parse
+    from sre_constants import (ASSERT, ASSERT_NOT, AT, BRANCH, GROUPREF_EXISTS, IN, LITERAL, MAX_REPEAT,
+                               MIN_REPEAT, RANGE, SUBPATTERN)
+    ATOMIC_GROUP = POSSESSIVE_REPEAT = None  # both arrived with re._parser in 3.11
+
+import numpy as np
+
+from search import varint
+from search.index import sorted_intersect
+
+MAGIC = b'BIBLTRI1'
+VERSION = 1
+MAX_ALTERNATIVES = 64      # literal strings tracked per run before giving up on the run
+MAX_CLASS_SIZE = 16        # largest character class expanded into alternatives
+MAX_PATTERN_LENGTH = 256
+
+# Query nodes: ('all',) matches everything, ('tri', code), ('and', [...]), ('or', [...])
+ALL = ('all',)
+
+
+def pack(a, b, c):
+    return (a << 42) | (b << 21) | c
+
+
+def string_trigrams(text):
+    """Trigram codes of a (case-folded) string"""
+    codes = [ord(ch) for ch in text]
+    return {pack(*codes[i:i + 3]) for i in range(len(codes) - 2)}
+
+
+def _and(nodes):
+    nodes = [node for node in nodes if node is not ALL]
+    if not nodes:
+        return ALL
+    return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+
+def _or(nodes):
+    if not nodes or any(node is ALL for node in nodes):
+        return ALL
+    return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+
+def _strings_query(strings):
+    """Query requiring one of the literal strings; strings shorter than a trigram constrain nothing"""
+    if not strings or any(len(string) < 3 for string in strings):
+        return ALL
+    return _or([_and([('tri', code) for code in sorted(string_trigrams(string))]) for string in strings])
+
+
+def _class_chars(items):
+    """Characters of a small positive character class, or None"""
+    chars = set()
+    for op, value in items:
+        if op == LITERAL:
+            chars.add(chr(value))
+        elif op == RANGE and value[1] - value[0] < MAX_CLASS_SIZE:
+            chars.update(chr(code) for code in range(value[0], value[1] + 1))
+        else:
+            return None  # NEGATE, CATEGORY or a wide range
+    return chars if len(chars) <= MAX_CLASS_SIZE else None
+
+
+class _Run:
+    """The literal alternatives of the current run of adjacent fixed-width items"""
+
+    def __init__(self):
+        self.strings = {''}
+        self.required = []
+
+    def extend(self, alternatives):
+        alternatives = {alternative.casefold() for alternative in alternatives}
+        if len(self.strings) * len(alternatives) > MAX_ALTERNATIVES:
+            self.flush()
+        self.strings = {string + alternative for string in self.strings for alternative in alternatives}
+
+    def flush(self):
+        self.required.append(_strings_query(self.strings))
+        self.strings = {''}
+
+    def add(self, query):
+        self.flush()
+        self.required.append(query)
+
+
+def _analyze(items):
+    """(exact literal alternatives or None, query) for a parsed sequence"""
+    run = _Run()
+    exact = True
+    for op, value in items:
+        if op == LITERAL:
+            run.extend({chr(value)})
+        elif op == AT:
+            continue  # anchors and \b take no characters, so the literals around them stay adjacent
+        elif op == IN and _class_chars(value) is not None:
+            run.extend(_class_chars(value))
+        elif op == SUBPATTERN:
+            alternatives, query = _analyze(value[-1])
+            if alternatives is not None:
+                run.extend(alternatives)
+            else:
+                run.add(query)
+                exact = False
+        elif op == BRANCH:
+            branches = [_analyze(branch) for branch in value[1]]
+            if all(alternatives is not None for alternatives, _ in branches):
+                run.extend(set().union(*(alternatives for alternatives, _ in branches)))
+            else:
+                run.add(_or([query for _, query in branches]))
+                exact = False
+        elif op in (MAX_REPEAT, MIN_REPEAT):
+            low, high, sub = value
+            alternatives, query = _analyze(sub)
+            if alternatives is not None and low == high and low <= 4:
+                for _ in range(low):
+                    run.extend(alternatives)
+                continue
+            # At least one copy is required when low > 0, but the run around it is broken
+            run.add(query if low > 0 else ALL)
+            exact = False
+        else:
+            # ANY, CATEGORY, NOT_LITERAL, negated or wide classes, backreferences...
+            run.flush()
+            exact = False
+    if exact and not run.required:
+        return run.strings, _strings_query(run.strings)
+    run.flush()
+    return None, _and(run.required)
+
+
+def _nested_repeat(items, repeated=False):
+    """Whether a parsed sequence has a variable repeat inside another repeat (inside one already, if repeated)"""
+    for op, value in items:
+        if op in (MAX_REPEAT, MIN_REPEAT, POSSESSIVE_REPEAT):
+            low, high, sub = value
+            if high != low and repeated:
+                return True
+            if _nested_repeat(sub, repeated or high > 1):
+                return True
+        elif op in (SUBPATTERN, ASSERT, ASSERT_NOT):
+            # Groups are (group, add_flags, del_flags, pattern), lookarounds (direction, pattern)
+            if _nested_repeat(value[-1], repeated):
+                return True
+        elif op == ATOMIC_GROUP:
+            if _nested_repeat(value, repeated):
+                return True
+        elif op == BRANCH:
+            if any(_nested_repeat(branch, repeated) for branch in value[1]):
+                return True
+        elif op == GROUPREF_EXISTS:
+            # (?(1)yes|no)
+            if any(branch is not None and _nested_repeat(branch, repeated) for branch in value[1:]):
+                return True
+    return False
+
+
+def check_pattern(pattern, literal=False):
+    """The regex to run for a search pattern, raising ValueError (or re.error) if it is refused"""
+    if len(pattern) > MAX_PATTERN_LENGTH:
+        raise ValueError(f"Pattern longer than {MAX_PATTERN_LENGTH} characters")
+    if literal:
+        return re.escape(pattern)
+    if _nested_repeat(sre_parse.parse(pattern)):
+        raise ValueError("Nested quantifiers such as (a+)+ are not supported")
+    return pattern
+
+
+def regex_query(pattern):
+    """Trigram query that every match of ``pattern`` satisfies"""
+    return _analyze(sre_parse.parse(pattern))[1]
+
+
+def _align(handle):
+    handle.write(b'\0' * (-handle.tell() % 8))
+
+
+def _write_section(handle, sections, name, data):
+    _align(handle)
+    sections[name] = [handle.tell(), len(data)]
+    handle.write(data)
+
+
+def _block_postings(texts):
+    """Sorted trigram codes, and the encoded verse ids of each, for one translation"""
+    folded = [text.casefold() for text in texts]
+    lengths = np.fromiter((len(text) for text in folded), dtype=np.int64, count=len(folded))
+    codes = np.frombuffer('\0'.join(folded).encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+    doc_of_char = np.repeat(np.arange(len(folded)), lengths + 1)[:codes.size]
+    if codes.size < 3:
+        return np.zeros(0, dtype=np.int64), np.zeros(1, dtype=np.uint64), b''
+    trigrams = pack(codes[:-2], codes[1:-1], codes[2:])
+    # Trigrams spanning the separator between two verses are not real
+    valid = (codes[:-2] != 0) & (codes[1:-1] != 0) & (codes[2:] != 0)
+    trigrams = trigrams[valid]
+    docs = doc_of_char[:-2][valid]
+    # A stable sort by trigram keeps each trigram's verses in order; then drop repeats within a verse
+    order = np.argsort(trigrams, kind='stable')
+    trigrams, docs = trigrams[order], docs[order]
+    keep = np.ones(trigrams.size, dtype=bool)
+    keep[1:] = (trigrams[1:] != trigrams[:-1]) | (docs[1:] != docs[:-1])
+    trigrams, docs = trigrams[keep], docs[keep]
+
+    starts = np.flatnonzero(np.concatenate(([True], trigrams[1:] != trigrams[:-1])))
+    gaps = np.diff(docs, prepend=0)
+    gaps[starts] = docs[starts]
+    counts = np.diff(np.append(starts, trigrams.size))
+    byte_lengths = varint.run_byte_lengths(gaps, counts)
+    offsets = np.concatenate(([0], np.cumsum(byte_lengths))).astype(np.uint64)
+    return trigrams[starts], offsets, varint.encode(gaps)
+
+
+def write_trigram_index(path, translations):
+    """Write the index from an iterable of (translation, language, [(canonical key, text), ...])"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = path + '.tmp'
+    blocks = []
+    with open(temp_path, 'wb') as handle:
+        handle.write(MAGIC)
+        for translation, language, documents in translations:
+            documents = sorted(documents)
+            texts = [text for _, text in documents]
+            encoded = [text.encode('utf-8') for text in texts]
+            text_offsets = np.concatenate(([0], np.cumsum([len(data) for data in encoded]))).astype('<u8')
+            trigrams, posting_offsets, postings = _block_postings(texts)
+            sections = {}
+            _write_section(handle, sections, 'keys', np.asarray([key for key, _ in documents], dtype='<i4').tobytes())
+            _write_section(handle, sections, 'text_offsets', text_offsets.tobytes())
+            _write_section(handle, sections, 'texts', b''.join(encoded))
+            _write_section(handle, sections, 'trigrams', trigrams.astype('<i8').tobytes())
+            _write_section(handle, sections, 'posting_offsets', posting_offsets.astype('<u8').tobytes())
+            _write_section(handle, sections, 'postings', postings)
+            blocks.append({'translation': translation, 'language': language, 'documents': len(documents),
+                           'trigrams': int(trigrams.size), 'sections': sections})
+        _align(handle)
+        header_offset = handle.tell()
+        handle.write(json.dumps({'version': VERSION, 'blocks': blocks}).encode('utf-8'))
+        handle.write(header_offset.to_bytes(8, 'little'))
+    os.replace(temp_path, path)
+    return blocks
+
+
+class TrigramBlock:
+    """The part of the trigram index covering one translation"""
+
+    def __init__(self, buffer, header):
+        self.translation = header['translation']
+        self.language = header['language']
+        self.documents = header['documents']
+        self._buffer = buffer
+        self._sections = header['sections']
+        self.keys = self._array('keys', '<i4')
+        self.text_offsets = self._array('text_offsets', '<u8')
+        self.trigrams = self._array('trigrams', '<i8')
+        self.posting_offsets = self._array('posting_offsets', '<u8')
+        self._texts_start = self._sections['texts'][0]
+        self._postings_start = self._sections['postings'][0]
+
+    def _array(self, name, dtype):
+        offset, length = self._sections[name]
+        dtype = np.dtype(dtype)
+        return np.frombuffer(self._buffer, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+
+    def text(self, doc):
+        start = self._texts_start + int(self.text_offsets[doc])
+        end = self._texts_start + int(self.text_offsets[doc + 1])
+        return self._buffer[start:end].decode('utf-8')
+
+    def docs(self, code):
+        """Sorted verse ids containing a trigram"""
+        index = int(np.searchsorted(self.trigrams, code))
+        if index == self.trigrams.size or self.trigrams[index] != code:
+            return np.zeros(0, dtype=np.int64)
+        start = self._postings_start + int(self.posting_offsets[index])
+        end = self._postings_start + int(self.posting_offsets[index + 1])
+        return varint.decode_deltas(self._buffer[start:end])
+
+    def candidates(self, query):
+        """Sorted verse ids that may match, or None when the query does not narrow anything"""
+        kind = query[0]
+        if kind == 'all':
+            return None
+        if kind == 'tri':
+            return self.docs(query[1])
+        if kind == 'and':
+            result = None
+            for node in query[1]:
+                docs = self.candidates(node)
+                if docs is None:
+                    continue
+                result = docs if result is None else sorted_intersect(result, docs)
+                if result.size == 0:
+                    break
+            return result
+        parts = [self.candidates(node) for node in query[1]]
+        if any(part is None for part in parts):
+            return None
+        return np.unique(np.concatenate(parts))
+
+
+class TrigramIndex:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a trigram index: {path}")
+        header_offset = int.from_bytes(self._mmap[-8:], 'little')
+        self.header = json.loads(self._mmap[header_offset:len(self._mmap) - 8].decode('utf-8'))
+        if self.header.get('version') != VERSION:
+            raise ValueError(f"Trigram index {path} has version {self.header.get('version')}, expected {VERSION}")
+        self.blocks = {block['translation']: TrigramBlock(self._mmap, block) for block in self.header['blocks']}
+
+    def translations(self):
+        return list(self.blocks)
+
+    def close(self):
+        self.blocks = {}
+        self._mmap.close()
+
+    def search(self, pattern, translations=None, limit=100, ignore_case=True, literal=False):
+        """Verses matching a regex (or a literal substring) in the given translations, in canonical order
+
+        Returns ``(matches, candidates, truncated)`` where ``matches`` is a list of
+        (translation, canonical key, text, [(start, end), ...]) and ``candidates``
+        counts the verses the regex actually ran on.
+        """
+        pattern = check_pattern(pattern, literal)
+        compiled = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        query = regex_query(pattern)
+        matches = []
+        checked = 0
+        for translation in translations or self.blocks:
+            block = self.blocks.get(translation)
+            if block is None:
+                continue
+            docs = block.candidates(query)
+            for doc in (range(block.documents) if docs is None else docs.tolist()):
+                checked += 1
+                text = block.text(doc)
+                spans = [match.span() for match in compiled.finditer(text) if match.end() > match.start()]
+                if spans:
+                    if len(matches) == limit:
+                        return matches, checked, True
+                    matches.append((translation, int(block.keys[doc]), text, spans))
+        return matches, checked, False
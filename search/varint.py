@@ -0,0 +1,94 @@
+"""
+Vectorized LEB128 varint coding for postings streams.
+
+Each value is stored in 7-bit groups, least significant first, with the high
+bit set on every byte except the last. Encoding and decoding work on whole
+NumPy arrays at once, so a postings list of tens of thousands of entries is
+decoded without a Python-level loop.
+"""
+
+import numpy as np
+
+MAX_BYTES = 5  # enough for any uint32
+
+
+def encoded_sizes(values):
+    """Number of bytes each value takes when varint encoded"""
+    values = np.asarray(values, dtype=np.uint64)
+    sizes = np.ones(values.size, dtype=np.int64)
+    for shift in range(1, MAX_BYTES):
+        sizes += values >= (1 << (7 * shift))
+    return sizes
+
+
+def encode(values):
+    """Encode a sequence of non-negative integers (< 2**32) as varint bytes"""
+    values = np.asarray(values, dtype=np.uint64)
+    if values.size == 0:
+        return b''
+    sizes = encoded_sizes(values)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    out = np.zeros(int(sizes.sum()), dtype=np.uint8)
+    for shift in range(MAX_BYTES):
+        present = sizes > shift
+        if not present.any():
+            break
+        group = (values[present] >> np.uint64(7 * shift)) & np.uint64(0x7F)
+        more = (sizes[present] > shift + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[present] + shift] = (group | more).astype(np.uint8)
+    return out.tobytes()
+
+
+def decode(buffer):
+    """Decode varint bytes into a uint32 array"""
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    if data.size == 0:
+        return np.zeros(0, dtype=np.uint32)
+    ends = np.flatnonzero(data < 0x80)
+    if ends.size == data.size:
+        # Every value fits in one byte, the common case for gaps and frequencies
+        return data.astype(np.uint32)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    # Fold in the 7-bit groups from the most significant (last byte) down
+    values = data[ends].astype(np.uint32)
+    for shift in range(1, MAX_BYTES):
+        longer = np.flatnonzero(ends - shift >= starts)
+        if longer.size == 0:
+            break
+        values[longer] = (values[longer] << 7) | (data[ends[longer] - shift] & 0x7F)
+    return values
+
+
+def run_byte_lengths(values, run_lengths):
+    """Encoded byte length of each consecutive run of ``run_lengths[i]`` values"""
+    run_lengths = np.asarray(run_lengths, dtype=np.int64)
+    sizes = np.concatenate(([0], np.cumsum(encoded_sizes(values))))
+    ends = np.cumsum(run_lengths)
+    return sizes[ends] - sizes[ends - run_lengths]
+
+
+def encode_deltas(values):
+    """Delta-encode a sorted sequence, then varint-encode the gaps"""
+    values = np.asarray(values, dtype=np.int64)
+    if values.size == 0:
+        return b''
+    return encode(np.diff(values, prepend=0))
+
+
+def decode_deltas(buffer):
+    """Inverse of encode_deltas"""
+    return np.cumsum(decode(buffer), dtype=np.int64)
+
+
+def decode_segmented_deltas(buffer, lengths):
+    """Decode delta runs that restart at zero every ``lengths[i]`` values (e.g. positions per verse)"""
+    gaps = decode(buffer).astype(np.int64)
+    if gaps.size == 0:
+        return gaps
+    totals = np.cumsum(gaps)
+    # Subtract the running total reached before each segment started
+    segment_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    base = np.concatenate(([0], totals))[segment_starts]
+    return totals - np.repeat(base, lengths)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Make the repository's packages and top-level scripts importable from the tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
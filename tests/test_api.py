@@ -0,0 +1,230 @@
+import asyncio
+import json
+import os
+import sqlite3
+
+import pytest
+
+from api.cache import ChapterCache, etag_matches
+from api.parallel import merge_join
+from api.pool import ReadOnlyPool
+from api.server import MAX_BODY_BYTES, BibleAPI
+from api.store import BibleStore
+
+GENESIS_1 = ["In the beginning God created the heaven and the earth.", "And the earth was without form."]
+GENESIS_2 = ["Thus the heavens and the earth were finished.", "And on the seventh day God ended his work.",
+             "And God blessed the seventh day."]
+
+
+def write_db(path, translation, chapters, title=None):
+    """A formats/sqlite style database: {(book name, chapter): [verse texts]}"""
+    temp_path = str(path) + '.tmp'
+    conn = sqlite3.connect(temp_path)
+    conn.execute('CREATE TABLE translations (translation TEXT, title TEXT, license TEXT)')
+    conn.execute('INSERT INTO translations VALUES (?, ?, ?)', (translation, f"# {title or translation}", 'PD'))
+    conn.execute(f'CREATE TABLE "{translation}_books" (id INTEGER PRIMARY KEY, name TEXT)')
+    conn.execute(f'CREATE TABLE "{translation}_verses" '
+                 '(id INTEGER PRIMARY KEY, book_id INTEGER, chapter INTEGER, verse INTEGER, text TEXT)')
+    books = {}
+    for (name, chapter), verses in chapters.items():
+        if name not in books:
+            books[name] = len(books) + 1
+            conn.execute(f'INSERT INTO "{translation}_books" VALUES (?, ?)', (books[name], name))
+        for verse, text in enumerate(verses, 1):
+            conn.execute(f'INSERT INTO "{translation}_verses" (book_id, chapter, verse, text) VALUES (?, ?, ?, ?)',
+                         (books[name], chapter, verse, text))
+    conn.commit()
+    conn.close()
+    # Replaced in one step, as a rebuild would, with a new modification time
+    os.replace(temp_path, path)
+
+
+@pytest.fixture
+def sqlite_directory(tmp_path):
+    write_db(tmp_path / 'A.db', 'A', {('Genesis', 1): GENESIS_1, ('Genesis', 2): GENESIS_2})
+    write_db(tmp_path / 'B.db', 'B', {('Genesis', 1): [text.upper() for text in GENESIS_1]})
+    return tmp_path
+
+
+@pytest.fixture
+def api(sqlite_directory):
+    api = BibleAPI(str(sqlite_directory), workers=2)
+    yield api
+    api.close()
+
+
+def get(api, path, headers=None):
+    response = asyncio.run(api.dispatch('GET', path, headers or {}))
+    body = json.loads(response.body) if response.body else None
+    return response, body
+
+
+# cache
+
+def test_cache_evicts_least_recently_used_by_bytes():
+    cache = ChapterCache(max_bytes=10)
+    cache.put(('A', 1, 1), b'aaaa', '"1"')
+    cache.put(('A', 1, 2), b'bbbb', '"2"')
+    cache.get(('A', 1, 1))
+    cache.put(('A', 1, 3), b'cccc', '"3"')
+    assert cache.get(('A', 1, 2)) is None
+    assert cache.get(('A', 1, 1)).body == b'aaaa'
+    assert cache.current_bytes == 8
+    cache.put(('A', 1, 4), b'x' * 11, '"4"')  # larger than the whole budget: not cached
+    assert cache.get(('A', 1, 4)) is None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_cache_discards_a_translation_and_its_parallel_views():
+    cache = ChapterCache()
+    cache.put(('A', 1, 1), b'a', '"1"')
+    cache.put(('B', 1, 1), b'b', '"2"')
+    cache.put(('parallel', ('A', 'B'), 1, 1), b'ab', '"3"')
+    cache.discard_translation('A')
+    assert cache.get(('A', 1, 1)) is None
+    assert cache.get(('parallel', ('A', 'B'), 1, 1)) is None
+    assert cache.get(('B', 1, 1)).body == b'b'
+    assert cache.current_bytes == 1
+
+
+@pytest.mark.parametrize('header, matches', [
+    (None, False), ('"abc"', True), ('W/"abc"', True), ('"x", "abc"', True), ('*', True), ('"abd"', False),
+])
+def test_etag_matches(header, matches):
+    assert bool(etag_matches(header, '"abc"')) == matches
+
+
+# pool
+
+def test_pool_reuses_connections_and_replaces_them_after_reset(sqlite_directory):
+    pool = ReadOnlyPool(str(sqlite_directory / 'A.db'), size=2)
+    with pool.connection() as first:
+        with pool.connection() as second:
+            assert first is not second
+    with pool.connection() as conn:
+        assert conn in (first, second)
+        pool.reset()
+    with pool.connection() as after:
+        assert after not in (first, second)
+        assert after.execute('SELECT count(*) FROM A_verses').fetchone() == (5,)
+    with pytest.raises(sqlite3.OperationalError):
+        with pool.connection() as conn:
+            conn.execute('DELETE FROM A_verses')
+    pool.close()
+
+
+# store
+
+def test_store_reads_chapters_books_and_passages(sqlite_directory):
+    store = BibleStore(str(sqlite_directory), pool_size=2)
+    assert [metadata['title'] for metadata in store.translations()] == ['A', 'B']
+    assert store.books('A') == [{'id': 1, 'name': 'Genesis', 'chapters': 2}]
+    assert store.chapter('A', 1, 2) == list(enumerate(GENESIS_2, 1))
+    assert store.chapter('A', 1, 3) is None
+    assert store.passage('A', 1001002, 1002001) == [(1001002, GENESIS_1[1]), (1002001, GENESIS_2[0])]
+    assert store.get('C') is None
+    store.close()
+
+
+def test_store_reindexes_a_rebuilt_file(sqlite_directory):
+    store = BibleStore(str(sqlite_directory), pool_size=2)
+    db = store.get('A')
+    db.ensure_index()
+    etag, version = db.chapter_etag(1, 1), db.version
+    assert not db.is_stale()
+    write_db(sqlite_directory / 'A.db', 'A', {('Genesis', 1): ['Rebuilt.']})
+    assert db.is_stale()
+    assert store.chapter('A', 1, 1) == [(1, 'Rebuilt.')]
+    assert db.chapter_etag(1, 1) != etag and db.version == version + 1
+    assert db.chapter_etag(1, 2) is None
+    store.close()
+
+
+# server
+
+def test_chapter_etag_and_conditional_request(api):
+    response, body = get(api, '/translations/A/1/1')
+    assert response.status == 200
+    assert [verse['text'] for verse in body['verses']] == GENESIS_1
+    etag = response.headers['ETag']
+    response, _ = get(api, '/translations/A/1/1', {'if-none-match': etag})
+    assert response.status == 304
+    assert get(api, '/translations/A/1/1')[0].body == get(api, '/translations/A/1/1')[0].body
+    assert api.cache.stats()['hits'] >= 1
+    assert get(api, '/translations/A/1/9')[0].status == 404
+    assert get(api, '/translations/C/1/1')[0].status == 404
+    assert get(api, '/translations/A/x/1')[0].status == 400
+
+
+def test_rebuilt_database_is_served_fresh(api, sqlite_directory):
+    response, _ = get(api, '/translations/A/1/1')
+    etag = response.headers['ETag']
+    write_db(sqlite_directory / 'A.db', 'A', {('Genesis', 1): ['Rebuilt.']})
+    response, body = get(api, '/translations/A/1/1', {'if-none-match': etag})
+    assert response.status == 200
+    assert body['verses'] == [{'verse': 1, 'text': 'Rebuilt.'}]
+    _, body = get(api, '/parallel/1/1?translations=A,B')
+    assert body['verses'][0]['texts'] == {'A': 'Rebuilt.', 'B': GENESIS_1[0].upper()}
+
+
+def test_passage(api):
+    response, body = get(api, '/translations/A/passage?ref=Gen 1:2-2:1')
+    assert response.status == 200
+    assert body['passages'][0]['reference'] == 'Genesis 1:2-2:1'
+    assert [verse['text'] for verse in body['passages'][0]['verses']] == [GENESIS_1[1], GENESIS_2[0]]
+    assert get(api, '/translations/A/passage?ref=Gen 1:1-1500')[0].status == 400
+    assert get(api, '/translations/A/passage')[0].status == 400
+
+
+def test_parallel_chapter(api):
+    response, body = get(api, '/parallel/1/2?translations=A,B')
+    assert response.status == 200
+    assert body['verses'][0] == {'verse': 1, 'texts': {'A': GENESIS_2[0], 'B': None}}
+    assert get(api, '/parallel/1/9?translations=A,B')[0].status == 404
+    assert get(api, '/parallel/1/1')[0].status == 400
+
+
+def test_parallel_merge_join():
+    merged = merge_join([[(1, 'a1'), (3, 'a3')], [(1, 'b1'), (2, 'b2')]])
+    assert merged == [(1, ['a1', 'b1']), (2, [None, 'b2']), (3, ['a3', None])]
+
+
+@pytest.mark.parametrize('boost', ['inf', '-inf', 'nan', 'x'])
+def test_search_refuses_a_boost_that_is_not_a_finite_number(api, boost):
+    assert get(api, f'/search?q=light&translation=A&boost={boost}')[0].status == 400
+    assert get(api, f'/search?q=light&translations=A,B&boost={boost}')[0].status == 400
+
+
+def test_missing_indexes_are_reported(api):
+    assert get(api, '/suggest?q=gen')[0].status == 404
+    assert get(api, '/search/regex?pattern=light')[0].status == 404
+
+
+def raw_request(api, request):
+    async def exchange():
+        server = await api.start('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(request)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+    return asyncio.run(exchange())
+
+
+@pytest.mark.parametrize('length, status', [
+    ('abc', b'400'), ('-1', b'400'), (str(MAX_BODY_BYTES + 1), b'413'), ('99999999999', b'413'),
+])
+def test_bad_content_length_is_refused(api, length, status):
+    response = raw_request(api, f"GET /translations HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+    assert response.startswith(b'HTTP/1.1 ' + status)
+
+
+def test_small_body_is_drained_and_the_connection_kept(api):
+    request = (b"GET /translations HTTP/1.1\r\nContent-Length: 3\r\n\r\nabc"
+               b"GET /translations/A/books HTTP/1.1\r\nConnection: close\r\n\r\n")
+    response = raw_request(api, request)
+    assert response.count(b'HTTP/1.1 200 OK') == 2
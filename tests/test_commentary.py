@@ -0,0 +1,159 @@
+import contextlib
+import io
+import os
+import random
+
+import pytest
+from bs4 import BeautifulSoup
+
+from download_complete_mhcc import iter_blocks, match_book, segment_books
+from mhc_export import merge_join
+from mhcc_extract import BookSplitter, extract_books_from_mhcc
+from versification.canon import BOOKS
+
+
+def quiet(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args)
+
+
+# merge-join of verses and commentary segments
+
+def test_merge_join_matches_brute_force():
+    rng = random.Random(0)
+    verses = [(1001000 + verse, f"verse {verse}") for verse in range(1, 200) if rng.random() < 0.8]
+    segments = []
+    for segment_id in range(60):
+        start = 1001000 + rng.randint(0, 210)
+        segments.append((segment_id, start, start + rng.randint(0, 15), f"Verses {segment_id}", "text"))
+    segments.sort(key=lambda segment: (segment[1], segment[2], segment[0]))
+
+    records = list(merge_join(verses, segments))
+
+    joined = [record for record in records if record[0] == 'verse']
+    assert [(key, text) for _, key, text, _ in joined] == verses
+    for _, key, _, segment_ids in joined:
+        assert segment_ids == sorted(s[0] for s in segments if s[1] <= key <= s[2])
+    # Every segment is written once, before the first verse it covers
+    emitted = [record[1] for record in records if record[0] == 'commentary']
+    assert sorted(emitted) == sorted(segments)
+    position = {record[1][0]: i for i, record in enumerate(records) if record[0] == 'commentary'}
+    for i, record in enumerate(records):
+        if record[0] == 'verse':
+            assert all(position[segment_id] < i for segment_id in record[3])
+
+
+def test_merge_join_without_segments_or_verses():
+    assert list(merge_join([(1001001, 'a')], [])) == [('verse', 1001001, 'a', [])]
+    segment = (1, 1001001, 1001005, 'Verses 1–5', 'text')
+    assert list(merge_join([], [segment])) == [('commentary', segment)]
+
+
+# mhcc.doc splitting
+
+def mhcc_document(books):
+    parts = ['<html><head><title>MHCC</title><meta charset="utf-8"></head><body>',
+             '<p>Front matter outside the section</p><div class="Section1">\n']
+    for name, paragraphs in books:
+        parts.append(f'<p class="div1"><a name="{name}"></a><span>{name}</span></p>\n')
+        parts.extend(f'<p class="MsoNormal">{paragraph} &amp; more</p>\n' for paragraph in paragraphs)
+    parts.append('</div><p>Back matter</p></body></html>')
+    return ''.join(parts)
+
+
+def split_chunks(document, output_directory, chunk_size):
+    splitter = BookSplitter(str(output_directory))
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(0, len(document), chunk_size):
+            splitter.feed(document[i:i + chunk_size])
+        splitter.close()
+    return splitter
+
+
+@pytest.mark.parametrize('chunk_size', [7, 64 * 1024])
+def test_book_splitter_writes_one_file_per_book(tmp_path, chunk_size):
+    books = [('Genesis', ['In the beginning', 'Adam']), ('1 John', ['God is light']), ('Revelation', ['Amen'])]
+    splitter = split_chunks(mhcc_document(books), tmp_path, chunk_size)
+
+    assert splitter.found_section
+    assert [os.path.basename(path) for path in splitter.books] == ['Genesis.html', '1 John.html', 'Revelation.html']
+    for name, paragraphs in books:
+        html = (tmp_path / f"{name}.html").read_text(encoding='utf-8')
+        assert html.startswith('<html>\n<head><title>MHCC</title><meta charset="utf-8"></head>\n<body>\n')
+        assert html.endswith('\n</body>\n</html>')
+        soup = BeautifulSoup(html, 'html.parser')
+        assert soup.find('p', class_='div1').get_text(strip=True) == name
+        assert [p.get_text() for p in soup.find_all('p', class_='MsoNormal')] == \
+            [f"{paragraph} & more" for paragraph in paragraphs]
+        assert 'Front matter' not in html and 'Back matter' not in html
+
+
+def test_extract_books_without_section(tmp_path):
+    source = tmp_path / 'mhcc.doc'
+    source.write_text('<html><body><p class="div1">Genesis</p></body></html>', encoding='utf-8')
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        extract_books_from_mhcc(str(source), str(tmp_path / 'books'))
+    assert "Could not find the main content" in output.getvalue()
+    assert os.listdir(tmp_path / 'books') == []
+
+
+def test_extract_books_reads_latin1(tmp_path):
+    source = tmp_path / 'mhcc.doc'
+    source.write_bytes(mhcc_document([('Genesis', ['Caf\xe9 text']), ('Exodus', ['x'])]).encode('latin-1'))
+    quiet(extract_books_from_mhcc, str(source), str(tmp_path / 'books'))
+    assert sorted(os.listdir(tmp_path / 'books')) == ['Exodus.html', 'Genesis.html']
+    assert 'Caf\xe9 text' in (tmp_path / 'books' / 'Genesis.html').read_text(encoding='utf-8')
+
+
+# MHCC book segmentation
+
+@pytest.mark.parametrize('heading, book', [
+    ('Genesis', 'Genesis'),
+    ('The First Epistle of John', '1 John'),
+    ('Third John', '3 John'),
+    ('II Kings', '2 Kings'),
+    ('The Gospel According to St. John', 'John'),
+    ('The Epistle of Paul the Apostle to the Romans', 'Romans'),
+    ('The Revelation of St. John the Divine', 'Revelation'),
+    ('Song of Solomon', 'Song of Solomon'),
+    ('Psalm 23', 'Psalms'),
+    ('Ecclesiastes; or, the Preacher', 'Ecclesiastes'),
+    ('The First Book of Moses, called Genesis', 'Genesis'),
+    ('THE FIFTH BOOK OF MOSES, CALLED DEUTERONOMY', 'Deuteronomy'),
+    ('The First Book of Samuel, otherwise called the First Book of the Kings', '1 Samuel'),
+    ('The Book of Moses', None),
+    ('John the Baptist beheaded', None),
+    ('Mark the perfect man', None),
+    ('Verses 1–4', None),
+    ('Contents', None),
+])
+def test_match_book(heading, book):
+    assert match_book(heading) == book
+
+
+def test_iter_blocks_keeps_loose_text_in_order():
+    html = ('<div id="theText"><h2>Genesis</h2><div>Loose before <p>Inner paragraph</p> loose <b>after</b>'
+            '<div>Innermost</div><!-- comment --></div><p>Outer paragraph</p>ignored root text</div>')
+    content = BeautifulSoup(html, 'html.parser').find('div', id='theText')
+    assert list(iter_blocks(content)) == [
+        ('h2', 'Genesis'), ('div', 'Loose before'), ('p', 'Inner paragraph'), ('div', 'loose after'),
+        ('div', 'Innermost'), ('p', 'Outer paragraph'),
+    ]
+
+
+def test_segment_books_finds_every_book():
+    parts = ['<div id="theText">']
+    for number, osis, name, aliases in BOOKS[:66]:
+        parts.append(f'<h2>{name}</h2><div><p>Commentary on {name}, which mentions John and Genesis in passing.</p>'
+                     f'Loose text directly in the {name} container, long enough to keep.</div>')
+        parts.append('<h3>John the Baptist beheaded</h3>')
+    parts.append('</div>')
+    content = BeautifulSoup(''.join(parts), 'html.parser').find('div', id='theText')
+
+    commentaries = quiet(segment_books, content, 30, 50)
+
+    assert [entry['book'] for entry in commentaries] == [name for _, _, name, _ in BOOKS[:66]]
+    john = commentaries[42]['commentary'].split('\n\n')
+    assert john == ['Commentary on John, which mentions John and Genesis in passing.',
+                    'Loose text directly in the John container, long enough to keep.']
@@ -0,0 +1,39 @@
+import contextlib
+import io
+import json
+
+import pytest
+
+from mhc_crawler import Crawler, start_standin_server
+
+
+@pytest.fixture
+def standin(tmp_path):
+    html_dir = tmp_path / 'html'
+    (html_dir / 'Genesis').mkdir(parents=True)
+    for chapter in (1, 2, 3):
+        (html_dir / 'Genesis' / f"Chapter_{chapter}.html").write_text(f"<p>Genesis {chapter}</p>", encoding='utf-8')
+    server, base_url = start_standin_server(str(html_dir))
+    yield base_url
+    server.shutdown()
+    server.server_close()
+
+
+def test_a_failing_handler_only_loses_its_own_page(standin, tmp_path):
+    urls = [f"{standin}/mhcc.ii.{chapter}.html" for chapter in ('i', 'ii', 'iii', 'iv')]
+
+    def handler(url, response):
+        if url.endswith('.ii.html'):
+            raise OSError("disk full")
+        return response.text
+
+    state_file = tmp_path / 'state.json'
+    crawler = Crawler(rate=100, burst=100, concurrency=2, retries=0, state_file=str(state_file))
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = crawler.run(urls, handler)
+
+    assert results == {urls[0]: "<p>Genesis 1</p>", urls[2]: "<p>Genesis 3</p>"}
+    failed = json.loads(state_file.read_text(encoding='utf-8'))['failed']
+    assert sorted(failed) == [urls[1], urls[3]]
+    assert 'OSError: disk full' in failed[urls[1]]
+    assert 'HTTP 404' in failed[urls[3]]
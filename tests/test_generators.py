@@ -0,0 +1,68 @@
+import contextlib
+import io
+import json
+import os
+
+import pytest
+
+from generators.static.static_generator import StaticGenerator, brotli
+
+
+def write_translation(source_directory, translation, chapters):
+    directory = source_directory / 'en' / translation
+    directory.mkdir(parents=True, exist_ok=True)
+    data = {'books': [{'name': 'Genesis', 'chapters': [
+        {'chapter': chapter, 'verses': [{'verse': 1, 'text': text}]} for chapter, text in chapters.items()
+    ]}]}
+    (directory / f"{translation}.json").write_text(json.dumps(data), encoding='utf-8')
+
+
+def generate_all(source_directory, format_directory):
+    generator = StaticGenerator(str(source_directory), str(format_directory))
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator.generate_all()
+    with open(generator.manifest_path, encoding='utf-8') as file:
+        return generator, json.load(file)
+
+
+@pytest.fixture
+def directories(tmp_path):
+    source_directory = tmp_path / 'sources'
+    write_translation(source_directory, 'A', {1: 'In the beginning', 2: 'Thus the heavens'})
+    write_translation(source_directory, 'B', {1: 'IN THE BEGINNING'})
+    return source_directory, tmp_path / 'formats'
+
+
+def test_static_tree_and_manifest(directories):
+    source_directory, format_directory = directories
+    generator, manifest = generate_all(source_directory, format_directory)
+    static = format_directory / 'static'
+    assert sorted(manifest) == ['A/1/1.json', 'A/1/2.json', 'A/books.json', 'B/1/1.json', 'B/books.json',
+                                'translations.json']
+    variants = ['.gz', '.br'] if brotli is not None else ['.gz']
+    assert manifest['A/1/2.json']['variants'] == variants
+    chapter = json.loads((static / 'A' / '1' / '2.json').read_text(encoding='utf-8'))
+    assert chapter['verses'] == [{'verse': 1, 'text': 'Thus the heavens'}]
+    assert generator.written == 6
+
+    # Unchanged documents are left alone, but a missing variant is written again
+    os.remove(static / 'A' / '1' / '1.json.gz')
+    generator, _ = generate_all(source_directory, format_directory)
+    assert (static / 'A' / '1' / '1.json.gz').exists()
+    assert (generator.written, generator.unchanged) == (1, 5)
+
+
+def test_removed_chapters_and_translations_are_pruned(directories):
+    source_directory, format_directory = directories
+    generate_all(source_directory, format_directory)
+    static = format_directory / 'static'
+    write_translation(source_directory, 'A', {1: 'In the beginning'})
+    os.remove(source_directory / 'en' / 'B' / 'B.json')
+
+    _, manifest = generate_all(source_directory, format_directory)
+
+    assert sorted(manifest) == ['A/1/1.json', 'A/books.json', 'translations.json']
+    assert not (static / 'A' / '1' / '2.json').exists()
+    assert not (static / 'A' / '1' / '2.json.gz').exists()
+    assert not any(path.is_file() for path in (static / 'B').rglob('*'))
+    assert [entry['translation'] for entry in json.loads((static / 'translations.json').read_text())] == ['A']
@@ -0,0 +1,76 @@
+import pytest
+
+from versification.canon import make_key
+from versification.references import format_range, parse_reference, resolve_book
+
+
+def formatted(text):
+    return [format_range(first, last) for first, last in parse_reference(text)]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Ps 23', [(19023000, 19023999)]),
+    ('Gen 1-3', [(1001000, 1003999)]),
+    ('Gen 1:1', [(1001001, 1001001)]),
+    ('Gen 1:1-3', [(1001001, 1001003)]),
+    ('Jn 3:16-4:2', [(43003016, 43004002)]),
+    ('Gen 1-2:3', [(1001000, 1002003)]),
+    ('Jude 3', [(65001003, 65001003)]),
+    ('Jude 3-5', [(65001003, 65001005)]),
+    ('Gen 1:1; 2:4', [(1001001, 1001001), (1002004, 1002004)]),
+    ('Jn 3:16, 18', [(43003016, 43003016), (43003018, 43003018)]),
+    ('Gen 1:1; Ex 2', [(1001001, 1001001), (2002000, 2002999)]),
+    ('Ps 150:6', [(19150006, 19150006)]),
+    ('Ps 119:176', [(19119176, 19119176)]),
+])
+def test_parse_reference(text, expected):
+    assert parse_reference(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Ps 23', ['Psalms 23']),
+    ('Gen 1-3', ['Genesis 1-3']),
+    ('Gen 1:1-3', ['Genesis 1:1-3']),
+    ('Jn 3:16-4:2', ['John 3:16-4:2']),
+    ('Gen 1-2:3', ['Genesis 1-2:3']),
+    ('Jn 3:16, 18', ['John 3:16', 'John 3:18']),
+])
+def test_format_range(text, expected):
+    assert formatted(text) == expected
+
+
+def test_formatted_ranges_parse_back():
+    for text in ['Gen 1-2:3', 'Jn 3:16-4:2', 'Gen 1:1-3', 'Ps 23', 'Gen 1-3']:
+        assert parse_reference(formatted(text)[0]) == parse_reference(text)
+
+
+@pytest.mark.parametrize('text', [
+    'Gen 1:1-1500',    # would run on into Genesis 2:500
+    'Gen 1:5000',      # would be "Genesis 6:0"
+    'Gen 1:31-2000:1',  # would end in Leviticus
+    'Gen 151',
+    'Gen 1-151',
+    'Gen 0:1',
+    'Jn 3:16, 1000',
+    'Jude 1000',
+])
+def test_out_of_range_numbers_are_refused(text):
+    with pytest.raises(ValueError):
+        parse_reference(text)
+
+
+@pytest.mark.parametrize('text', ['Gen 2:1-1:5', 'Xyz 1:1', 'Jo 1:1', '3:16', '', 'Gen 1:1:1'])
+def test_invalid_references_are_refused(text):
+    with pytest.raises(ValueError):
+        parse_reference(text)
+
+
+def test_book_only_reference_covers_every_chapter():
+    assert parse_reference('Genesis') == [(make_key(1, 1, 0), make_key(1, 150, 999))]
+
+
+@pytest.mark.parametrize('name, book', [
+    ('Gen', 1), ('Philem', 57), ('I John', 62), ('1 Jn', 62), ('Rev', 66), ('Jo', None),
+])
+def test_resolve_book(name, book):
+    assert resolve_book(name) == book
@@ -0,0 +1,271 @@
+import math
+import random
+import re
+
+import numpy as np
+import pytest
+
+from search import varint
+from search.fuzzy import edit_distance, pattern_masks
+from search.index import SearchIndex, write_index
+from search.suggest import PROPER_NOUN, TERM, SuggestIndex, book_entries, write_suggest_index
+from search.tokenizers import get_tokenizer
+from search.trigrams import TrigramIndex, check_pattern, write_trigram_index
+
+VERSES = [
+    (1001001, "In the beginning God created the heaven and the earth."),
+    (1001002, "And the earth was without form, and void; and darkness was upon the face of the deep."),
+    (1001003, "And God said, Let there be light: and there was light."),
+    (1001004, "And God saw the light, that it was good."),
+    (1001005, "Light, light, light."),
+]
+
+
+@pytest.fixture(scope='module')
+def index(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('search') / 'T.idx')
+    write_index(path, VERSES, language='en', translation='T')
+    index = SearchIndex(path)
+    yield index
+    index.close()
+
+
+def reference_bm25(term, k1=1.2, b=0.75):
+    """BM25 scores of one term over VERSES, from the definition"""
+    tokenizer = get_tokenizer('en')
+    documents = {key: tokenizer.terms(text) for key, text in VERSES}
+    average = sum(len(terms) for terms in documents.values()) / len(documents)
+    df = sum(term in terms for terms in documents.values())
+    idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+    scores = {}
+    for key, terms in documents.items():
+        tf = terms.count(term)
+        if tf:
+            scores[key] = idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(terms) / average))
+    return scores
+
+
+# varint
+
+def test_varint_round_trip():
+    rng = np.random.default_rng(0)
+    values = np.concatenate((
+        [0, 1, 127, 128, 16383, 16384, 2 ** 21 - 1, 2 ** 21, 2 ** 28, 2 ** 32 - 1],
+        rng.integers(0, 2 ** 32, 1000, dtype=np.uint64),
+    )).astype(np.uint64)
+    encoded = varint.encode(values)
+    assert len(encoded) == int(varint.encoded_sizes(values).sum())
+    assert varint.decode(encoded).tolist() == values.tolist()
+    assert varint.decode(b'').size == 0
+
+
+def test_varint_single_byte_values():
+    values = np.arange(128, dtype=np.uint64)
+    assert varint.encode(values) == bytes(range(128))
+    assert varint.decode(varint.encode(values)).tolist() == values.tolist()
+
+
+def test_delta_round_trip():
+    values = np.cumsum(np.random.default_rng(1).integers(0, 5000, 500)).astype(np.int64)
+    assert varint.decode_deltas(varint.encode_deltas(values)).tolist() == values.tolist()
+
+
+def test_segmented_deltas_restart_per_segment():
+    segments = [[0, 3, 9], [2], [1, 4, 5, 200]]
+    gaps = [value for segment in segments for value in np.diff(segment, prepend=0)]
+    decoded = varint.decode_segmented_deltas(varint.encode(gaps), [len(segment) for segment in segments])
+    assert decoded.tolist() == [value for segment in segments for value in segment]
+
+
+def test_run_byte_lengths():
+    values = [1, 300, 5, 70000, 2]
+    runs = [2, 0, 3]
+    expected = [len(varint.encode(values[:2])), 0, len(varint.encode(values[2:]))]
+    assert varint.run_byte_lengths(values, runs).tolist() == expected
+
+
+# positional index and BM25
+
+def test_rank_matches_reference_bm25(index):
+    expected = reference_bm25('light')
+    keys, scores, total = index.rank('light')
+    assert total == len(expected)
+    assert keys == sorted(expected, key=lambda key: (-expected[key], key))
+    assert scores == pytest.approx([expected[key] for key in keys], rel=1e-5)
+
+
+def test_rank_orders_by_score_then_canonical_key(index):
+    keys, scores, total = index.rank('god')
+    assert total == 3
+    assert all(a >= b for a, b in zip(scores, scores[1:]))
+    assert keys[0] == 1001004  # the shortest verse with "god"
+    assert index.rank('god', limit=2)[0] == keys[:2]
+
+
+def test_phrase_and_proximity(index):
+    assert index.search('"the earth"') == [1001001, 1001002]
+    assert index.search('"earth the"') == []
+    assert index.search('"god light"~5') == [1001003, 1001004]
+    assert index.search('"god light"~3') == [1001004]
+    assert index.search('"god light"~2') == []
+    assert index.search('god "the light"') == [1001004]
+
+
+def test_highlight_offsets(index):
+    text = dict(VERSES)
+    spans = index.highlights([1001001, 1001003, 9009009], 'earth light')
+    start = text[1001001].index('earth')
+    assert spans[0] == [[start, start + len('earth')]]
+    assert [text[1001003][s:e] for s, e in spans[1]] == ['light', 'light']
+    assert spans[2] == []
+
+
+def test_phrase_highlights_cover_the_whole_phrase(index):
+    text = dict(VERSES)
+    spans = index.highlights([1001002], '"the earth"')
+    assert [text[1001002][s:e] for s, e in spans[0]] == ['the earth']
+
+
+# trigram search
+
+TRIGRAM_PATTERNS = [
+    'light', 'l.ght', 'the (earth|heaven)', '^And', 'GOD', r'[aeiou]{3}', r'ea\w+h', 'form|void', 'x?y?z?',
+    r'\bwas\b', 'be(ginning)?', 'Let there',
+]
+
+
+@pytest.fixture(scope='module')
+def trigrams(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('trigrams') / 'trigrams.idx')
+    write_trigram_index(path, [('A', 'en', VERSES), ('B', 'en', [(key, text.upper()) for key, text in VERSES])])
+    index = TrigramIndex(path)
+    yield index
+    index.close()
+
+
+@pytest.mark.parametrize('pattern', TRIGRAM_PATTERNS)
+@pytest.mark.parametrize('ignore_case', [True, False])
+def test_trigram_search_matches_brute_force(trigrams, pattern, ignore_case):
+    compiled = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+    expected = []
+    for translation, verses in (('A', VERSES), ('B', [(key, text.upper()) for key, text in VERSES])):
+        for key, text in verses:
+            spans = [m.span() for m in compiled.finditer(text) if m.end() > m.start()]
+            if spans:
+                expected.append((translation, key, text, spans))
+    matches, _, truncated = trigrams.search(pattern, limit=100, ignore_case=ignore_case)
+    assert not truncated
+    assert matches == expected
+
+
+def test_trigram_literal_search(trigrams):
+    matches, _, _ = trigrams.search('light.', ['A'], literal=True)
+    assert [key for _, key, _, _ in matches] == [1001003, 1001005]
+
+
+def test_trigram_search_limit(trigrams):
+    matches, _, truncated = trigrams.search('and', limit=2)
+    assert len(matches) == 2 and truncated
+
+
+@pytest.mark.parametrize('pattern', [
+    '(a+)+$', '(.*a){20}', '(a*)*', r'(?:\w+\s)+x', '(a?){30}', '(?=(a+)+$)', '(?!(a*)*b)', '(?<!(a+)+)x',
+    '(?>(a+)+)', '(a)?(?(1)(b+)+|c)', '(a++)+',
+])
+def test_nested_quantifiers_are_refused(pattern):
+    with pytest.raises(ValueError):
+        check_pattern(pattern)
+
+
+@pytest.mark.parametrize('pattern', ['a.*b.*c', '(ab){3}', '(a{2})+', r'\w+\s+\w+', '(a|b)*c', '(?=a+)b+', '(?>a+)b'])
+def test_plain_quantifiers_are_accepted(pattern):
+    assert check_pattern(pattern) == pattern
+
+
+def test_long_patterns_are_refused():
+    with pytest.raises(ValueError):
+        check_pattern('a' * 1000)
+
+
+# edit distance
+
+def reference_osa(a, b):
+    """Optimal string alignment distance by dynamic programming"""
+    d = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(len(a) + 1):
+        d[i][0] = i
+    for j in range(len(b) + 1):
+        d[0][j] = j
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[len(a)][len(b)]
+
+
+def test_edit_distance_matches_reference_osa():
+    rng = random.Random(0)
+    for _ in range(3000):
+        a = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 9)))
+        b = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 9)))
+        assert edit_distance(a, b) == reference_osa(a, b), (a, b)
+
+
+def test_edit_distance_examples():
+    assert edit_distance('melchisedek', 'melchizedek') == 1
+    assert edit_distance('lihgt', 'light') == 1  # one transposition
+    assert edit_distance('ca', 'abc') == 3  # OSA does not edit a transposed pair again
+    masks = pattern_masks('nebuchadnezzar')
+    assert edit_distance('nebuchadnezzar', 'nebucadnezar', masks) == 2
+
+
+def test_correct_query_uses_the_vocabulary(index):
+    assert index.correct_query('lihgt') == ('light', {'lihgt': 'light'})
+    assert index.correct_query('light') == ('light', {})
+
+
+# suggest
+
+TERMS = [
+    ('abraham', 'Abraham', 250, 0, PROPER_NOUN),
+    ('abram', 'Abram', 61, 0, PROPER_NOUN),
+    ('abide', 'abide', 80, 0, TERM),
+    ('abomination', 'abomination', 120, 0, TERM),
+    ('ab', 'Ab', 1, 0, TERM),
+    ('bread', 'bread', 300, 0, TERM),
+    ('zion', 'Zion', 150, 0, PROPER_NOUN),
+]
+
+
+@pytest.fixture(scope='module')
+def suggest(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('suggest') / 'suggest.idx')
+    write_suggest_index(path, book_entries({1: 1533, 2: 1213}), [('T', 'word', TERMS)])
+    index = SuggestIndex(path)
+    yield index
+    index.close()
+
+
+def test_suggest_prefix_ranges_match_brute_force(suggest):
+    block = suggest.translations['T']
+    keys = [key for key, *_ in TERMS]
+    prefixes = {key[:n] for key in keys for n in range(1, len(key) + 1)} | {'x', 'abz', 'zz'}
+    for prefix in sorted(prefixes):
+        found = [block.key(i).decode('utf-8') for i in block.complete(prefix, 100)]
+        expected = sorted((key for key, _, weight, _, _ in TERMS if key.startswith(prefix)),
+                          key=lambda key: -dict((k, w) for k, _, w, _, _ in TERMS)[key])
+        assert found == expected, prefix
+
+
+def test_suggest_limit_keeps_the_heaviest(suggest):
+    terms = suggest.suggest('ab', 'T', limit=2)['terms']
+    assert [term['term'] for term in terms] == ['abraham', 'abomination']
+    assert terms[0] == {'term': 'abraham', 'label': 'Abraham', 'kind': 'name', 'weight': 250}
+
+
+def test_suggest_books(suggest):
+    books = suggest.suggest('gen', limit=5)['books']
+    assert books[0]['book'] == 1
+    assert suggest.suggest('', 'T')['terms'] == []
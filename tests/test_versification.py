@@ -0,0 +1,89 @@
+import pytest
+
+from versification.alignment import compare_translations
+from versification.canon import make_key
+from versification.mapping import convert_key, get_mapper, native_chapters
+from versification.schemes import SCHEME_RULES
+
+
+@pytest.mark.parametrize('scheme, canonical, native', [
+    ('MT', (1, 31, 55), (1, 32, 1)),
+    ('MT', (1, 32, 1), (1, 32, 2)),
+    ('MT', (29, 2, 28), (29, 3, 1)),
+    ('MT', (29, 3, 1), (29, 4, 1)),
+    ('MT', (29, 3, 21), (29, 4, 21)),
+    ('MT', (39, 3, 18), (39, 3, 18)),
+    ('MT', (39, 4, 1), (39, 3, 19)),
+    ('MT', (39, 4, 6), (39, 3, 24)),
+    ('MT', (19, 3, 0), (19, 3, 1)),  # the superscription is verse 1
+    ('MT', (19, 3, 1), (19, 3, 2)),
+    ('MT', (19, 1, 1), (19, 1, 1)),
+    ('Vulg', (19, 9, 20), (19, 9, 21)),
+    ('Vulg', (19, 10, 1), (19, 9, 22)),
+    ('Vulg', (19, 10, 18), (19, 9, 39)),
+    ('Vulg', (19, 23, 1), (19, 22, 1)),
+    ('Vulg', (19, 116, 10), (19, 115, 1)),
+    ('Vulg', (19, 147, 12), (19, 147, 1)),
+    ('KJV', (29, 3, 1), (29, 3, 1)),
+])
+def test_mapping_tables(scheme, canonical, native):
+    mapper = get_mapper(scheme)
+    assert mapper.from_canonical(make_key(*canonical)) == make_key(*native)
+    assert mapper.to_canonical(make_key(*native)) == make_key(*canonical)
+
+
+@pytest.mark.parametrize('scheme', sorted(SCHEME_RULES))
+def test_mappings_round_trip(scheme):
+    mapper = get_mapper(scheme)
+    for book in (1, 2, 19, 27, 28, 29, 39):
+        for chapter in range(1, 151 if book == 19 else 51):
+            for verse in range(0, 60):
+                key = make_key(book, chapter, verse)
+                native = mapper.from_canonical(key)
+                if native is not None:
+                    assert mapper.to_canonical(native) == key
+
+
+def test_convert_between_schemes():
+    assert convert_key(make_key(29, 4, 1), 'MT', 'KJV') == make_key(29, 3, 1)
+    assert convert_key(make_key(19, 9, 22), 'Vulg', 'MT') == make_key(19, 10, 1)
+    assert convert_key(make_key(1, 1, 1), 'MT', 'MT') == make_key(1, 1, 1)
+
+
+def test_native_chapters_of_a_split_chapter():
+    assert native_chapters('MT', 29, 2) == ((29, 2), (29, 3))
+    assert (39, 3) in native_chapters('MT', 39, 4)
+    assert native_chapters('Vulg', 19, 10) == ((19, 9),)
+
+
+def test_unmapped_scheme_is_aligned_as_kjv_and_reported(capsys):
+    get_mapper.cache_clear()
+    mapper = get_mapper('Calvin')
+    assert 'Calvin has no mapping rules' in capsys.readouterr().out
+    assert mapper.from_canonical(make_key(39, 4, 1)) == make_key(39, 4, 1)
+    get_mapper('KJV')
+    assert capsys.readouterr().out == ''
+
+
+def document(verses):
+    books = {}
+    for book, chapter, verse, text in verses:
+        chapters = books.setdefault(book, {})
+        chapters.setdefault(chapter, []).append({'verse': verse, 'text': text})
+    return {'books': [{'name': name, 'chapters': [{'chapter': chapter, 'verses': verses}
+                                                  for chapter, verses in chapters.items()]}
+                      for name, chapters in books.items()]}
+
+
+def test_compare_translations_across_schemes():
+    kjv = document([('Joel', 2, 32, 'a'), ('Joel', 3, 1, 'b'), ('Malachi', 4, 1, 'c')])
+    mt = document([('Joel', 3, 5, 'a'), ('Joel', 4, 1, 'b'), ('Malachi', 3, 19, 'c')])
+    assert compare_translations(kjv, mt, 'MT', source_scheme='KJV', target_scheme='MT') == []
+    # With one scheme on both sides the native numbers are compared as they are
+    assert "Verse Joel 2:32 not found in MT data." in compare_translations(kjv, mt, 'MT')
+
+
+def test_compare_translations_reports_a_missing_verse_once():
+    source = document([('Genesis', 1, verse, str(verse)) for verse in range(1, 6)])
+    target = document([('Genesis', 1, verse, str(verse)) for verse in (1, 2, 4, 5)])
+    assert compare_translations(source, target, 'JSON') == ["Verse Genesis 1:3 not found in JSON data."]
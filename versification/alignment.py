@@ -0,0 +1,91 @@
+"""
+Align the verses of two translations on canonical verse keys.
+
+Both sides are indexed into ``{key: verse}`` dictionaries, so a verse missing
+on one side is reported once instead of shifting every verse after it.
+
+The verify scripts compare a translation's source with its own export, so
+both sides share a scheme and keep their native numbering. Only documents
+in two different schemes (say a KJV and a Hebrew-numbered translation) are
+mapped to canonical keys before they are aligned.
+"""
+
+from versification.canon import book_number, format_key, make_key
+from versification.mapping import get_mapper
+from versification.schemes import DEFAULT_SCHEME
+
+
+def iter_translation_verses(data):
+    """Yield (book name, chapter, verse, text) from a {'books': [...]} translation document"""
+    for book in data.get('books', []):
+        for chapter in book.get('chapters', []):
+            for verse in chapter.get('verses', []):
+                yield book['name'], chapter['chapter'], verse['verse'], verse['text']
+
+
+def index_translation(data, scheme=DEFAULT_SCHEME):
+    """Index a translation document by canonical key; returns (index, unresolved book names)
+
+    With ``scheme=None`` the keys keep the document's own chapter and verse numbers.
+    """
+    mapper = get_mapper(scheme) if scheme else None
+    index = {}
+    unresolved = set()
+    for book_name, chapter, verse, text in iter_translation_verses(data):
+        book = book_number(book_name)
+        if book is None:
+            unresolved.add(book_name)
+            continue
+        key = make_key(book, int(chapter), int(verse))
+        if mapper:
+            key = mapper.to_canonical(key)
+        if key is not None:
+            index.setdefault(key, text)
+    return index, unresolved
+
+
+def books_from_chapter_map(data):
+    """Turn a {book: {chapter: [verses]}} mapping into a {'books': [...]} document"""
+    return {'books': [
+        {'name': book, 'chapters': [{'chapter': chapter, 'verses': verses} for chapter, verses in chapters.items()]}
+        for book, chapters in data.items()
+    ]}
+
+
+def align(source_index, target_index):
+    """Merge two canonical indexes; returns (pairs, missing from target, extra in target)"""
+    pairs = []
+    missing = []
+    for key in sorted(source_index):
+        if key in target_index:
+            pairs.append((key, source_index[key], target_index[key]))
+        else:
+            missing.append(key)
+    extra = sorted(key for key in target_index if key not in source_index)
+    return pairs, missing, extra
+
+
+def compare_translations(source_data, target_data, label, normalize=None,
+                         source_scheme=DEFAULT_SCHEME, target_scheme=DEFAULT_SCHEME):
+    """Compare two translation documents verse by verse and describe every difference"""
+    normalize = normalize or (lambda text: text)
+    if source_scheme == target_scheme:
+        # Same numbering on both sides: compare native positions, nothing gets dropped
+        source_scheme = target_scheme = None
+    source_index, source_unresolved = index_translation(source_data, source_scheme)
+    target_index, target_unresolved = index_translation(target_data, target_scheme)
+    pairs, missing, extra = align(source_index, target_index)
+
+    differences = []
+    for name in sorted(source_unresolved | target_unresolved):
+        differences.append(f"Book '{name}' could not be matched to a canonical book.")
+    for key in missing:
+        differences.append(f"Verse {format_key(key)} not found in {label} data.")
+    for key in extra:
+        differences.append(f"Verse {format_key(key)} only found in {label} data.")
+    for key, source_text, target_text in pairs:
+        source_text = normalize(source_text)
+        target_text = normalize(target_text)
+        if source_text != target_text:
+            differences.append(f"Verse text mismatch in {format_key(key)}:\n{source_text} (source) vs\n{target_text} ({label})")
+    return differences
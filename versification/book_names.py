@@ -0,0 +1,110 @@
+"""
+Book names and abbreviations in the languages of the translations in sources/.
+
+Used by ``versification.references`` to resolve the book part of a reference
+typed in any of these languages. Names are listed in canonical book order
+(Genesis = 1 ... Revelation = 66); accents, case, dots and spaces are
+ignored when they are matched, and any unambiguous prefix of a name is
+accepted, so only abbreviations that are not prefixes need to be listed.
+"""
+
+# Abbreviations that are not prefixes of a full name, or that would otherwise be ambiguous
+ENGLISH_ABBREVIATIONS = {
+    1: ['Gn'], 2: ['Ex'], 3: ['Lv'], 4: ['Nm', 'Nb'], 5: ['Dt'], 6: ['Jos'], 7: ['Jdg', 'Jgs', 'Judg'],
+    8: ['Rt'], 9: ['1 Sm', '1 S'], 10: ['2 Sm', '2 S'], 11: ['1 Kgs', '1 Ki', '1 K'], 12: ['2 Kgs', '2 Ki', '2 K'],
+    13: ['1 Chr', '1 Ch'], 14: ['2 Chr', '2 Ch'], 15: ['Ezr'], 16: ['Ne'], 17: ['Est'], 18: ['Jb'],
+    19: ['Ps', 'Psa', 'Pss', 'Psalm'], 20: ['Pr', 'Prv', 'Prov'], 21: ['Eccl', 'Ecc', 'Qoh'],
+    22: ['Song', 'Sg', 'SS', 'SoS'], 23: ['Is', 'Isa'], 24: ['Jer', 'Jr'], 25: ['Lam'], 26: ['Ezek', 'Ezk'],
+    27: ['Dn'], 28: ['Hos'], 29: ['Jl'], 30: ['Am'], 31: ['Ob', 'Obad'], 32: ['Jon', 'Jnh'], 33: ['Mi', 'Mic'],
+    34: ['Na', 'Nah'], 35: ['Hb', 'Hab'], 36: ['Zep', 'Zph'], 37: ['Hg', 'Hag'], 38: ['Zec', 'Zch'], 39: ['Mal'],
+    40: ['Mt'], 41: ['Mk', 'Mr'], 42: ['Lk'], 43: ['Jn', 'Jhn'], 44: ['Ac'], 45: ['Rom', 'Rm'],
+    46: ['1 Co', '1 Cor'], 47: ['2 Co', '2 Cor'], 48: ['Gal'], 49: ['Eph'], 50: ['Php', 'Phil', 'Phlp'],
+    51: ['Col'], 52: ['1 Th', '1 Thess'], 53: ['2 Th', '2 Thess'], 54: ['1 Ti', '1 Tim'], 55: ['2 Ti', '2 Tim'],
+    56: ['Tit'], 57: ['Phm', 'Philem', 'Phlm'], 58: ['Heb'], 59: ['Jas', 'Jm'], 60: ['1 Pe', '1 Pet', '1 Pt'],
+    61: ['2 Pe', '2 Pet', '2 Pt'], 62: ['1 Jn', '1 Jo'], 63: ['2 Jn', '2 Jo'], 64: ['3 Jn', '3 Jo'], 65: ['Jude'],
+    66: ['Rev', 'Rv', 'Apoc'],
+}
+
+GERMAN_NAMES = [
+    ['1. Mose', '1 Mo', 'Genesis'], ['2. Mose', '2 Mo', 'Exodus'], ['3. Mose', '3 Mo', 'Levitikus'],
+    ['4. Mose', '4 Mo', 'Numeri'], ['5. Mose', '5 Mo', 'Deuteronomium'], ['Josua'], ['Richter'], ['Rut'],
+    ['1. Samuel'], ['2. Samuel'], ['1. Könige', '1 Kön'], ['2. Könige', '2 Kön'], ['1. Chronik'], ['2. Chronik'],
+    ['Esra'], ['Nehemia'], ['Ester'], ['Hiob', 'Ijob'], ['Psalmen'], ['Sprüche', 'Sprichwörter', 'Spr'],
+    ['Prediger', 'Kohelet', 'Pred'], ['Hoheslied', 'Hohelied', 'Hld'], ['Jesaja'], ['Jeremia'], ['Klagelieder', 'Klgl'],
+    ['Hesekiel', 'Ezechiel'], ['Daniel'], ['Hosea'], ['Joel'], ['Amos'], ['Obadja'], ['Jona'], ['Micha'], ['Nahum'],
+    ['Habakuk'], ['Zefanja', 'Zephanja'], ['Haggai'], ['Sacharja'], ['Maleachi'],
+    ['Matthäus'], ['Markus'], ['Lukas'], ['Johannes', 'Joh'], ['Apostelgeschichte', 'Apg'], ['Römer'],
+    ['1. Korinther', '1 Kor'], ['2. Korinther', '2 Kor'], ['Galater'], ['Epheser'], ['Philipper'], ['Kolosser'],
+    ['1. Thessalonicher'], ['2. Thessalonicher'], ['1. Timotheus'], ['2. Timotheus'], ['Titus'], ['Philemon'],
+    ['Hebräer'], ['Jakobus', 'Jak'], ['1. Petrus'], ['2. Petrus'], ['1. Johannes', '1 Joh'], ['2. Johannes', '2 Joh'],
+    ['3. Johannes', '3 Joh'], ['Judas'], ['Offenbarung', 'Offb'],
+]
+
+FRENCH_NAMES = [
+    ['Genèse'], ['Exode'], ['Lévitique'], ['Nombres'], ['Deutéronome'], ['Josué'], ['Juges'], ['Ruth'],
+    ['1 Samuel'], ['2 Samuel'], ['1 Rois'], ['2 Rois'], ['1 Chroniques'], ['2 Chroniques'], ['Esdras'], ['Néhémie'],
+    ['Esther'], ['Job'], ['Psaumes'], ['Proverbes'], ['Ecclésiaste'], ['Cantique des cantiques', 'Cantique'],
+    ['Ésaïe', 'Isaïe'], ['Jérémie'], ['Lamentations'], ['Ézéchiel'], ['Daniel'], ['Osée'], ['Joël'], ['Amos'],
+    ['Abdias'], ['Jonas'], ['Michée'], ['Nahum'], ['Habacuc'], ['Sophonie'], ['Aggée'], ['Zacharie'], ['Malachie'],
+    ['Matthieu'], ['Marc'], ['Luc'], ['Jean'], ['Actes'], ['Romains'], ['1 Corinthiens'], ['2 Corinthiens'],
+    ['Galates'], ['Éphésiens'], ['Philippiens'], ['Colossiens'], ['1 Thessaloniciens'], ['2 Thessaloniciens'],
+    ['1 Timothée'], ['2 Timothée'], ['Tite'], ['Philémon'], ['Hébreux'], ['Jacques'], ['1 Pierre'], ['2 Pierre'],
+    ['1 Jean'], ['2 Jean'], ['3 Jean'], ['Jude'], ['Apocalypse'],
+]
+
+SPANISH_NAMES = [
+    ['Génesis'], ['Éxodo'], ['Levítico'], ['Números'], ['Deuteronomio'], ['Josué'], ['Jueces'], ['Rut'],
+    ['1 Samuel'], ['2 Samuel'], ['1 Reyes'], ['2 Reyes'], ['1 Crónicas'], ['2 Crónicas'], ['Esdras'], ['Nehemías'],
+    ['Ester'], ['Job'], ['Salmos'], ['Proverbios'], ['Eclesiastés'], ['Cantares', 'Cantar de los Cantares'],
+    ['Isaías'], ['Jeremías'], ['Lamentaciones'], ['Ezequiel'], ['Daniel'], ['Oseas'], ['Joel'], ['Amós'],
+    ['Abdías'], ['Jonás'], ['Miqueas'], ['Nahúm'], ['Habacuc'], ['Sofonías'], ['Hageo'], ['Zacarías'], ['Malaquías'],
+    ['Mateo'], ['Marcos'], ['Lucas'], ['Juan'], ['Hechos'], ['Romanos'], ['1 Corintios'], ['2 Corintios'],
+    ['Gálatas'], ['Efesios'], ['Filipenses'], ['Colosenses'], ['1 Tesalonicenses'], ['2 Tesalonicenses'],
+    ['1 Timoteo'], ['2 Timoteo'], ['Tito'], ['Filemón'], ['Hebreos'], ['Santiago'], ['1 Pedro'], ['2 Pedro'],
+    ['1 Juan'], ['2 Juan'], ['3 Juan'], ['Judas'], ['Apocalipsis'],
+]
+
+DUTCH_NAMES = [
+    ['Genesis'], ['Exodus'], ['Leviticus'], ['Numeri'], ['Deuteronomium'], ['Jozua'], ['Richteren', 'Rechters'],
+    ['Ruth'], ['1 Samuël'], ['2 Samuël'], ['1 Koningen'], ['2 Koningen'], ['1 Kronieken'], ['2 Kronieken'], ['Ezra'],
+    ['Nehemia'], ['Esther'], ['Job'], ['Psalmen'], ['Spreuken'], ['Prediker'], ['Hooglied'], ['Jesaja'], ['Jeremia'],
+    ['Klaagliederen'], ['Ezechiël'], ['Daniël'], ['Hosea'], ['Joël'], ['Amos'], ['Obadja'], ['Jona'], ['Micha'],
+    ['Nahum'], ['Habakuk'], ['Zefanja'], ['Haggai'], ['Zacharia'], ['Maleachi'],
+    ['Mattheüs'], ['Markus'], ['Lukas'], ['Johannes'], ['Handelingen'], ['Romeinen'], ['1 Korinthe'], ['2 Korinthe'],
+    ['Galaten'], ['Efeze'], ['Filippenzen'], ['Kolossenzen'], ['1 Thessalonicenzen'], ['2 Thessalonicenzen'],
+    ['1 Timotheüs'], ['2 Timotheüs'], ['Titus'], ['Filemon'], ['Hebreeën'], ['Jakobus'], ['1 Petrus'], ['2 Petrus'],
+    ['1 Johannes'], ['2 Johannes'], ['3 Johannes'], ['Judas'], ['Openbaring'],
+]
+
+SWEDISH_NAMES = [
+    ['1 Moseboken', '1 Mos'], ['2 Moseboken', '2 Mos'], ['3 Moseboken', '3 Mos'], ['4 Moseboken', '4 Mos'],
+    ['5 Moseboken', '5 Mos'], ['Josua'], ['Domarboken'], ['Rut'], ['1 Samuelsboken'], ['2 Samuelsboken'],
+    ['1 Kungaboken'], ['2 Kungaboken'], ['1 Krönikeboken'], ['2 Krönikeboken'], ['Esra'], ['Nehemja'], ['Ester'],
+    ['Job'], ['Psaltaren'], ['Ordspråksboken'], ['Predikaren'], ['Höga visan'], ['Jesaja'], ['Jeremia'],
+    ['Klagovisorna'], ['Hesekiel'], ['Daniel'], ['Hosea'], ['Joel'], ['Amos'], ['Obadja'], ['Jona'], ['Mika'],
+    ['Nahum'], ['Habackuk'], ['Sefanja'], ['Haggai'], ['Sakarja'], ['Malaki'],
+    ['Matteus'], ['Markus'], ['Lukas'], ['Johannes'], ['Apostlagärningarna'], ['Romarbrevet'],
+    ['1 Korinthierbrevet'], ['2 Korinthierbrevet'], ['Galaterbrevet'], ['Efesierbrevet'], ['Filipperbrevet'],
+    ['Kolosserbrevet'], ['1 Tessalonikerbrevet'], ['2 Tessalonikerbrevet'], ['1 Timoteusbrevet'], ['2 Timoteusbrevet'],
+    ['Titusbrevet'], ['Filemonbrevet'], ['Hebreerbrevet'], ['Jakobsbrevet'], ['1 Petrusbrevet'], ['2 Petrusbrevet'],
+    ['1 Johannesbrevet'], ['2 Johannesbrevet'], ['3 Johannesbrevet'], ['Judasbrevet'], ['Uppenbarelseboken'],
+]
+
+LOCALIZED_NAMES = {
+    'de': GERMAN_NAMES,
+    'fr': FRENCH_NAMES,
+    'es': SPANISH_NAMES,
+    'nl': DUTCH_NAMES,
+    'sv': SWEDISH_NAMES,
+}
+
+
+def iter_book_names():
+    """Yield (book number, name) for every abbreviation and localized name"""
+    for number, names in ENGLISH_ABBREVIATIONS.items():
+        for name in names:
+            yield number, name
+    for names_by_book in LOCALIZED_NAMES.values():
+        for number, names in enumerate(names_by_book, start=1):
+            for name in names:
+                yield number, name
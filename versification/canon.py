@@ -0,0 +1,156 @@
+"""
+Canonical book table and verse keys shared by every translation.
+
+A canonical verse key is a single integer ``BBBCCCVVV`` (book * 1,000,000 +
+chapter * 1,000 + verse) in the KJV versification, extended with the
+deuterocanonical and apocryphal books found in the KJVA, Vulgate and LXX
+modules. Verse 0 holds Psalm superscriptions for schemes that number them.
+Keys sort in canonical order, so ranges of verses are ranges of integers.
+"""
+
+import re
+
+# (canonical number, OSIS id, English name, alternative names used by the sources)
+BOOKS = [
+    (1, 'Gen', 'Genesis', []),
+    (2, 'Exod', 'Exodus', []),
+    (3, 'Lev', 'Leviticus', []),
+    (4, 'Num', 'Numbers', []),
+    (5, 'Deut', 'Deuteronomy', []),
+    (6, 'Josh', 'Joshua', []),
+    (7, 'Judg', 'Judges', []),
+    (8, 'Ruth', 'Ruth', []),
+    (9, '1Sam', '1 Samuel', ['I Samuel', '1 Kingdoms']),
+    (10, '2Sam', '2 Samuel', ['II Samuel', '2 Kingdoms']),
+    (11, '1Kgs', '1 Kings', ['I Kings', '3 Kingdoms']),
+    (12, '2Kgs', '2 Kings', ['II Kings', '4 Kingdoms']),
+    (13, '1Chr', '1 Chronicles', ['I Chronicles']),
+    (14, '2Chr', '2 Chronicles', ['II Chronicles']),
+    (15, 'Ezra', 'Ezra', []),
+    (16, 'Neh', 'Nehemiah', []),
+    (17, 'Esth', 'Esther', []),
+    (18, 'Job', 'Job', []),
+    (19, 'Ps', 'Psalms', ['Psalm']),
+    (20, 'Prov', 'Proverbs', []),
+    (21, 'Eccl', 'Ecclesiastes', ['Qoheleth']),
+    (22, 'Song', 'Song of Solomon', ['Song of Songs', 'Canticles']),
+    (23, 'Isa', 'Isaiah', []),
+    (24, 'Jer', 'Jeremiah', []),
+    (25, 'Lam', 'Lamentations', []),
+    (26, 'Ezek', 'Ezekiel', []),
+    (27, 'Dan', 'Daniel', []),
+    (28, 'Hos', 'Hosea', []),
+    (29, 'Joel', 'Joel', []),
+    (30, 'Amos', 'Amos', []),
+    (31, 'Obad', 'Obadiah', []),
+    (32, 'Jonah', 'Jonah', []),
+    (33, 'Mic', 'Micah', []),
+    (34, 'Nah', 'Nahum', []),
+    (35, 'Hab', 'Habakkuk', []),
+    (36, 'Zeph', 'Zephaniah', []),
+    (37, 'Hag', 'Haggai', []),
+    (38, 'Zech', 'Zechariah', []),
+    (39, 'Mal', 'Malachi', []),
+    (40, 'Matt', 'Matthew', []),
+    (41, 'Mark', 'Mark', []),
+    (42, 'Luke', 'Luke', []),
+    (43, 'John', 'John', []),
+    (44, 'Acts', 'Acts', []),
+    (45, 'Rom', 'Romans', []),
+    (46, '1Cor', '1 Corinthians', ['I Corinthians']),
+    (47, '2Cor', '2 Corinthians', ['II Corinthians']),
+    (48, 'Gal', 'Galatians', []),
+    (49, 'Eph', 'Ephesians', []),
+    (50, 'Phil', 'Philippians', []),
+    (51, 'Col', 'Colossians', []),
+    (52, '1Thess', '1 Thessalonians', ['I Thessalonians']),
+    (53, '2Thess', '2 Thessalonians', ['II Thessalonians']),
+    (54, '1Tim', '1 Timothy', ['I Timothy']),
+    (55, '2Tim', '2 Timothy', ['II Timothy']),
+    (56, 'Titus', 'Titus', []),
+    (57, 'Phlm', 'Philemon', []),
+    (58, 'Heb', 'Hebrews', []),
+    (59, 'Jas', 'James', []),
+    (60, '1Pet', '1 Peter', ['I Peter']),
+    (61, '2Pet', '2 Peter', ['II Peter']),
+    (62, '1John', '1 John', ['I John']),
+    (63, '2John', '2 John', ['II John']),
+    (64, '3John', '3 John', ['III John']),
+    (65, 'Jude', 'Jude', []),
+    (66, 'Rev', 'Revelation', ['Revelation of John', 'Apocalypse']),
+    # Deuterocanonical and apocryphal books
+    (67, 'Tob', 'Tobit', ['Tobias']),
+    (68, 'Jdt', 'Judith', []),
+    (69, 'AddEsth', 'Additions to Esther', ['Esther (Greek)', 'Greek Esther']),
+    (70, 'Wis', 'Wisdom', ['Wisdom of Solomon']),
+    (71, 'Sir', 'Sirach', ['Ecclesiasticus']),
+    (72, 'Bar', 'Baruch', []),
+    (73, 'EpJer', 'Epistle of Jeremiah', ['Letter of Jeremiah']),
+    (74, 'PrAzar', 'Prayer of Azariah', ['Song of the Three Children']),
+    (75, 'Sus', 'Susanna', []),
+    (76, 'Bel', 'Bel and the Dragon', []),
+    (77, '1Macc', '1 Maccabees', ['I Maccabees']),
+    (78, '2Macc', '2 Maccabees', ['II Maccabees']),
+    (79, '3Macc', '3 Maccabees', ['III Maccabees']),
+    (80, '4Macc', '4 Maccabees', ['IV Maccabees']),
+    (81, '1Esd', '1 Esdras', ['I Esdras']),
+    (82, '2Esd', '2 Esdras', ['II Esdras']),
+    (83, 'PrMan', 'Prayer of Manasses', ['Prayer of Manasseh']),
+    (84, 'AddPs', 'Psalm 151', []),
+    (85, 'Odes', 'Odes', []),
+    (86, 'PssSol', 'Psalms of Solomon', []),
+    (87, '1En', '1 Enoch', ['I Enoch', 'Enoch']),
+    (88, 'EpLao', 'Laodiceans', ['Epistle to the Laodiceans']),
+]
+
+BOOK_NUMBERS = {osis: number for number, osis, _, _ in BOOKS}
+BOOK_OSIS = {number: osis for number, osis, _, _ in BOOKS}
+BOOK_NAMES = {number: name for number, _, name, _ in BOOKS}
+
+_ROMAN_PREFIX = re.compile(r'^(iv|iii|ii|i)\s+')
+_ROMAN_DIGITS = {'i': '1', 'ii': '2', 'iii': '3', 'iv': '4'}
+
+
+def normalize_book_name(name):
+    """Lower-case a book name, collapse whitespace and turn Roman prefixes into digits"""
+    name = re.sub(r'\s+', ' ', name.strip().lower())
+    return _ROMAN_PREFIX.sub(lambda m: _ROMAN_DIGITS[m.group(1)] + ' ', name)
+
+
+def _build_name_index():
+    index = {}
+    for number, osis, name, aliases in BOOKS:
+        for alias in [osis, name] + aliases:
+            index[normalize_book_name(alias)] = number
+    return index
+
+
+_NAME_INDEX = _build_name_index()
+
+
+def book_number(name):
+    """Return the canonical book number for an English, Sword or OSIS book name, or None"""
+    return _NAME_INDEX.get(normalize_book_name(name))
+
+
+def make_key(book, chapter, verse):
+    """Pack a canonical book number, chapter and verse into one integer key"""
+    return book * 1000000 + chapter * 1000 + verse
+
+
+def split_key(key):
+    """Unpack a canonical key into (book, chapter, verse)"""
+    book, rest = divmod(key, 1000000)
+    chapter, verse = divmod(rest, 1000)
+    return book, chapter, verse
+
+
+def chapter_bounds(book, chapter):
+    """Return the first and last possible key of a chapter, for range scans"""
+    return make_key(book, chapter, 0), make_key(book, chapter, 999)
+
+
+def format_key(key):
+    """Render a canonical key as a human readable reference, e.g. 'Genesis 1:1'"""
+    book, chapter, verse = split_key(key)
+    return f"{BOOK_NAMES.get(book, book)} {chapter}:{verse}"
@@ -0,0 +1,105 @@
+"""
+Precomputed lookup tables between a versification scheme and the canonical keys.
+
+Rules from ``schemes.SCHEME_RULES`` are expanded once per scheme into plain
+dictionaries, so converting a verse key in either direction costs at most two
+dictionary lookups.
+"""
+
+from functools import lru_cache
+
+from versification.canon import BOOK_NUMBERS, make_key, split_key
+from versification.schemes import DEFAULT_SCHEME, SCHEME_RULES, UNMAPPED_SCHEMES
+
+
+class VersificationMapper:
+    def __init__(self, scheme=DEFAULT_SCHEME):
+        self.scheme = scheme
+        # Explicit verse pairs
+        self._to_canonical = {}
+        self._from_canonical = {}
+        # Whole-chapter shifts: key -> (target book, target chapter, verse delta, first verse)
+        self._chapter_to_canonical = {}
+        self._chapter_from_canonical = {}
+        for rule in SCHEME_RULES.get(scheme, []):
+            self._add_rule(*rule)
+
+    def _add_rule(self, book, chapter, first, last, native_book, native_chapter, native_first):
+        book = BOOK_NUMBERS[book]
+        native_book = BOOK_NUMBERS[native_book]
+        delta = native_first - first
+        if last is None:
+            self._chapter_from_canonical[(book, chapter)] = (native_book, native_chapter, delta, first)
+            self._chapter_to_canonical[(native_book, native_chapter)] = (book, chapter, -delta, native_first)
+            return
+        for verse in range(first, last + 1):
+            canonical_key = make_key(book, chapter, verse)
+            native_key = make_key(native_book, native_chapter, verse + delta)
+            self._to_canonical.setdefault(native_key, canonical_key)
+            self._from_canonical.setdefault(canonical_key, native_key)
+
+    def to_canonical(self, key):
+        """Convert a key in this scheme to a canonical key, or None when it has no counterpart"""
+        canonical = self._to_canonical.get(key)
+        if canonical is not None:
+            return canonical
+        book, chapter, verse = split_key(key)
+        shift = self._chapter_to_canonical.get((book, chapter))
+        if shift is not None:
+            target_book, target_chapter, delta, first = shift
+            return make_key(target_book, target_chapter, verse + delta) if verse >= first else None
+        if key in self._from_canonical or (book, chapter) in self._chapter_from_canonical:
+            # The identical canonical position belongs to another native verse
+            return None
+        return key
+
+    def from_canonical(self, key):
+        """Convert a canonical key to this scheme, or None when the scheme has no such verse"""
+        native = self._from_canonical.get(key)
+        if native is not None:
+            return native
+        book, chapter, verse = split_key(key)
+        shift = self._chapter_from_canonical.get((book, chapter))
+        if shift is not None:
+            target_book, target_chapter, delta, first = shift
+            return make_key(target_book, target_chapter, verse + delta) if verse >= first else None
+        if key in self._to_canonical or (book, chapter) in self._chapter_to_canonical:
+            return None
+        return key
+
+    def canonical_key(self, book, chapter, verse):
+        """Return the canonical key of a (book number, chapter, verse) position in this scheme"""
+        return self.to_canonical(make_key(book, chapter, verse))
+
+
+@lru_cache(maxsize=None)
+def get_mapper(scheme=DEFAULT_SCHEME):
+    """Return the shared mapper for a scheme, building its tables on first use"""
+    if scheme not in SCHEME_RULES or scheme in UNMAPPED_SCHEMES:
+        print(f"Versification {scheme} has no mapping rules; its verses are aligned as KJV")
+    return VersificationMapper(scheme)
+
+
+@lru_cache(maxsize=4096)
+def native_chapters(scheme, book, chapter, max_verse=200):
+    """Native (book, chapter) pairs that may hold verses of a canonical chapter, in reading order"""
+    mapper = get_mapper(scheme)
+    chapters = []
+    # Probe every verse number up to max_verse (Psalm 119 has 176)
+    for verse in range(max_verse + 1):
+        native = mapper.from_canonical(make_key(book, chapter, verse))
+        if native is not None:
+            position = split_key(native)[:2]
+            if position not in chapters:
+                chapters.append(position)
+    return tuple(chapters)
+
+
+def convert_key(key, from_scheme, to_scheme):
+    """Convert a verse key from one scheme to another through the canonical numbering"""
+    if from_scheme == to_scheme:
+        return key
+    canonical = get_mapper(from_scheme).to_canonical(key)
+    if canonical is None:
+        return None
+    return get_mapper(to_scheme).from_canonical(canonical)
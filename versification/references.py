@@ -0,0 +1,212 @@
+"""
+Bible reference parser.
+
+Turns strings such as ``"Gen 1:1-3; Jn 3:16-4:2; Ps 23"`` into canonical
+verse-key ranges ``(first_key, last_key)``. Because canonical keys sort in
+reading order, a range is just two integers, and a whole chapter is
+``make_key(book, chapter, 0) .. make_key(book, chapter, 999)``.
+
+Book names are resolved through a character trie built once at import time
+from the canonical English names, OSIS ids, Sword aliases and the localized
+names in ``book_names``. Any unambiguous prefix of a name resolves
+("Philem", "Offenb", "Apocalyp"); ambiguous prefixes ("Jo") are rejected
+rather than guessed.
+
+Supported forms, separated by ``;`` (new book or chapter) or ``,`` (more
+verses or chapters in the same context):
+
+- ``Ps 23``, ``Gen 1-3``           whole chapters
+- ``Gen 1:1``, ``Gen 1:1-3``      verses in one chapter
+- ``Jn 3:16-4:2``, ``Gen 1-2:3``  ranges across chapters
+- ``Jude 3``                      single-chapter books take a bare verse
+- ``Gen 1:1; 2:4``, ``Jn 3:16, 18`` book and chapter carried forward
+"""
+
+import re
+import unicodedata
+
+from versification.book_names import iter_book_names
+from versification.canon import BOOK_NAMES, BOOKS, make_key, split_key
+
+SINGLE_CHAPTER_BOOKS = {31, 57, 63, 64, 65}  # Obadiah, Philemon, 2 John, 3 John, Jude
+MAX_CHAPTER = 150
+MAX_VERSE = 999
+
+_END = '#end'
+_BOOK = '#book'
+_AMBIGUOUS = 0
+
+_ROMAN_PREFIX = re.compile(r'^(iv|iii|ii|i)\s+')
+_ROMAN_DIGITS = {'i': '1', 'ii': '2', 'iii': '3', 'iv': '4'}
+
+_PART = re.compile(
+    r'^(?:(?P<book>\d?\s*\.?\s*[^\W\d_][^\d]*?)\s*)?'
+    r'(?P<start>\d+)(?:\s*[:.]\s*(?P<start_verse>\d+))?'
+    r'(?:\s*[-–—]\s*(?P<end>\d+)(?:\s*[:.]\s*(?P<end_verse>\d+))?)?$'
+)
+_BOOK_ONLY = re.compile(r'^\d?\s*\.?\s*[^\W\d_][^\d]*$')
+
+
+def fold_name(name):
+    """Matching form of a book name: no accents, case, dots or spaces, Roman prefixes as digits"""
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(ch for ch in name if not unicodedata.combining(ch)).lower()
+    name = re.sub(r'[\s.]+', ' ', name).strip()
+    name = _ROMAN_PREFIX.sub(lambda m: _ROMAN_DIGITS[m.group(1)] + ' ', name)
+    return name.replace(' ', '')
+
+
+class BookTrie:
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, name, number):
+        node = self.root
+        for ch in fold_name(name):
+            node = node.setdefault(ch, {})
+            books = node.get(_BOOK)
+            # Every node remembers which book its prefix leads to, or that it is ambiguous
+            node[_BOOK] = number if books in (None, number) else _AMBIGUOUS
+        node.setdefault(_END, number)
+
+    def lookup(self, name):
+        """Book number for a full name or unambiguous prefix, else None"""
+        node = self.root
+        for ch in fold_name(name):
+            node = node.get(ch)
+            if node is None:
+                return None
+        if _END in node:
+            return node[_END]
+        return node.get(_BOOK) or None
+
+
+def _build_trie():
+    trie = BookTrie()
+    # Full names and explicit abbreviations first, so they win exact-match conflicts
+    for number, osis, name, aliases in BOOKS:
+        for alias in [name, osis] + aliases:
+            trie.insert(alias, number)
+    for number, name in iter_book_names():
+        trie.insert(name, number)
+    return trie
+
+
+BOOK_TRIE = _build_trie()
+
+
+def resolve_book(name):
+    """Canonical book number for a book name or abbreviation in any supported language, or None"""
+    return BOOK_TRIE.lookup(name)
+
+
+def _key(book, chapter, verse, part):
+    """make_key, refusing numbers that would spill into the chapter or book digits"""
+    if not 1 <= chapter <= MAX_CHAPTER:
+        raise ValueError(f"Chapter out of range: {part}")
+    if verse > MAX_VERSE:
+        raise ValueError(f"Verse out of range: {part}")
+    return make_key(book, chapter, verse)
+
+
+def _parse_part(part, book, chapter, has_verses):
+    """Parse one comma-separated part; returns (range, book, chapter, has_verses)"""
+    match = _PART.match(part)
+    if match is None:
+        if _BOOK_ONLY.match(part):
+            number = resolve_book(part)
+            if number is None:
+                raise ValueError(f"Unknown book: {part}")
+            return (make_key(number, 1, 0), make_key(number, MAX_CHAPTER, MAX_VERSE)), number, None, False
+        raise ValueError(f"Cannot parse reference: {part}")
+
+    if match.group('book'):
+        book = resolve_book(match.group('book'))
+        if book is None:
+            raise ValueError(f"Unknown or ambiguous book: {match.group('book').strip()}")
+        chapter, has_verses = None, False
+        if book in SINGLE_CHAPTER_BOOKS and match.group('start_verse') is None:
+            chapter, has_verses = 1, True
+    elif book is None:
+        raise ValueError(f"Reference has no book: {part}")
+
+    start = int(match.group('start'))
+    start_verse = match.group('start_verse')
+    end = match.group('end')
+    end_verse = match.group('end_verse')
+
+    if start_verse is not None:
+        # 3:16, 3:16-18 or 3:16-4:2
+        chapter = start
+        first = _key(book, chapter, int(start_verse), part)
+        if end is None:
+            last = first
+        elif end_verse is None:
+            last = _key(book, chapter, int(end), part)
+        else:
+            chapter = int(end)
+            last = _key(book, chapter, int(end_verse), part)
+        has_verses = True
+    elif has_verses and chapter is not None:
+        # A bare number after verses continues the same chapter: "3:16, 18" or "Jude 3-5"
+        first = _key(book, chapter, start, part)
+        if end is None:
+            last = first
+        elif end_verse is None:
+            last = _key(book, chapter, int(end), part)
+        else:
+            chapter = int(end)
+            last = _key(book, chapter, int(end_verse), part)
+    else:
+        # Whole chapters: 23, 1-3, or 1-2:3
+        chapter = start
+        first = _key(book, chapter, 0, part)
+        if end is None:
+            last = _key(book, chapter, MAX_VERSE, part)
+        elif end_verse is None:
+            chapter = int(end)
+            last = _key(book, chapter, MAX_VERSE, part)
+        else:
+            chapter = int(end)
+            last = _key(book, chapter, int(end_verse), part)
+            has_verses = True
+
+    if last < first:
+        raise ValueError(f"Range ends before it starts: {part}")
+    return (first, last), book, chapter, has_verses
+
+
+def parse_reference(text):
+    """Parse a reference string into a list of canonical (first_key, last_key) ranges"""
+    ranges = []
+    book = None
+    for group in text.split(';'):
+        chapter, has_verses = None, False
+        for part in group.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            key_range, book, chapter, has_verses = _parse_part(part, book, chapter, has_verses)
+            ranges.append(key_range)
+    if not ranges:
+        raise ValueError("Empty reference")
+    return ranges
+
+
+def format_range(first_key, last_key):
+    """Render a canonical key range as a reference, e.g. 'John 3:16-4:2'"""
+    book, chapter, verse = split_key(first_key)
+    last_book, last_chapter, last_verse = split_key(last_key)
+    name = BOOK_NAMES.get(book, book)
+    if verse == 0 and last_verse == MAX_VERSE:
+        if chapter == last_chapter:
+            return f"{name} {chapter}"
+        return f"{name} {chapter}-{last_chapter}"
+    if first_key == last_key:
+        return f"{name} {chapter}:{verse}"
+    if verse == 0 and chapter != last_chapter:
+        # Starts at the top of a chapter and ends in a later one: "Genesis 1-2:3"
+        return f"{name} {chapter}-{last_chapter}:{last_verse}"
+    if chapter == last_chapter:
+        return f"{name} {chapter}:{verse}-{last_verse}"
+    return f"{name} {chapter}:{verse}-{last_chapter}:{last_verse}"
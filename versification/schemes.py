@@ -0,0 +1,178 @@
+"""
+Versification schemes used by the Sword modules in the sources folder.
+
+Every module declares its scheme with a ``Versification=`` line in its
+``mods.d/*.conf`` file (KJV when absent). The rules below describe where a
+scheme departs from the canonical KJV numbering; anything not covered by a
+rule keeps its KJV chapter and verse.
+
+Rules are tuples in canonical terms:
+    (canonical book, chapter, first verse, last verse,
+     native book, native chapter, first native verse)
+meaning canonical verses first..last map one to one onto the native verses
+starting at the given native position.
+"""
+
+import os
+import re
+import zipfile
+from functools import lru_cache
+
+DEFAULT_SCHEME = 'KJV'
+
+# Chapter boundaries where the Hebrew (Masoretic) text divides differently from the KJV.
+MT_CHAPTER_BOUNDARIES = [
+    ('Gen', 31, 55, 55, 'Gen', 32, 1), ('Gen', 32, 1, 32, 'Gen', 32, 2),
+    ('Exod', 8, 1, 4, 'Exod', 7, 26), ('Exod', 8, 5, 32, 'Exod', 8, 1),
+    ('Exod', 22, 1, 1, 'Exod', 21, 37), ('Exod', 22, 2, 31, 'Exod', 22, 1),
+    ('Lev', 6, 1, 7, 'Lev', 5, 20), ('Lev', 6, 8, 30, 'Lev', 6, 1),
+    ('Num', 16, 36, 50, 'Num', 17, 1), ('Num', 17, 1, 13, 'Num', 17, 16),
+    ('Num', 29, 40, 40, 'Num', 30, 1), ('Num', 30, 1, 16, 'Num', 30, 2),
+    ('Deut', 12, 32, 32, 'Deut', 13, 1), ('Deut', 13, 1, 18, 'Deut', 13, 2),
+    ('Deut', 22, 30, 30, 'Deut', 23, 1), ('Deut', 23, 1, 25, 'Deut', 23, 2),
+    ('Deut', 29, 1, 1, 'Deut', 28, 69), ('Deut', 29, 2, 29, 'Deut', 29, 1),
+    ('1Sam', 21, 1, 15, '1Sam', 21, 2),
+    ('1Sam', 23, 29, 29, '1Sam', 24, 1), ('1Sam', 24, 1, 22, '1Sam', 24, 2),
+    ('2Sam', 18, 33, 33, '2Sam', 19, 1), ('2Sam', 19, 1, 43, '2Sam', 19, 2),
+    ('1Kgs', 4, 21, 34, '1Kgs', 5, 1), ('1Kgs', 5, 1, 18, '1Kgs', 5, 15),
+    ('1Kgs', 22, 44, 53, '1Kgs', 22, 45),
+    ('2Kgs', 11, 21, 21, '2Kgs', 12, 1), ('2Kgs', 12, 1, 21, '2Kgs', 12, 2),
+    ('1Chr', 6, 1, 15, '1Chr', 5, 27), ('1Chr', 6, 16, 81, '1Chr', 6, 1),
+    ('1Chr', 12, 5, 40, '1Chr', 12, 6),
+    ('2Chr', 2, 1, 1, '2Chr', 1, 18), ('2Chr', 2, 2, 18, '2Chr', 2, 1),
+    ('2Chr', 14, 1, 1, '2Chr', 13, 23), ('2Chr', 14, 2, 15, '2Chr', 14, 1),
+    ('Neh', 4, 1, 6, 'Neh', 3, 33), ('Neh', 4, 7, 23, 'Neh', 4, 1),
+    ('Neh', 9, 38, 38, 'Neh', 10, 1), ('Neh', 10, 1, 39, 'Neh', 10, 2),
+    ('Job', 41, 1, 8, 'Job', 40, 25), ('Job', 41, 9, 34, 'Job', 41, 1),
+    ('Eccl', 5, 1, 1, 'Eccl', 4, 17), ('Eccl', 5, 2, 20, 'Eccl', 5, 1),
+    ('Song', 6, 13, 13, 'Song', 7, 1), ('Song', 7, 1, 13, 'Song', 7, 2),
+    ('Isa', 9, 1, 1, 'Isa', 8, 23), ('Isa', 9, 2, 21, 'Isa', 9, 1),
+    ('Isa', 64, 2, 12, 'Isa', 64, 1),
+    ('Jer', 9, 1, 1, 'Jer', 8, 23), ('Jer', 9, 2, 26, 'Jer', 9, 1),
+    ('Ezek', 20, 45, 49, 'Ezek', 21, 1), ('Ezek', 21, 1, 32, 'Ezek', 21, 6),
+    ('Dan', 4, 1, 3, 'Dan', 3, 31), ('Dan', 4, 4, 37, 'Dan', 4, 1),
+    ('Dan', 5, 31, 31, 'Dan', 6, 1), ('Dan', 6, 1, 28, 'Dan', 6, 2),
+    ('Hos', 1, 10, 11, 'Hos', 2, 1), ('Hos', 2, 1, 23, 'Hos', 2, 3),
+    ('Hos', 11, 12, 12, 'Hos', 12, 1), ('Hos', 12, 1, 14, 'Hos', 12, 2),
+    ('Hos', 13, 16, 16, 'Hos', 14, 1), ('Hos', 14, 1, 9, 'Hos', 14, 2),
+    ('Joel', 2, 28, 32, 'Joel', 3, 1), ('Joel', 3, 1, 21, 'Joel', 4, 1),
+    ('Jonah', 1, 17, 17, 'Jonah', 2, 1), ('Jonah', 2, 1, 10, 'Jonah', 2, 2),
+    ('Mic', 5, 1, 1, 'Mic', 4, 14), ('Mic', 5, 2, 15, 'Mic', 5, 1),
+    ('Nah', 1, 15, 15, 'Nah', 2, 1), ('Nah', 2, 1, 13, 'Nah', 2, 2),
+    ('Zech', 1, 18, 21, 'Zech', 2, 1), ('Zech', 2, 1, 13, 'Zech', 2, 5),
+    ('Mal', 4, 1, 6, 'Mal', 3, 19),
+]
+
+# Psalms whose superscription is numbered as its own verse(s) in the Hebrew
+# tradition, keyed by KJV psalm number with the number of title verses.
+PSALM_TITLE_VERSES = dict(
+    [(psalm, 1) for psalm in (
+        3, 4, 5, 6, 7, 8, 9, 12, 13, 18, 19, 20, 21, 22, 30, 31, 34, 36, 38, 39,
+        40, 41, 42, 44, 45, 46, 47, 48, 49, 53, 55, 56, 57, 58, 59, 61, 62, 63,
+        64, 65, 67, 68, 69, 70, 75, 76, 77, 80, 81, 83, 84, 85, 88, 89, 92, 102,
+        108, 140, 142)]
+    + [(psalm, 2) for psalm in (51, 52, 54, 60)]
+)
+
+# KJV verse counts of the Psalms that the Greek tradition splits or joins.
+_KJV_PSALM_LENGTHS = {9: 20, 10: 18, 114: 8, 115: 18, 116: 19, 147: 20}
+
+# Additions to Daniel that the Vulgate and Catholic Bibles print inside Daniel.
+DANIEL_ADDITIONS = [
+    ('PrAzar', 1, 1, 67, 'Dan', 3, 24), ('Dan', 3, 24, 30, 'Dan', 3, 91),
+    ('Sus', 1, 1, 64, 'Dan', 13, 1),
+    ('Bel', 1, 1, 42, 'Dan', 14, 1),
+]
+
+
+def greek_psalm_number(psalm):
+    """Return the LXX/Vulgate number of a KJV psalm whose verses map as a whole"""
+    if 11 <= psalm <= 113 or 117 <= psalm <= 146:
+        return psalm - 1
+    return psalm
+
+
+def psalm_title_rules(greek_numbering=False):
+    """Build the verse rules that shift titled Psalms (and renumber them for the Greek order)"""
+    rules = []
+    titles = []
+    for psalm in range(1, 151):
+        if psalm in _KJV_PSALM_LENGTHS and greek_numbering:
+            continue
+        offset = PSALM_TITLE_VERSES.get(psalm, 0)
+        native = greek_psalm_number(psalm) if greek_numbering else psalm
+        if offset == 0 and native == psalm:
+            continue
+        # Open-ended: the chapter rule covers every verse of the psalm.
+        rules.append(('Ps', psalm, 1, None, 'Ps', native, 1 + offset))
+        titles.extend(('Ps', psalm, 0, 0, 'Ps', native, title) for title in range(1, offset + 1))
+    if greek_numbering:
+        title = PSALM_TITLE_VERSES[9]
+        rules += [
+            ('Ps', 9, 0, 0, 'Ps', 9, 1),
+            ('Ps', 9, 1, 20, 'Ps', 9, 1 + title),
+            ('Ps', 10, 1, 18, 'Ps', 9, 21 + title),
+            ('Ps', 114, 1, 8, 'Ps', 113, 1),
+            ('Ps', 115, 1, 18, 'Ps', 113, 9),
+            ('Ps', 116, 1, 9, 'Ps', 114, 1),
+            ('Ps', 116, 10, 19, 'Ps', 115, 1),
+            ('Ps', 147, 1, 11, 'Ps', 146, 1),
+            ('Ps', 147, 12, 20, 'Ps', 147, 1),
+        ]
+    return rules + titles
+
+
+# Scheme name -> list of rules. Schemes missing here are aligned with the KJV.
+SCHEME_RULES = {
+    'KJV': [],
+    'KJVA': [],
+    'NRSV': [],
+    'NRSVA': [],
+    'MT': MT_CHAPTER_BOUNDARIES + psalm_title_rules(),
+    'Leningrad': MT_CHAPTER_BOUNDARIES + psalm_title_rules(),
+    'German': MT_CHAPTER_BOUNDARIES,
+    'Luther': MT_CHAPTER_BOUNDARIES,
+    'Catholic': MT_CHAPTER_BOUNDARIES + psalm_title_rules() + DANIEL_ADDITIONS,
+    'Catholic2': MT_CHAPTER_BOUNDARIES + psalm_title_rules() + DANIEL_ADDITIONS,
+    'Vulg': psalm_title_rules(greek_numbering=True) + DANIEL_ADDITIONS,
+    'LXX': psalm_title_rules(greek_numbering=True),
+    'Synodal': psalm_title_rules(greek_numbering=True),
+    'Orthodox': psalm_title_rules(greek_numbering=True),
+}
+
+# Schemes used by modules in sources/ whose differences from the KJV have no
+# rules yet (Calvin: the French Genevan numbering). They are aligned as KJV,
+# and get_mapper says so once per scheme.
+UNMAPPED_SCHEMES = {'Calvin'}
+
+
+def read_module_versification(zip_path):
+    """Read the Versification= entry from the conf file of a Sword module zip"""
+    with zipfile.ZipFile(zip_path) as archive:
+        for name in archive.namelist():
+            if name.startswith('mods.d/') and name.endswith('.conf'):
+                conf = archive.read(name).decode('utf-8', 'replace')
+                match = re.search(r'^Versification=(\S+)', conf, re.MULTILINE)
+                if match:
+                    return match.group(1)
+    return DEFAULT_SCHEME
+
+
+@lru_cache(maxsize=None)
+def load_scheme_index(source_directory):
+    """Map every translation in the sources folder to its versification scheme"""
+    index = {}
+    for language in sorted(os.listdir(source_directory)):
+        language_path = os.path.join(source_directory, language)
+        if not os.path.isdir(language_path) or language == 'extras':
+            continue
+        for translation in sorted(os.listdir(language_path)):
+            zip_path = os.path.join(language_path, translation, f"{translation}.zip")
+            if os.path.isfile(zip_path):
+                index[translation] = read_module_versification(zip_path)
+    return index
+
+
+def translation_scheme(source_directory, translation):
+    """Return the versification scheme of a translation, defaulting to KJV"""
+    return load_scheme_index(os.path.abspath(source_directory)).get(translation, DEFAULT_SCHEME)